@@ -40,13 +40,11 @@ import os
 import threading
 import time
 import signal
-import traceback
 import getopt
 
 import sickbeard
 
-from sickbeard import db
-from sickbeard.tv import TVShow
+from sickbeard.tv import loadShowsFromDB
 from sickbeard import logger
 from sickbeard.version import SICKBEARD_VERSION
 
@@ -58,25 +56,6 @@ signal.signal(signal.SIGINT, sickbeard.sig_handler)
 signal.signal(signal.SIGTERM, sickbeard.sig_handler)
 
 
-def loadShowsFromDB():
-    """
-    Populates the showList with shows from the database
-    """
-
-    myDB = db.DBConnection()
-    sqlResults = myDB.select("SELECT * FROM tv_shows")
-
-    for sqlShow in sqlResults:
-        try:
-            curShow = TVShow(int(sqlShow["tvdb_id"]))
-            sickbeard.showList.append(curShow)
-        except Exception, e:
-            logger.log(u"There was an error creating the show in " + sqlShow["location"] + ": " + str(e).decode('utf-8'), logger.ERROR)
-            logger.log(traceback.format_exc(), logger.DEBUG)
-
-        # TODO: update the existing shows if the showlist has something in it
-
-
 def daemonize():
     """
     Fork off as a daemon
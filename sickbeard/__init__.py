@@ -38,7 +38,7 @@ from providers import ezrss, tvtorrents, torrentleech, btn, newznab, womble, omg
 from sickbeard.config import CheckSection, check_setting_int, check_setting_str, ConfigMigrator
 
 from sickbeard import searchCurrent, searchBacklog, showUpdater, versionChecker, properFinder, autoPostProcesser
-from sickbeard import helpers, db, exceptions, show_queue, search_queue, scheduler
+from sickbeard import helpers, db, exceptions, show_queue, search_queue, scheduler, scene_exceptions, name_cache, show_name_helpers
 from sickbeard import logger
 from sickbeard import naming
 
@@ -300,6 +300,20 @@ GIT_PATH = None
 
 IGNORE_WORDS = "german,french,core2hd,dutch,swedish,480p"
 
+DB_CACHE_SIZE = 4000
+
+PROVIDER_CACHE_RETENTION = 7
+PROVIDER_THREADS = 4
+PROVIDER_TIMEOUT = 120
+
+SHOW_QUEUE_THREADS = 3
+SEARCH_QUEUE_THREADS = 2
+
+NAME_PARSER_CACHE_SIZE = 1000
+
+# how many episode objects each show keeps around, 0 for no limit
+EPISODE_CACHE_SIZE = 500
+
 __INITIALIZED__ = False
 
 
@@ -343,7 +357,8 @@ def initialize(consoleLogging=True):
                 USE_LISTVIEW, METADATA_XBMC, METADATA_XBMC_12PLUS, METADATA_MEDIABROWSER, METADATA_PS3, METADATA_MEDE8ER, metadata_provider_dict, \
                 GIT_PATH, MOVE_ASSOCIATED_FILES, \
                 COMING_EPS_LAYOUT, COMING_EPS_SORT, COMING_EPS_DISPLAY_PAUSED, METADATA_WDTV, METADATA_TIVO, IGNORE_WORDS, CREATE_MISSING_SHOW_DIRS, \
-                ADD_SHOWS_WO_DIR, ANON_REDIRECT
+                ADD_SHOWS_WO_DIR, ANON_REDIRECT, DB_CACHE_SIZE, PROVIDER_CACHE_RETENTION, PROVIDER_THREADS, PROVIDER_TIMEOUT, \
+                SHOW_QUEUE_THREADS, SEARCH_QUEUE_THREADS, NAME_PARSER_CACHE_SIZE, EPISODE_CACHE_SIZE
 
         if __INITIALIZED__:
             return False
@@ -464,6 +479,15 @@ def initialize(consoleLogging=True):
 
         GIT_PATH = check_setting_str(CFG, 'General', 'git_path', '')
         IGNORE_WORDS = check_setting_str(CFG, 'General', 'ignore_words', IGNORE_WORDS)
+        show_name_helpers.compileReleaseFilter()
+        DB_CACHE_SIZE = check_setting_int(CFG, 'General', 'db_cache_size', 4000)
+        PROVIDER_CACHE_RETENTION = check_setting_int(CFG, 'General', 'provider_cache_retention', 7)
+        PROVIDER_THREADS = max(check_setting_int(CFG, 'General', 'provider_threads', 4), 1)
+        PROVIDER_TIMEOUT = check_setting_int(CFG, 'General', 'provider_timeout', 120)
+        SHOW_QUEUE_THREADS = check_setting_int(CFG, 'General', 'show_queue_threads', 3)
+        SEARCH_QUEUE_THREADS = check_setting_int(CFG, 'General', 'search_queue_threads', 2)
+        NAME_PARSER_CACHE_SIZE = check_setting_int(CFG, 'General', 'name_parser_cache_size', 1000)
+        EPISODE_CACHE_SIZE = check_setting_int(CFG, 'General', 'episode_cache_size', 500)
         EXTRA_SCRIPTS = [x.strip() for x in check_setting_str(CFG, 'General', 'extra_scripts', '').split('|') if x.strip()]
 
         USE_LISTVIEW = bool(check_setting_int(CFG, 'General', 'use_listview', 0))
@@ -640,6 +664,7 @@ def initialize(consoleLogging=True):
 
         # initialize the cache database
         db.upgradeDatabase(db.DBConnection("cache.db"), cache_db.InitialSchema)
+        scene_exceptions.load_exceptions()
 
         # fix up any db problems
         db.sanityCheckDatabase(db.DBConnection(), mainDB.MainSanityCheck)
@@ -736,28 +761,28 @@ def start():
         if __INITIALIZED__:
 
             # start the search scheduler
-            currentSearchScheduler.thread.start()
+            currentSearchScheduler.start()
 
             # start the backlog scheduler
-            backlogSearchScheduler.thread.start()
+            backlogSearchScheduler.start()
 
             # start the show updater
-            showUpdateScheduler.thread.start()
+            showUpdateScheduler.start()
 
             # start the version checker
-            versionCheckScheduler.thread.start()
+            versionCheckScheduler.start()
 
             # start the queue checker
-            showQueueScheduler.thread.start()
+            showQueueScheduler.start()
 
             # start the search queue checker
-            searchQueueScheduler.thread.start()
+            searchQueueScheduler.start()
 
             # start the queue checker
-            properFinderScheduler.thread.start()
+            properFinderScheduler.start()
 
             # start the proper finder
-            autoPostProcesserScheduler.thread.start()
+            autoPostProcesserScheduler.start()
 
             started = True
 
@@ -832,6 +857,9 @@ def halt():
             except:
                 pass
 
+            logger.log(u"Closing all database connections")
+            db.closeAllConnections()
+
             __INITIALIZED__ = False
 
 
@@ -861,6 +889,9 @@ def saveAll():
     for show in showList:
         show.saveToDB()
 
+    # write out any names still waiting in the name cache
+    name_cache.flush()
+
     # save config
     logger.log(u"Saving config file to disk")
     save_config()
@@ -996,6 +1027,14 @@ def save_config():
     new_config['General']['extra_scripts'] = '|'.join(EXTRA_SCRIPTS)
     new_config['General']['git_path'] = GIT_PATH
     new_config['General']['ignore_words'] = IGNORE_WORDS
+    new_config['General']['db_cache_size'] = int(DB_CACHE_SIZE)
+    new_config['General']['provider_cache_retention'] = int(PROVIDER_CACHE_RETENTION)
+    new_config['General']['provider_threads'] = int(PROVIDER_THREADS)
+    new_config['General']['provider_timeout'] = int(PROVIDER_TIMEOUT)
+    new_config['General']['show_queue_threads'] = int(SHOW_QUEUE_THREADS)
+    new_config['General']['search_queue_threads'] = int(SEARCH_QUEUE_THREADS)
+    new_config['General']['name_parser_cache_size'] = int(NAME_PARSER_CACHE_SIZE)
+    new_config['General']['episode_cache_size'] = int(EPISODE_CACHE_SIZE)
 
     new_config['Blackhole'] = {}
     new_config['Blackhole']['nzb_dir'] = NZB_DIR
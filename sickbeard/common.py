@@ -133,40 +133,25 @@ class Quality:
     def nameQuality(name):
         name = os.path.basename(name)
 
-        # if we have our exact text then assume we put it there
-        for x in sorted(Quality.qualityStrings, reverse=True):
-            if x == Quality.UNKNOWN:
-                continue
-
-            regex = '\W' + Quality.qualityStrings[x].replace(' ', '\W') + '\W'
-            regex_match = re.search(regex, name, re.I)
-            if regex_match:
-                return x
-
-        checkName = lambda namelist, func: func([re.search(x, name, re.I) for x in namelist])
+        # if we have our exact text then assume we put it there, most names don't have any of it so check for all of them at once first
+        if Quality._qualityStringsRegex.search(name):
+            for (x, regex) in Quality._qualityStringRegexes:
+                if regex.search(name):
+                    return x
+
+        # a pattern used by more than one rule is only searched for once
+        found = {}
+
+        for (quality, patterns) in Quality._nameQualityRules:
+            for (regex, wanted) in patterns:
+                if regex not in found:
+                    found[regex] = regex.search(name) != None
+                if found[regex] != wanted:
+                    break
+            else:
+                return quality
 
-        if checkName(["(pdtv|hdtv|dsr|tvrip).(xvid|x264)"], all) and not checkName(["(720|1080)[pi]"], all) and not checkName(["hr.ws.pdtv.x264"], any):
-            return Quality.SDTV
-        elif checkName(["web.dl|webrip", "xvid|x264|h.?264"], all) and not checkName(["(720|1080)[pi]"], all):
-            return Quality.SDTV
-        elif checkName(["(dvdrip|bdrip)(.ws)?.(xvid|divx|x264)"], any) and not checkName(["(720|1080)[pi]"], all):
-            return Quality.SDDVD
-        elif checkName(["720p", "hdtv", "x264"], all) or checkName(["hr.ws.pdtv.x264"], any) and not checkName(["(1080)[pi]"], all):
-            return Quality.HDTV
-        elif checkName(["720p|1080i", "hdtv", "mpeg-?2"], all) or checkName(["1080i.hdtv", "h.?264"], all):
-            return Quality.RAWHDTV
-        elif checkName(["1080p", "hdtv", "x264"], all):
-            return Quality.FULLHDTV
-        elif checkName(["720p", "web.dl|webrip"], all) or checkName(["720p", "itunes", "h.?264"], all):
-            return Quality.HDWEBDL
-        elif checkName(["1080p", "web.dl|webrip"], all) or checkName(["1080p", "itunes", "h.?264"], all):
-            return Quality.FULLHDWEBDL
-        elif checkName(["720p", "bluray|hddvd", "x264"], all):
-            return Quality.HDBLURAY
-        elif checkName(["1080p", "bluray|hddvd", "x264"], all):
-            return Quality.FULLHDBLURAY
-        else:
-            return Quality.UNKNOWN
+        return Quality.UNKNOWN
 
     @staticmethod
     def assumeQuality(name):
@@ -210,6 +195,46 @@ class Quality:
     SNATCHED = None
     SNATCHED_PROPER = None
 
+# (quality, patterns which must all be in the name, patterns which must not be) checked in order, the first match wins
+nameQualityRules = [(Quality.SDTV, ["(pdtv|hdtv|dsr|tvrip).(xvid|x264)"], ["(720|1080)[pi]", "hr.ws.pdtv.x264"]),
+                    (Quality.SDTV, ["web.dl|webrip", "xvid|x264|h.?264"], ["(720|1080)[pi]"]),
+                    (Quality.SDDVD, ["(dvdrip|bdrip)(.ws)?.(xvid|divx|x264)"], ["(720|1080)[pi]"]),
+                    (Quality.HDTV, ["720p", "hdtv", "x264"], []),
+                    (Quality.HDTV, ["hr.ws.pdtv.x264"], ["(1080)[pi]"]),
+                    (Quality.RAWHDTV, ["720p|1080i", "hdtv", "mpeg-?2"], []),
+                    (Quality.RAWHDTV, ["1080i.hdtv", "h.?264"], []),
+                    (Quality.FULLHDTV, ["1080p", "hdtv", "x264"], []),
+                    (Quality.HDWEBDL, ["720p", "web.dl|webrip"], []),
+                    (Quality.HDWEBDL, ["720p", "itunes", "h.?264"], []),
+                    (Quality.FULLHDWEBDL, ["1080p", "web.dl|webrip"], []),
+                    (Quality.FULLHDWEBDL, ["1080p", "itunes", "h.?264"], []),
+                    (Quality.HDBLURAY, ["720p", "bluray|hddvd", "x264"], []),
+                    (Quality.FULLHDBLURAY, ["1080p", "bluray|hddvd", "x264"], []),
+                    ]
+
+
+def _compileNameQuality():
+    """
+    Compiles the quality strings and nameQualityRules, the same pattern used in more than one place is
+    compiled into the same object so nameQuality can remember what it found.
+    """
+    compiled = {}
+
+    def compile(pattern):
+        if pattern not in compiled:
+            compiled[pattern] = re.compile(pattern, re.I)
+        return compiled[pattern]
+
+    qualities = [x for x in sorted(Quality.qualityStrings, reverse=True) if x != Quality.UNKNOWN]
+
+    Quality._qualityStringsRegex = re.compile('\W(?:' + '|'.join([Quality.qualityStrings[x].replace(' ', '\W') for x in qualities]) + ')\W', re.I)
+    Quality._qualityStringRegexes = [(x, compile('\W' + Quality.qualityStrings[x].replace(' ', '\W') + '\W')) for x in qualities]
+
+    # each rule is a list of (regex, whether it should be found)
+    Quality._nameQualityRules = [(quality, [(compile(x), True) for x in required] + [(compile(x), False) for x in excluded]) for (quality, required, excluded) in nameQualityRules]
+
+_compileNameQuality()
+
 Quality.DOWNLOADED = [Quality.compositeStatus(DOWNLOADED, x) for x in Quality.qualityStrings.keys()]
 Quality.SNATCHED = [Quality.compositeStatus(SNATCHED, x) for x in Quality.qualityStrings.keys()]
 Quality.SNATCHED_PROPER = [Quality.compositeStatus(SNATCHED_PROPER, x) for x in Quality.qualityStrings.keys()]
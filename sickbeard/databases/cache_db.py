@@ -61,3 +61,43 @@ class AddSceneExceptionsProvider(AddSceneNameCache):
     def execute(self):
         if not self.hasColumn("scene_exceptions", "provider"):
             self.addColumn("scene_exceptions", "provider", data_type='TEXT', default='sb_tvdb_scene_exceptions')
+
+
+class AddProviderCache(AddSceneExceptionsProvider):
+    """ Replaces the per provider cache tables with a single indexed provider_cache table, one row per episode """
+
+    def test(self):
+        return self.hasTable("provider_cache")
+
+    def execute(self):
+        self.connection.action("CREATE TABLE provider_cache (provider TEXT, name TEXT, season NUMERIC, episode NUMERIC, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality NUMERIC)")
+        self.connection.action("CREATE INDEX idx_provider_cache_episode ON provider_cache (provider, tvdbid, season, episode)")
+        self.connection.action("CREATE INDEX idx_provider_cache_time ON provider_cache (provider, time)")
+
+        # move whatever is in the old provider tables over, splitting the |1|2| episode lists into rows
+        known_tables = ("db_version", "lastUpdate", "scene_exceptions", "scene_names", "provider_cache")
+
+        for cur_table in self.connection.select("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            provider_id = cur_table["name"]
+            if provider_id in known_tables or not self.hasColumn(provider_id, "episodes"):
+                continue
+
+            queries = []
+            for cur_row in self.connection.select("SELECT * FROM [" + provider_id + "]"):
+                episodes = [int(x) for x in (cur_row["episodes"] or "").split("|") if x]
+                for cur_episode in episodes or [None]:
+                    queries.append(["INSERT INTO provider_cache (provider, name, season, episode, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?,?)",
+                                    [provider_id, cur_row["name"], cur_row["season"], cur_episode, cur_row["tvrid"], cur_row["tvdbid"], cur_row["url"], cur_row["time"], cur_row["quality"]]])
+
+            self.connection.mass_action(queries)
+            self.connection.action("DROP TABLE [" + provider_id + "]")
+
+
+class AddProviderCacheURLIndex(AddProviderCache):
+    """ Cache updates only add the items they haven't seen before, which they look up by url """
+
+    def test(self):
+        return self.hasTable("idx_provider_cache_url")
+
+    def execute(self):
+        self.connection.action("CREATE INDEX idx_provider_cache_url ON provider_cache (provider, url)")
@@ -26,7 +26,7 @@ from sickbeard import encodingKludge as ek
 from sickbeard.name_parser.parser import NameParser, InvalidNameException
 
 MIN_DB_VERSION = 9  # oldest db version we support migrating from
-MAX_DB_VERSION = 14
+MAX_DB_VERSION = 15
 
 
 class MainSanityCheck(db.DBSanityCheck):
@@ -86,6 +86,9 @@ class MainSanityCheck(db.DBSanityCheck):
 def backupDatabase(version):
     logger.log(u"Backing up database before upgrade")
 
+    # only the db file gets copied so move everything out of the WAL first
+    db.DBConnection().action("PRAGMA wal_checkpoint(FULL)")
+
     if not helpers.backupVersionedFile(db.dbFilename(), version):
         logger.log_error_and_exit(u"Database backup failed, abort upgrading database")
     else:
@@ -97,7 +100,7 @@ def backupDatabase(version):
 # Add new migrations at the bottom of the list; subclass the previous migration.
 
 
-# schema is based off v14 - build 502
+# schema is based off v15
 class InitialSchema (db.SchemaUpgrade):
     def test(self):
         return self.hasTable("tv_shows") and self.hasTable("db_version") and self.checkDBVersion() >= MIN_DB_VERSION and self.checkDBVersion() <= MAX_DB_VERSION
@@ -113,7 +116,8 @@ class InitialSchema (db.SchemaUpgrade):
                 "CREATE INDEX idx_tv_episodes_showid_airdate ON tv_episodes (showid,airdate);",
                 "CREATE INDEX idx_showid ON tv_episodes (showid);",
                 "CREATE UNIQUE INDEX idx_tvdb_id ON tv_shows (tvdb_id);",
-                "INSERT INTO db_version (db_version) VALUES (14);"
+                "CREATE UNIQUE INDEX idx_showid_season_episode ON tv_episodes (showid, season, episode);",
+                "INSERT INTO db_version (db_version) VALUES (15);"
             ]
 
             for query in queries:
@@ -422,3 +426,22 @@ class AddLastUpdateTVDB(AddShowidTvdbidIndex):
             self.addColumn("tv_shows", "last_update_tvdb", default=1)
 
         self.incDBVersion()
+
+
+class AddEpisodeUniqueIndex(AddLastUpdateTVDB):
+    """ Adding unique index on (showid, season, episode) to tv_episodes so episodes can be upserted in one statement """
+
+    def test(self):
+        return self.checkDBVersion() >= 15
+
+    def execute(self):
+        backupDatabase(15)
+
+        logger.log(u"Check for duplicate episodes before adding unique index.")
+        MainSanityCheck(self.connection).fix_duplicate_episodes()
+
+        logger.log(u"Adding unique index on (showid, season, episode) to tv_episodes.")
+        if not self.hasTable("idx_showid_season_episode"):
+            self.connection.action("CREATE UNIQUE INDEX idx_showid_season_episode ON tv_episodes (showid, season, episode);")
+
+        self.incDBVersion()
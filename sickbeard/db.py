@@ -30,7 +30,36 @@ from sickbeard import encodingKludge as ek
 from sickbeard import logger
 from sickbeard.exceptions import ex
 
-db_lock = threading.Lock()
+# pooled connections of the current thread keyed by database path, they go away with their thread
+_connection_pool = threading.local()
+
+# bumped by closeAllConnections(), a thread's connections from an older generation are closed and
+# reopened the next time it asks for one
+_pool_generation = [0]
+
+# writers are serialized per database file, readers don't lock at all since WAL lets them
+# run alongside a writer
+_write_locks = {}
+_write_locks_lock = threading.Lock()
+
+
+class _ReadLock(object):
+    """
+    Stand-in for the write lock when running a read-only query.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_read_lock = _ReadLock()
+
+# INSERT ... ON CONFLICT DO UPDATE needs SQLite 3.24.0 or newer
+NATIVE_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+# whether a set of columns is covered by a unique index, keyed by (database path, table, columns)
+_unique_keys = {}
 
 
 def dbFilename(filename="sickbeard.db", suffix=None):
@@ -46,15 +75,98 @@ def dbFilename(filename="sickbeard.db", suffix=None):
     return ek.ek(os.path.join, sickbeard.DATA_DIR, filename)
 
 
+def _applyPragmas(connection):
+    """
+    Sets up a freshly opened connection. This only needs to happen once per connection
+    since the pool keeps them around for the life of the thread.
+    """
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute("PRAGMA cache_size = %d" % int(sickbeard.DB_CACHE_SIZE))
+
+
+def _getConnection(filename):
+    """
+    Returns the pooled connection to the given db file for the current thread, opening
+    (and configuring) a new one if this thread doesn't have one yet.
+
+    @param filename: The full path of the sqlite database file
+    """
+    if getattr(_connection_pool, "generation", None) != _pool_generation[0]:
+        _closeThreadConnections()
+        _connection_pool.generation = _pool_generation[0]
+
+    connection = _connection_pool.connections.get(filename)
+
+    if connection is None:
+        connection = sqlite3.connect(filename, 20)
+        connection.row_factory = sqlite3.Row
+        _applyPragmas(connection)
+
+        _connection_pool.connections[filename] = connection
+
+    return connection
+
+
+def _closeThreadConnections():
+    """
+    Closes the current thread's pooled connections.
+    """
+    for connection in getattr(_connection_pool, "connections", {}).values():
+        try:
+            connection.close()
+        except sqlite3.Error, e:
+            logger.log(u"Unable to close DB connection: " + ex(e), logger.WARNING)
+
+    _connection_pool.connections = {}
+
+
+def _getWriteLock(filename):
+    """
+    Returns the lock which serializes writes to the given db file.
+
+    @param filename: The full path of the sqlite database file
+    """
+    with _write_locks_lock:
+        if filename not in _write_locks:
+            _write_locks[filename] = threading.RLock()
+
+        return _write_locks[filename]
+
+
+def _isReadOnly(query):
+    return query.lstrip()[:6].upper() == "SELECT"
+
+
+def closeAllConnections():
+    """
+    Closes the current thread's pooled connections straight away. Other threads might be in the middle
+    of using theirs so they close and reopen them the next time they ask for a connection, connections
+    of threads which have exited are already gone.
+    """
+    _pool_generation[0] += 1
+    _closeThreadConnections()
+    _connection_pool.generation = _pool_generation[0]
+
+
 class DBConnection:
     def __init__(self, filename="sickbeard.db", suffix=None, row_type=None):
 
         self.filename = filename
-        self.connection = sqlite3.connect(dbFilename(filename), 20)
+        self.connection = _getConnection(dbFilename(filename))
+        self.write_lock = _getWriteLock(dbFilename(filename))
         if row_type == "dict":
-            self.connection.row_factory = self._dict_factory
+            self.row_factory = self._dict_factory
+        else:
+            self.row_factory = sqlite3.Row
+
+    def _execute(self, query, args=None):
+        cursor = self.connection.cursor()
+        cursor.row_factory = self.row_factory
+        if args == None:
+            return cursor.execute(query)
         else:
-            self.connection.row_factory = sqlite3.Row
+            return cursor.execute(query, args)
 
     def checkDBVersion(self):
         try:
@@ -70,7 +182,7 @@ class DBConnection:
 
     def mass_action(self, querylist, logTransaction=False):
 
-        with db_lock:
+        with self.write_lock:
 
             if querylist == None:
                 return
@@ -84,11 +196,11 @@ class DBConnection:
                         if len(qu) == 1:
                             if logTransaction:
                                 logger.log(qu[0], logger.DEBUG)
-                            sqlResult.append(self.connection.execute(qu[0]))
+                            sqlResult.append(self._execute(qu[0]))
                         elif len(qu) > 1:
                             if logTransaction:
                                 logger.log(qu[0] + " with args " + str(qu[1]), logger.DEBUG)
-                            sqlResult.append(self.connection.execute(qu[0], qu[1]))
+                            sqlResult.append(self._execute(qu[0], qu[1]))
                     self.connection.commit()
                     logger.log(u"Transaction with " + str(len(querylist)) + u" query's executed", logger.DEBUG)
                     return sqlResult
@@ -112,9 +224,14 @@ class DBConnection:
 
             return sqlResult
 
+    def _lockFor(self, query):
+        if query != None and _isReadOnly(query):
+            return _read_lock
+        return self.write_lock
+
     def action(self, query, args=None):
 
-        with db_lock:
+        with self._lockFor(query):
 
             if query == None:
                 return
@@ -126,10 +243,10 @@ class DBConnection:
                 try:
                     if args == None:
                         logger.log(self.filename + ": " + query, logger.DEBUG)
-                        sqlResult = self.connection.execute(query)
+                        sqlResult = self._execute(query)
                     else:
                         logger.log(self.filename + ": " + query + " with args " + str(args), logger.DEBUG)
-                        sqlResult = self.connection.execute(query, args)
+                        sqlResult = self._execute(query, args)
                     self.connection.commit()
                     # get out of the connection attempt loop since we were successful
                     break
@@ -156,7 +273,46 @@ class DBConnection:
 
         return sqlResults
 
-    def upsert(self, tableName, valueDict, keyDict):
+    def _hasUniqueIndex(self, tableName, columns):
+        """
+        Returns True if the given columns of tableName are covered by a unique index, which
+        is what ON CONFLICT needs to detect the existing row.
+        """
+
+        cache_key = (dbFilename(self.filename), tableName, frozenset(columns))
+
+        if cache_key not in _unique_keys:
+            _unique_keys[cache_key] = False
+            for cur_index in self.connection.execute("PRAGMA index_list(%s)" % tableName).fetchall():
+                if not cur_index["unique"]:
+                    continue
+                index_columns = [x["name"] for x in self.connection.execute("PRAGMA index_info(%s)" % cur_index["name"])]
+                if set(index_columns) == set(columns):
+                    _unique_keys[cache_key] = True
+                    break
+
+        return _unique_keys[cache_key]
+
+    def _upsert(self, tableName, valueDict, keyDict):
+
+        if NATIVE_UPSERT and self._hasUniqueIndex(tableName, keyDict.keys()):
+            query = "INSERT INTO " + tableName + " (" + ", ".join(valueDict.keys() + keyDict.keys()) + ")" + \
+                    " VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")" + \
+                    " ON CONFLICT (" + ", ".join(keyDict.keys()) + ")" + \
+                    " DO UPDATE SET " + ", ".join([x + " = excluded." + x for x in valueDict.keys()])
+            self._execute(query, valueDict.values() + keyDict.values())
+            return
+
+        # old SQLite or no unique index to conflict on, try an UPDATE and INSERT if nothing was there
+        if not self._update(tableName, valueDict, keyDict):
+            query = "INSERT INTO " + tableName + " (" + ", ".join(valueDict.keys() + keyDict.keys()) + ")" + \
+                     " VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")"
+            self._execute(query, valueDict.values() + keyDict.values())
+
+    def _update(self, tableName, valueDict, keyDict):
+        """
+        UPDATEs the columns in valueDict of the rows matching keyDict, returns False if there weren't any
+        """
 
         changesBefore = self.connection.total_changes
 
@@ -164,12 +320,61 @@ class DBConnection:
 
         query = "UPDATE " + tableName + " SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict))
 
-        self.action(query, valueDict.values() + keyDict.values())
+        self._execute(query, valueDict.values() + keyDict.values())
 
-        if self.connection.total_changes == changesBefore:
-            query = "INSERT INTO " + tableName + " (" + ", ".join(valueDict.keys() + keyDict.keys()) + ")" + \
-                     " VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")"
-            self.action(query, valueDict.values() + keyDict.values())
+        return self.connection.total_changes != changesBefore
+
+    def upsert(self, tableName, valueDict, keyDict):
+
+        self.mass_upsert(tableName, [(valueDict, keyDict)])
+
+    def mass_upsert(self, tableName, rowList):
+        """
+        Updates or inserts (if they don't exist yet) a list of rows in a single transaction.
+
+        tableName: The table to write to
+        rowList: A list of (valueDict, keyDict) tuples, keyDict holds the columns which identify the row. A row can
+                 also be a (valueDict, keyDict, changedColumns) tuple for a row that's already in the table, then
+                 only the columns in changedColumns are updated (and the whole row inserted if it's not there after all)
+                 or nothing at all if changedColumns is empty.
+        """
+
+        with self.write_lock:
+
+            if not rowList:
+                return
+
+            attempt = 0
+
+            while attempt < 5:
+                try:
+                    for curRow in rowList:
+                        valueDict, keyDict = curRow[:2]
+                        if len(curRow) > 2 and curRow[2] != None:
+                            if not curRow[2]:
+                                continue
+                            changedDict = dict((x, valueDict[x]) for x in curRow[2])
+                            if self._update(tableName, changedDict, keyDict):
+                                continue
+                        self._upsert(tableName, valueDict, keyDict)
+                    self.connection.commit()
+                    logger.log(self.filename + u": Transaction with " + str(len(rowList)) + u" upserts on " + tableName + u" executed", logger.DEBUG)
+                    return
+                except sqlite3.OperationalError, e:
+                    if self.connection:
+                        self.connection.rollback()
+                    if "unable to open database file" in e.args[0] or "database is locked" in e.args[0]:
+                        logger.log(u"DB error: " + ex(e), logger.WARNING)
+                        attempt += 1
+                        time.sleep(1)
+                    else:
+                        logger.log(u"DB error: " + ex(e), logger.ERROR)
+                        raise
+                except sqlite3.DatabaseError, e:
+                    if self.connection:
+                        self.connection.rollback()
+                    logger.log(u"Fatal error executing query: " + ex(e), logger.ERROR)
+                    raise
 
     def tableInfo(self, tableName):
         # FIXME ? binding is not supported here, but I cannot find a way to escape a string manually
@@ -16,7 +16,11 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import datetime
+import heapq
+import itertools
 import threading
 
 from sickbeard import logger
@@ -28,18 +32,31 @@ class QueuePriorities:
 
 class GenericQueue(object):
 
-    def __init__(self):
+    def __init__(self, max_workers=1):
 
-        self.currentItem = None
-        self.queue = []
+        # items that are running right now, in the order they were started
+        self.currentItems = []
 
-        self.thread = None
+        # heap of (-priority, added, count, item) entries so the next item to run is always on top,
+        # the count keeps items added at the same time in the order they were added
+        self._heap = []
+        self._counter = itertools.count()
+
+        # number of queued items for each queue key, see QueueItem.get_queue_key
+        self._queuedKeys = {}
+
+        # number of queued items for each lock key other than None, lets run() tell when everything
+        # left on the heap is waiting on a running item
+        self._queuedLockKeys = {}
 
         self.queue_name = "QUEUE"
 
         self.min_priority = 0
-        
-        self.currentItem = None
+
+        # how many items may run at the same time, items with the same lock key never run together
+        self.max_workers = max_workers
+
+        self.lock = threading.Lock()
 
     def pause(self):
         logger.log(u"Pausing queue")
@@ -49,57 +66,134 @@ class GenericQueue(object):
         logger.log(u"Unpausing queue")
         self.min_priority = 0
 
+    def _getQueue(self):
+        """
+        Returns the items waiting to run, in no particular order
+        """
+        # run() takes entries off the heap for a while so it has to be done with them
+        with self.lock:
+            return [x[-1] for x in self._heap]
+
+    queue = property(_getQueue)
+
+    def sorted_queue(self):
+        """
+        Returns the items waiting to run, in the order they'll be run
+        """
+        with self.lock:
+            entries = list(self._heap)
+        return [x[-1] for x in sorted(entries)]
+
+    def is_queued(self, queue_key):
+        """
+        Returns True if an item with the given queue key is waiting to run
+        """
+        return queue_key in self._queuedKeys
+
     def add_item(self, item):
         item.added = datetime.datetime.now()
-        self.queue.append(item)
+        with self.lock:
+            heapq.heappush(self._heap, (-item.priority, item.added, self._counter.next(), item))
+
+            queue_key = item.get_queue_key()
+            if queue_key != None:
+                self._queuedKeys[queue_key] = self._queuedKeys.get(queue_key, 0) + 1
+
+            lock_key = item.get_lock_key()
+            if lock_key != None:
+                self._queuedLockKeys[lock_key] = self._queuedLockKeys.get(lock_key, 0) + 1
         
         return item
 
+    def _pop_item(self):
+        item = heapq.heappop(self._heap)[-1]
+
+        queue_key = item.get_queue_key()
+        if queue_key != None:
+            self._queuedKeys[queue_key] -= 1
+            if not self._queuedKeys[queue_key]:
+                del self._queuedKeys[queue_key]
+
+        lock_key = item.get_lock_key()
+        if lock_key != None:
+            self._queuedLockKeys[lock_key] -= 1
+            if not self._queuedLockKeys[lock_key]:
+                del self._queuedLockKeys[lock_key]
+
+        return item
+
+    def _canRun(self, queueItem, lockKeys):
+        """
+        Returns True if queueItem doesn't clash with anything in lockKeys, None in there means
+        an item which has to run on its own.
+        """
+        if None in lockKeys:
+            return False
+
+        lockKey = queueItem.get_lock_key()
+        if lockKey == None:
+            return not lockKeys
+
+        return lockKey not in lockKeys
+
     def run(self):
 
-        # only start a new task if one isn't already going
-        if self.thread == None or self.thread.isAlive() == False:
-
-            # if the thread is dead then the current item should be finished
-            if self.currentItem != None:
-                self.currentItem.finish()
-                self.currentItem = None
-
-            # if there's something in the queue then run it in a thread and take it out of the queue
-            if len(self.queue) > 0:
-
-                # sort by priority
-                def sorter(x,y):
-                    """
-                    Sorts by priority descending then time ascending
-                    """
-                    if x.priority == y.priority:
-                        if y.added == x.added:
-                            return 0
-                        elif y.added < x.added:
-                            return 1
-                        elif y.added > x.added:
-                            return -1
-                    else:
-                        return y.priority-x.priority
-
-                self.queue.sort(cmp=sorter)
-                
-                queueItem = self.queue[0]
+        with self.lock:
+
+            # if the thread is dead then the item is finished
+            for queueItem in [x for x in self.currentItems if not x.thread.isAlive()]:
+                queueItem.finish()
+                self.currentItems.remove(queueItem)
+
+            lockKeys = set([x.get_lock_key() for x in self.currentItems])
+
+            # something is running which has to run on its own so nothing else can start
+            if None in lockKeys:
+                return
+
+            # how many of the entries still on the heap are waiting on a key in lockKeys, once that's all
+            # of them there's no point looking any further
+            blocked = sum([self._queuedLockKeys.get(x, 0) for x in lockKeys])
+
+            # entries we had to take off the heap to get past them
+            skipped = []
+
+            # only start new tasks if there's a worker free, the top of the heap is the highest priority, oldest item
+            while len(self._heap) > blocked and len(self.currentItems) < self.max_workers:
+
+                queueItem = self._heap[0][-1]
 
                 if queueItem.priority < self.min_priority:
-                    return
+                    break
+
+                # anything waiting on a running item with the same key is skipped, later items can go ahead of it
+                if not self._canRun(queueItem, lockKeys):
+                    # except for items that have to run on their own, if we let others past them they might never get to run
+                    if queueItem.get_lock_key() == None:
+                        break
+                    # items with the same key still have to run in order, and its key is already in lockKeys
+                    skipped.append(heapq.heappop(self._heap))
+                    blocked -= 1
+                    continue
+
+                # take it out of the queue
+                self._pop_item()
 
                 # launch the queue item in a thread
-                # TODO: improve thread name
                 threadName = self.queue_name + '-' + queueItem.get_thread_name()
-                self.thread = threading.Thread(None, queueItem.execute, threadName)
-                self.thread.start()
+                queueItem.thread = threading.Thread(None, queueItem.execute, threadName)
+                queueItem.thread.start()
 
-                self.currentItem = queueItem
+                self.currentItems.append(queueItem)
 
-                # take it out of the queue
-                del self.queue[0]
+                lockKey = queueItem.get_lock_key()
+                if lockKey == None:
+                    break
+                lockKeys.add(lockKey)
+                blocked += self._queuedLockKeys.get(lockKey, 0)
+
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
 
 class QueueItem:
     def __init__(self, name, action_id = 0):
@@ -111,6 +205,9 @@ class QueueItem:
 
         self.thread_name = None
 
+        # the thread running this item, set by the queue
+        self.thread = None
+
         self.action_id = action_id
         
         self.added = None
@@ -121,6 +218,19 @@ class QueueItem:
         else:
             return self.name.replace(" ","-").upper()
 
+    def get_lock_key(self):
+        """
+        Items with the same lock key never run at the same time, the default of None means
+        this item only runs when nothing else is running.
+        """
+        return None
+
+    def get_queue_key(self):
+        """
+        Queued items can be looked up by this key with GenericQueue.is_queued, None if they can't
+        """
+        return None
+
     def execute(self):
         """Implementing classes should call this"""
 
@@ -25,6 +25,7 @@ import shutil
 import socket
 import stat
 import StringIO
+import threading
 import time
 import traceback
 import urllib
@@ -195,7 +196,87 @@ def getURL(url, post_data=None, headers=[]):
     return result
 
 
+class ShowIndex(object):
+    """
+    Keeps the shows in sickbeard.showList in dicts by tvdbid and tvrid so they can be found without going
+    through the whole list.
+
+    Shows are only ever appended to the show list and the list is replaced with a new one when a show is
+    removed, so before each lookup the index picks up any shows appended since the last one or starts over
+    if the list was replaced. update() has to be called when a show's ids change.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, showList):
+        self._showList = showList
+        self._indexedCount = 0
+        self._showKeys = {}
+        self._indexes = ({}, {})
+
+    @staticmethod
+    def _keysForShow(show):
+        return (show.tvdbid, show.tvrid)
+
+    def _add(self, show):
+        keys = self._keysForShow(show)
+        self._showKeys[show] = keys
+
+        for (curIndex, curKey) in zip(self._indexes, keys):
+            curIndex.setdefault(curKey, []).append(show)
+
+    def _remove(self, show):
+        keys = self._showKeys.pop(show)
+
+        for (curIndex, curKey) in zip(self._indexes, keys):
+            curIndex[curKey].remove(show)
+            if not curIndex[curKey]:
+                del curIndex[curKey]
+
+    def _sync(self):
+        showList = sickbeard.showList
+
+        if showList is not self._showList or len(showList) < self._indexedCount:
+            self._reset(showList)
+
+        for curShow in showList[self._indexedCount:]:
+            self._add(curShow)
+        self._indexedCount = len(showList)
+
+    def update(self, show):
+        """
+        Re-indexes a show after its tvdbid or tvrid has changed
+        """
+        with self.lock:
+            if show in self._showKeys:
+                self._remove(show)
+                self._add(show)
+
+    def find(self, which, key):
+        """
+        Returns the show with the given key in the index for which (0 = tvdbid, 1 = tvrid),
+        None if there isn't one and raises MultipleShowObjectsException if there's more than one.
+        """
+        with self.lock:
+            self._sync()
+            results = list(self._indexes[which].get(key, []))
+
+        if len(results) == 0:
+            return None
+        elif len(results) > 1:
+            raise MultipleShowObjectsException()
+        else:
+            return results[0]
+
+showIndex = ShowIndex()
+
+
 def findCertainShow(showList, tvdbid):
+    if showList is sickbeard.showList:
+        return showIndex.find(0, tvdbid)
+
     results = filter(lambda x: x.tvdbid == tvdbid, showList)
     if len(results) == 0:
         return None
@@ -210,6 +291,9 @@ def findCertainTVRageShow(showList, tvrid):
     if tvrid == 0:
         return None
 
+    if showList is sickbeard.showList:
+        return showIndex.find(1, tvrid)
+
     results = filter(lambda x: x.tvrid == tvrid, showList)
 
     if len(results) == 0:
@@ -304,6 +388,135 @@ def listMediaFiles(path):
     return files
 
 
+class DirListingCache(object):
+    """
+    Caches the names in directories so that checking for a lot of files in the same directory (like
+    the metadata files of every episode in a season) takes a single listdir instead of a stat per file.
+
+    A listing is used for as long as the directory's mtime doesn't change, which costs a stat of the
+    directory per lookup. Whether a name is a file is only checked the first time it's found and kept
+    with the listing, most lookups are for files which don't exist. While a batch is active in the current thread each directory is only stat'd
+    the first time it's looked at, so nothing should be written to the directories during a batch.
+
+    with dirListingCache.batch():
+        for curPath in paths:
+            dirListingCache.isFile(curPath)
+    """
+
+    def __init__(self, maxDirs=5000):
+        self.lock = threading.Lock()
+        self.maxDirs = maxDirs
+        self._listings = {}
+        self._local = threading.local()
+
+        self.stats = {'hits': 0, 'listings': 0}
+
+    def batch(self):
+        return _DirListingBatch(self._local)
+
+    def _listing(self, dirName):
+        """
+        Returns the listing of dirName, a (mtime, names, racy, isFile) tuple where names is None if dirName
+        isn't a directory and isFile maps the names found so far to whether they're files.
+        """
+
+        checked = getattr(self._local, 'checked', None)
+
+        with self.lock:
+            cached = self._listings.get(dirName)
+
+            if checked is not None and dirName in checked and cached:
+                self.stats['hits'] += 1
+                return cached
+
+        try:
+            mtime = ek.ek(os.stat, dirName).st_mtime
+        except OSError:
+            mtime = None
+
+        if checked is not None:
+            checked.add(dirName)
+
+        # a listing taken in the same second the directory last changed might be missing a file added
+        # right after it on file systems that only keep whole seconds, so those are always re-read
+        if cached and cached[0] == mtime and not cached[2]:
+            with self.lock:
+                self.stats['hits'] += 1
+            return cached
+
+        if mtime is None:
+            names = None
+        else:
+            try:
+                names = frozenset(ek.ek(os.listdir, dirName))
+            except OSError:
+                names = None
+        listing = (mtime, names, mtime is not None and time.time() - mtime < 2, {})
+
+        with self.lock:
+            self.stats['listings'] += 1
+            if len(self._listings) >= self.maxDirs:
+                self._listings.clear()
+            self._listings[dirName] = listing
+
+        return listing
+
+    def isFile(self, path):
+        """
+        Returns True if path is a file, like os.path.isfile.
+        """
+
+        if not path:
+            return False
+
+        path = ek.ek(os.path.abspath, path)
+        (dirName, fileName) = ek.ek(os.path.split, path)
+        (mtime, names, racy, isFile) = self._listing(dirName)
+
+        if names is None or fileName not in names:
+            return False
+
+        with self.lock:
+            result = isFile.get(fileName)
+
+        if result is None:
+            result = ek.ek(os.path.isfile, path)
+            with self.lock:
+                isFile[fileName] = result
+
+        return result
+
+    def invalidate(self, dirName=None):
+        """
+        Forgets the listing of dirName, or every listing if no dirName is given.
+        """
+        with self.lock:
+            if dirName is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(ek.ek(os.path.abspath, dirName), None)
+
+
+class _DirListingBatch(object):
+
+    def __init__(self, local):
+        self._local = local
+        self._outer = False
+
+    def __enter__(self):
+        self._outer = getattr(self._local, 'checked', None) is None
+        if self._outer:
+            self._local.checked = set()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._outer:
+            self._local.checked = None
+        return False
+
+dirListingCache = DirListingCache()
+
+
 def copyFile(srcFile, destFile):
     ek.ek(shutil.copyfile, srcFile, destFile)
     try:
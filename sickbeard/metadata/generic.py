@@ -121,7 +121,7 @@ class GenericMetadata():
         return result
 
     def _has_episode_metadata(self, ep_obj):
-        result = ek.ek(os.path.isfile, self.get_episode_file_path(ep_obj))
+        result = helpers.dirListingCache.isFile(self.get_episode_file_path(ep_obj))
         logger.log(u"Checking if " + self.get_episode_file_path(ep_obj) + " exists: " + str(result), logger.DEBUG)
         return result
 
@@ -142,7 +142,7 @@ class GenericMetadata():
 
     def _has_episode_thumb(self, ep_obj):
         location = self.get_episode_thumb_path(ep_obj)
-        result = location != None and ek.ek(os.path.isfile, location)
+        result = location != None and helpers.dirListingCache.isFile(location)
         if location:
             logger.log(u"Checking if " + location + " exists: " + str(result), logger.DEBUG)
         return result
@@ -191,7 +191,7 @@ class GenericMetadata():
         Returns the path where the episode thumbnail should be stored.
         ep_obj: a TVEpisode instance for which to create the thumbnail
         """
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if helpers.dirListingCache.isFile(ep_obj.location):
 
             tbn_filename = ep_obj.location.rpartition(".")
 
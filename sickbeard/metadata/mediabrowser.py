@@ -113,7 +113,7 @@ class MediaBrowserMetadata(generic.GenericMetadata):
         ep_obj: a TVEpisode object to get the path for
         """
 
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if helpers.dirListingCache.isFile(ep_obj.location):
             xml_file_name = helpers.replaceExtension(ek.ek(os.path.basename, ep_obj.location), self._ep_nfo_extension)
             metadata_dir_name = ek.ek(os.path.join, ek.ek(os.path.dirname, ep_obj.location), 'metadata')
             xml_file_path = ek.ek(os.path.join, metadata_dir_name, xml_file_name)
@@ -131,7 +131,7 @@ class MediaBrowserMetadata(generic.GenericMetadata):
         ep_obj: a TVEpisode object to get the path from
         """
 
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if helpers.dirListingCache.isFile(ep_obj.location):
             tbn_file_name = helpers.replaceExtension(ek.ek(os.path.basename, ep_obj.location), 'jpg')
             metadata_dir_name = ek.ek(os.path.join, ek.ek(os.path.dirname, ep_obj.location), 'metadata')
             tbn_file_path = ek.ek(os.path.join, metadata_dir_name, tbn_file_name)
@@ -20,6 +20,7 @@ import os
 
 import generic
 
+from sickbeard import helpers
 from sickbeard import encodingKludge as ek
 
 
@@ -113,7 +114,7 @@ class PS3Metadata(generic.GenericMetadata):
 
         ep_obj: a TVEpisode instance for which to create the thumbnail
         """
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if helpers.dirListingCache.isFile(ep_obj.location):
             tbn_filename = ep_obj.location + ".cover.jpg"
         else:
             return None
@@ -96,7 +96,7 @@ class XBMCMetadata(xbmc_12plus.XBMC_12PlusMetadata):
 
         ep_obj: a TVEpisode instance for which to create the thumbnail
         """
-        if ek.ek(os.path.isfile, ep_obj.location):
+        if helpers.dirListingCache.isFile(ep_obj.location):
             tbn_filename = helpers.replaceExtension(ep_obj.location, 'tbn')
         else:
             return None
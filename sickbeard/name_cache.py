@@ -16,12 +16,91 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
+import threading
+import time
+
 from sickbeard import db
+from sickbeard import logger
 from sickbeard.helpers import sanitizeSceneName
 
+# how long (in seconds) to believe that a name doesn't belong to any of our shows before looking again
+NEGATIVE_TTL = 24 * 60 * 60
+
+# how long (in seconds) new names wait in memory so they can be written to the db together
+FLUSH_DELAY = 10
+
+# the scene_names table in memory as name -> (tvdb_id, time the entry expires or None), loaded when first needed
+_cache = None
+_cacheLock = threading.Lock()
+
+# queries waiting to be written to the db, in order
+_pending = []
+_flushTimer = None
+_flushLock = threading.Lock()
+
+_hits = 0
+_misses = 0
+
+def _loadCache():
+    """
+    Loads the scene_names table if it isn't loaded yet, has to be called with _cacheLock held.
+    """
+    global _cache
+    
+    if _cache != None:
+        return
+    
+    cacheDB = db.DBConnection('cache.db')
+    
+    _cache = {}
+    for cur_name in cacheDB.select("SELECT tvdb_id, name FROM scene_names"):
+        # the first row for a name is the one lookups used to get
+        if cur_name["name"] not in _cache:
+            _cache[cur_name["name"]] = _makeEntry(int(cur_name["tvdb_id"]))
+
+def _makeEntry(tvdb_id):
+    if tvdb_id:
+        return (tvdb_id, None)
+    return (0, time.time() + NEGATIVE_TTL)
+
+def _queue(query, args):
+    """
+    Queues a query to be written to the db in the background, has to be called with _cacheLock held.
+    """
+    global _flushTimer
+    
+    _pending.append([query, args])
+    
+    if _flushTimer == None:
+        _flushTimer = threading.Timer(FLUSH_DELAY, flush)
+        _flushTimer.setName("NAMECACHE")
+        _flushTimer.setDaemon(True)
+        _flushTimer.start()
+
+def flush():
+    """
+    Writes any queued changes to the db.
+    """
+    global _pending, _flushTimer
+    
+    # flushes go one at a time so the batches hit the db in the order they were queued
+    with _flushLock:
+        with _cacheLock:
+            queries = _pending
+            _pending = []
+            if _flushTimer != None:
+                _flushTimer.cancel()
+            _flushTimer = None
+        
+        if queries:
+            cacheDB = db.DBConnection('cache.db')
+            cacheDB.mass_action(queries)
+
 def addNameToCache(name, tvdb_id):
     """
-    Adds the show & tvdb id to the scene_names table in cache.db.
+    Adds the show & tvdb id to the name cache, it's written to the scene_names table in cache.db shortly after.
     
     name: The show name to cache
     tvdb_id: The tvdb id that this show should be cached with (can be None/0 for unknown)
@@ -33,33 +112,102 @@ def addNameToCache(name, tvdb_id):
     if not tvdb_id:
         tvdb_id = 0
     
-    cacheDB = db.DBConnection('cache.db')
-    cacheDB.action("INSERT INTO scene_names (tvdb_id, name) VALUES (?, ?)", [tvdb_id, name])
+    with _cacheLock:
+        _loadCache()
+        _cache[name] = _makeEntry(tvdb_id)
+        
+        # keep one row per name
+        _queue("DELETE FROM scene_names WHERE name = ?", [name])
+        _queue("INSERT INTO scene_names (tvdb_id, name) VALUES (?, ?)", [tvdb_id, name])
 
 def retrieveNameFromCache(name):
     """
-    Looks up the given name in the scene_names table in cache.db.
+    Looks up the given name in the name cache.
     
     name: The show name to look up.
     
     Returns: the tvdb id that resulted from the cache lookup or None if the show wasn't found in the cache
     """
+    global _hits, _misses
     
     # standardize the name we're using to account for small differences in providers
     name = sanitizeSceneName(name)
     
-    cacheDB = db.DBConnection('cache.db')
-    cache_results = cacheDB.select("SELECT * FROM scene_names WHERE name = ?", [name])
+    with _cacheLock:
+        _loadCache()
+        entry = _cache.get(name)
+        
+        # unknown names are only trusted for a while, after that we'll try to figure out the show again
+        if entry and entry[1] != None and entry[1] < time.time():
+            logger.log(u"Unknown name " + name + " has expired from the name cache", logger.DEBUG)
+            del _cache[name]
+            _queue("DELETE FROM scene_names WHERE name = ? AND tvdb_id = ?", [name, 0])
+            entry = None
+        
+        if entry == None:
+            _misses += 1
+            return None
+        
+        _hits += 1
+        return entry[0]
 
-    if not cache_results:
-        return None
+def clearCache(names=None):
+    """
+    Forgets the "unknown" names (names with tvdb_id of 0), either all of them or only the given ones, and deletes
+    the provider cache entries we couldn't match to a show so the next cache update takes another look at them.
     
-    return int(cache_results[0]["tvdb_id"])
+    names: The show names to forget if they're unknown, or None to forget them all
+    """
+    
+    with _cacheLock:
+        _loadCache()
+        
+        if names == None:
+            for cur_name in [x for x in _cache if not _cache[x][0]]:
+                del _cache[cur_name]
+            _queue("DELETE FROM scene_names WHERE tvdb_id = ?", [0])
+        
+        else:
+            for cur_name in set([sanitizeSceneName(x) for x in names]):
+                if cur_name in _cache and not _cache[cur_name][0]:
+                    del _cache[cur_name]
+                    _queue("DELETE FROM scene_names WHERE name = ? AND tvdb_id = ?", [cur_name, 0])
+        
+        _queue("DELETE FROM provider_cache WHERE tvdbid = ?", [0])
+    
+    flush()
 
-def clearCache():
+def resetCache():
     """
-    Deletes all "unknown" entries from the cache (names with tvdb_id of 0).
+    Throws away everything in memory, including changes that haven't been written yet, so the next lookup loads
+    the cache from the db again.
     """
-    cacheDB = db.DBConnection('cache.db')
-    cacheDB.action("DELETE FROM scene_names WHERE tvdb_id = ?", [0])
+    global _cache, _pending, _flushTimer, _hits, _misses
+    
+    with _cacheLock:
+        if _flushTimer != None:
+            _flushTimer.cancel()
+        _flushTimer = None
+        _pending = []
+        
+        _cache = None
+        _hits = 0
+        _misses = 0
 
+def getStats():
+    """
+    Returns a dict with the number of names in the cache, how many of them are unknown, the number of hits and
+    misses and the hit ratio.
+    """
+    
+    with _cacheLock:
+        _loadCache()
+        
+        lookups = _hits + _misses
+        return {'size': len(_cache),
+                'unknown': len([x for x in _cache.values() if not x[0]]),
+                'hits': _hits,
+                'misses': _misses,
+                'hit_ratio': float(_hits) / lookups if lookups else 0.0,
+                'pending': len(_pending),
+                }
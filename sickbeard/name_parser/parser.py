@@ -16,9 +16,12 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import datetime
 import os.path
 import re
+import threading
 
 import regexes
 
@@ -26,12 +29,45 @@ import sickbeard
 
 from sickbeard import logger
 
+def _compile_regexes():
+    """
+    Compiles the episode regexes along with their hints, this is done once when the module is loaded
+    and the result is shared by every NameParser.
+    
+    Returns a list of (name, regex, hint regex or None) tuples in the order they should be tried.
+    """
+    compiled_regexes = []
+
+    for (cur_pattern_name, cur_pattern) in regexes.ep_regexes:
+        try:
+            cur_regex = re.compile(cur_pattern, re.VERBOSE | re.IGNORECASE)
+        except re.error, errormsg:
+            logger.log(u"WARNING: Invalid episode_pattern, %s. %s" % (errormsg, cur_pattern))
+            continue
+
+        cur_hint = regexes.ep_regex_hints.get(cur_pattern_name)
+        if cur_hint:
+            cur_hint = re.compile(cur_hint, re.IGNORECASE)
+
+        compiled_regexes.append((cur_pattern_name, cur_regex, cur_hint))
+
+    return compiled_regexes
+
+compiled_regexes = _compile_regexes()
+
+_clean_regexes = [(re.compile("(\D)\.(?!\s)(\D)"), "\\1 \\2"),
+                  (re.compile("(\d)\.(\d{4})"), "\\1 \\2"), # if it ends in a year then don't keep the dot
+                  (re.compile("(\D)\.(?!\s)"), "\\1 "),
+                  (re.compile("\.(?!\s)(\D)"), " \\1"),
+                  ]
+_ext_regex = re.compile('(.*)\.\w{3,4}$')
+_special_regex = re.compile(r'([. _-]|^)(special|extra)\w*([. _-]|$)', re.I)
+
 class NameParser(object):
     def __init__(self, file_name=True):
 
         self.file_name = file_name
-        self.compiled_regexes = []
-        self._compile_regexes()
+        self.compiled_regexes = compiled_regexes
 
     def clean_series_name(self, series_name):
         """Cleans up series name by removing any . and _
@@ -48,29 +84,24 @@ class NameParser(object):
         Stolen from dbr's tvnamer
         """
         
-        series_name = re.sub("(\D)\.(?!\s)(\D)", "\\1 \\2", series_name)
-        series_name = re.sub("(\d)\.(\d{4})", "\\1 \\2", series_name) # if it ends in a year then don't keep the dot
-        series_name = re.sub("(\D)\.(?!\s)", "\\1 ", series_name)
-        series_name = re.sub("\.(?!\s)(\D)", " \\1", series_name)
+        if '.' in series_name:
+            for (cur_regex, cur_replacement) in _clean_regexes:
+                series_name = cur_regex.sub(cur_replacement, series_name)
         series_name = series_name.replace("_", " ")
-        series_name = re.sub("-$", "", series_name)
+        if series_name.endswith("-"):
+            series_name = series_name[:-1]
         return series_name.strip()
 
-    def _compile_regexes(self):
-        for (cur_pattern_name, cur_pattern) in regexes.ep_regexes:
-            try:
-                cur_regex = re.compile(cur_pattern, re.VERBOSE | re.IGNORECASE)
-            except re.error, errormsg:
-                logger.log(u"WARNING: Invalid episode_pattern, %s. %s" % (errormsg, cur_pattern))
-            else:
-                self.compiled_regexes.append((cur_pattern_name, cur_regex))
-
     def _parse_string(self, name):
         
         if not name:
             return None
         
-        for (cur_regex_name, cur_regex) in self.compiled_regexes:
+        for (cur_regex_name, cur_regex, cur_hint) in self.compiled_regexes:
+            # don't bother with the full regex if the name doesn't even have the right kind of ep number in it
+            if cur_hint and not cur_hint.search(name):
+                continue
+
             match = cur_regex.match(name)
 
             if not match:
@@ -119,7 +150,7 @@ class NameParser(object):
                 tmp_extra_info = match.group('extra_info')
                 
                 # Show.S04.Special is almost certainly not every episode in the season
-                if tmp_extra_info and cur_regex_name == 'season_only' and re.match(r'([. _-]|^)(special|extra)\w*([. _-]|$)', tmp_extra_info, re.I):
+                if tmp_extra_info and cur_regex_name == 'season_only' and _special_regex.match(tmp_extra_info):
                     continue
                 result.extra_info = tmp_extra_info
             
@@ -162,6 +193,9 @@ class NameParser(object):
         if type(number) == int:
             return number
 
+        if number.isdigit():
+            return int(number)
+
         # good lord I'm lazy
         if number.lower() == 'i': return 1
         if number.lower() == 'ii': return 2
@@ -199,13 +233,16 @@ class NameParser(object):
         
         name = self._unicodify(name)
         
-        cached = name_parser_cache.get(name)
+        # the same name can parse differently depending on whether it's a file name
+        cache_key = (name, self.file_name)
+
+        cached = name_parser_cache.get(cache_key)
         if cached:
             return cached
 
         # break it into parts if there are any (dirname, file name, extension)
         dir_name, file_name = os.path.split(name)
-        ext_match = re.match('(.*)\.\w{3,4}$', file_name)
+        ext_match = _ext_regex.match(file_name)
         if ext_match and self.file_name:
             base_file_name = ext_match.group(1)
         else:
@@ -250,10 +287,35 @@ class NameParser(object):
         if final_result.season_number == None and not final_result.episode_numbers and final_result.air_date == None and not final_result.series_name:
             raise InvalidNameException("Unable to parse " + name.encode(sickbeard.SYS_ENCODING, 'xmlcharrefreplace'))
 
-        name_parser_cache.add(name, final_result)
+        name_parser_cache.add(cache_key, final_result)
         # return it
         return final_result
 
+    def parse_many(self, names):
+        """
+        Parses a batch of names, each distinct name is only parsed once.
+
+        names: the names to parse
+
+        Returns a list with a ParseResult or the InvalidNameException raised for each name, in the same order as names.
+        """
+        names = [self._unicodify(x) for x in names]
+
+        unique_names = []
+        results = {}
+        for name in names:
+            if name not in results:
+                results[name] = None
+                unique_names.append(name)
+
+        for name in unique_names:
+            try:
+                results[name] = self.parse(name)
+            except InvalidNameException, e:
+                results[name] = e
+
+        return [results[x] for x in names]
+
 class ParseResult(object):
     def __init__(self,
                  original_name,
@@ -330,24 +392,80 @@ class ParseResult(object):
     air_by_date = property(_is_air_by_date)
 
 class NameParserCache(object):
-    #TODO: check if the fifo list can beskiped and only use one dict
-    _previous_parsed_list = [] # keep a fifo list of the cached items
-    _previous_parsed = {}
-    _cache_size = 100
-    
-    def add(self, name, parse_result):
-        self._previous_parsed[name] = parse_result
-        self._previous_parsed_list.append(name)
-        while len(self._previous_parsed_list) > self._cache_size:
-            del_me = self._previous_parsed_list.pop(0)
-            self._previous_parsed.pop(del_me)
-    
-    def get(self, name):
-        if name in self._previous_parsed:
-            logger.log("Using cached parse result for: " + name, logger.DEBUG)
-            return self._previous_parsed[name]
-        else:
-            return None
+    """
+    Thread safe LRU cache of parse results, holding up to NAME_PARSER_CACHE_SIZE of them.
+
+    The entries are kept in a circular doubly linked list of [prev, next, key, parse_result] links
+    with the least recently used one right after the root, so getting, adding and evicting are all O(1).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self._previous_parsed = {}
+            self._root = []
+            self._root[:] = [self._root, self._root, None, None]
+
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def _move_to_end(self, link):
+        link_prev, link_next = link[0], link[1]
+        link_prev[1] = link_next
+        link_next[0] = link_prev
+
+        last = self._root[0]
+        last[1] = self._root[0] = link
+        link[0] = last
+        link[1] = self._root
+
+    def add(self, key, parse_result):
+        with self.lock:
+            if key in self._previous_parsed:
+                link = self._previous_parsed[key]
+                link[3] = parse_result
+                self._move_to_end(link)
+                return
+
+            last = self._root[0]
+            link = [last, self._root, key, parse_result]
+            last[1] = self._root[0] = self._previous_parsed[key] = link
+
+            while len(self._previous_parsed) > max(sickbeard.NAME_PARSER_CACHE_SIZE, 1):
+                oldest = self._root[1]
+                self._root[1] = oldest[1]
+                oldest[1][0] = self._root
+                del self._previous_parsed[oldest[2]]
+                self.evictions += 1
+
+    def get(self, key):
+        with self.lock:
+            link = self._previous_parsed.get(key)
+
+            if link == None:
+                self.misses += 1
+                return None
+
+            self._move_to_end(link)
+            self.hits += 1
+
+        logger.log(u"Using cached parse result for: " + key[0], logger.DEBUG)
+        return link[3]
+
+    def stats(self):
+        """
+        Returns a dict with the size of the cache and the hit/miss/eviction counts
+        """
+        with self.lock:
+            return {"size": len(self._previous_parsed),
+                    "max_size": sickbeard.NAME_PARSER_CACHE_SIZE,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions}
 
 name_parser_cache = NameParserCache()
 
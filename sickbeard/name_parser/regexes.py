@@ -186,3 +186,18 @@ ep_regexes = [
                ),
               ]
 
+# cheap patterns that any name matched by the ep_regex of the same name has to contain somewhere. they're
+# searched for before the ep_regexes so the slow ones are only tried on names which have a chance of matching,
+# patterns without a hint are always tried.
+ep_regex_hints = {
+                  'standard_repeat': r's(\d+)[. _-]*e\d+[. _-]+s\1[. _-]*e\d',     # S01E02.S01E03
+                  'fov_repeat': r'(\d+)x\d+[. _-]+\1x\d',                         # 1x02.1x03
+                  'standard': r's\d+[. _-]*e\d',                                  # S01E02
+                  'fov': r'\dx\d',                                                # 1x02
+                  'scene_date_format': r'\d{4}[. _-]+\d{2}[. _-]+\d{2}',          # 2010.11.23
+                  'stupid': r'-.*\d{3}$',                                         # tpz-abc102
+                  'verbose': r'season[. _-]+\d+[. _-]+episode[. _-]+\d',          # Season 1 Episode 2
+                  'season_only': r's(eason[. _-])?\d',                            # S01/Season 01
+                  'bare': r'[. _-]\d{3,4}([. _-]|$)',                             # .102.
+                  'no_season': r'\d[. _-]',                                       # 01 -
+                  }
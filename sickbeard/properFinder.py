@@ -22,10 +22,7 @@ import operator
 import sickbeard
 
 from sickbeard import db
-from sickbeard import exceptions
-from sickbeard.exceptions import ex
 from sickbeard import helpers, logger, show_name_helpers
-from sickbeard import providers
 from sickbeard import search
 from sickbeard import history
 
@@ -67,20 +64,14 @@ class ProperFinder():
 
         propers = {}
 
-        # for each provider get a list of the propers
-        for curProvider in providers.sortedProviderList():
-
-            if not curProvider.isActive():
-                continue
-
-            search_date = datetime.datetime.today() - datetime.timedelta(days=2)
+        search_date = datetime.datetime.today() - datetime.timedelta(days=2)
 
+        def findPropers(curProvider):
             logger.log(u"Searching for any new PROPER releases from " + curProvider.name)
-            try:
-                curPropers = curProvider.findPropers(search_date)
-            except exceptions.AuthException, e:
-                logger.log(u"Authentication error: " + ex(e), logger.ERROR)
-                continue
+            return curProvider.findPropers(search_date)
+
+        # for each provider get a list of the propers
+        for curProvider, curPropers in search.searchProviders(findPropers):
 
             # if they haven't been added by a different provider than add the proper to the list
             for x in curPropers:
@@ -95,13 +86,13 @@ class ProperFinder():
         sortedPropers = sorted(propers.values(), key=operator.attrgetter('date'), reverse=True)
         finalPropers = []
 
-        for curProper in sortedPropers:
+        # parse all the file names at once
+        myParser = NameParser(False)
+        parseResults = myParser.parse_many([x.name for x in sortedPropers])
+
+        for (curProper, parse_result) in zip(sortedPropers, parseResults):
 
-            # parse the file name
-            try:
-                myParser = NameParser(False)
-                parse_result = myParser.parse(curProper.name)
-            except InvalidNameException:
+            if isinstance(parse_result, InvalidNameException):
                 logger.log(u"Unable to parse the filename " + curProper.name + " into a valid episode", logger.DEBUG)
                 continue
 
@@ -149,7 +140,7 @@ class ProperFinder():
             if curProper.tvdbid == -1:
                 continue
 
-            if not show_name_helpers.filterBadReleases(curProper.name):
+            if not show_name_helpers.filterBadReleases(curProper.name, parse_result):
                 logger.log(u"Proper " + curProper.name + " isn't a valid scene release that we want, igoring it", logger.DEBUG)
                 continue
 
@@ -331,8 +331,8 @@ class BTNCache(tvcache.TVCache):
             else:
                 return []
 
-            logger.log(u"Clearing " + self.provider.name + " cache and updating with new information")
-            self._clearCache()
+            logger.log(u"Updating " + self.provider.name + " cache with new information")
+            self._trimCache()
 
             if self._checkAuth(data):
                 # By now we know we've got data and no auth errors, all we need to do is put it in the database
@@ -236,15 +236,15 @@ class GenericProvider:
         for cur_search_string in self._get_episode_search_strings(episode):
             itemList += self._doSearch(cur_search_string, show=episode.show)
 
-        for item in itemList:
+        titlesAndURLs = [self._get_title_and_url(x) for x in itemList]
 
-            (title, url) = self._get_title_and_url(item)
+        # parse all the file names at once
+        myParser = NameParser()
+        parseResults = myParser.parse_many([x[0] for x in titlesAndURLs])
 
-            # parse the file name
-            try:
-                myParser = NameParser()
-                parse_result = myParser.parse(title)
-            except InvalidNameException:
+        for (item, (title, url), parse_result) in zip(itemList, titlesAndURLs, parseResults):
+
+            if isinstance(parse_result, InvalidNameException):
                 logger.log(u"Unable to parse the filename " + title + " into a valid episode", logger.WARNING)
                 continue
 
@@ -283,17 +283,17 @@ class GenericProvider:
         for cur_string in self._get_season_search_strings(show, season):
             itemList += self._doSearch(cur_string)
 
-        for item in itemList:
+        titlesAndURLs = [self._get_title_and_url(x) for x in itemList]
+
+        # parse all the file names at once
+        myParser = NameParser(False)
+        parseResults = myParser.parse_many([x[0] for x in titlesAndURLs])
 
-            (title, url) = self._get_title_and_url(item)
+        for (item, (title, url), parse_result) in zip(itemList, titlesAndURLs, parseResults):
 
             quality = self.getQuality(item)
 
-            # parse the file name
-            try:
-                myParser = NameParser(False)
-                parse_result = myParser.parse(title)
-            except InvalidNameException:
+            if isinstance(parse_result, InvalidNameException):
                 logger.log(u"Unable to parse the filename " + title + " into a valid episode", logger.WARNING)
                 continue
 
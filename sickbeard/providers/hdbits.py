@@ -193,8 +193,8 @@ class HDBitsCache(tvcache.TVCache):
             else:
                 return []
 
-            logger.log(u"Clearing " + self.provider.name + " cache and updating with new information")
-            self._clearCache()
+            logger.log(u"Updating " + self.provider.name + " cache with new information")
+            self._trimCache()
 
             parsedJSON = helpers.parse_json(data)
 
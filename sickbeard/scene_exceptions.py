@@ -16,22 +16,71 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import re
+import threading
 
 from sickbeard import helpers
 from sickbeard import name_cache
 from sickbeard import logger
 from sickbeard import db
 
+# bumped whenever the exceptions are reloaded so anything built from them knows to rebuild
+exceptionsVersion = 0
+
+# the exceptions from cache.db as (tvdb_id -> names, lowercase name -> tvdb_id, lowercase scene name -> tvdb_id),
+# loaded the first time they're needed and replaced as a whole by load_exceptions()
+_exception_store = None
+_exception_lock = threading.Lock()
+
+
+def load_exceptions():
+    """
+    (Re)loads the scene exceptions from cache.db into memory, call it whenever the scene_exceptions table changes.
+    """
+
+    global _exception_store, exceptionsVersion
+
+    myDB = db.DBConnection("cache.db")
+    sql_result = myDB.select("SELECT tvdb_id, show_name FROM scene_exceptions")
+
+    names_by_id = {}
+    ids_by_name = {}
+    ids_by_scene_name = {}
+
+    # the first row for a name wins, same as the queries this replaces
+    for cur_exception in sql_result:
+        cur_tvdb_id = int(cur_exception["tvdb_id"])
+        cur_exception_name = cur_exception["show_name"]
+
+        cur_names = names_by_id.setdefault(cur_tvdb_id, [])
+        if cur_exception_name not in cur_names:
+            cur_names.append(cur_exception_name)
+
+        ids_by_name.setdefault(cur_exception_name.lower(), cur_tvdb_id)
+        ids_by_scene_name.setdefault(helpers.sanitizeSceneName(cur_exception_name).lower().replace('.', ' '), cur_tvdb_id)
+
+    with _exception_lock:
+        _exception_store = (names_by_id, ids_by_name, ids_by_scene_name)
+        exceptionsVersion += 1
+
+    return _exception_store
+
+
+def _get_exception_store():
+    exception_store = _exception_store
+    if exception_store == None:
+        exception_store = load_exceptions()
+    return exception_store
+
 
 def get_scene_exceptions(tvdb_id):
     """
     Given a tvdb_id, return a list of all the scene exceptions.
     """
 
-    myDB = db.DBConnection("cache.db")
-    exceptions = myDB.select("SELECT DISTINCT show_name FROM scene_exceptions WHERE tvdb_id = ?", [tvdb_id])
-    return [cur_exception["show_name"] for cur_exception in exceptions]
+    return list(_get_exception_store()[0].get(tvdb_id, []))
 
 
 def get_scene_exception_by_name(show_name):
@@ -40,24 +89,17 @@ def get_scene_exception_by_name(show_name):
     is present.
     """
 
-    myDB = db.DBConnection("cache.db")
+    names_by_id, ids_by_name, ids_by_scene_name = _get_exception_store()
 
     # try the obvious case first
-    exception_result = myDB.select("SELECT tvdb_id FROM scene_exceptions WHERE LOWER(show_name) = ?", [show_name.lower()])
-    if exception_result:
-        return int(exception_result[0]["tvdb_id"])
-
-    all_exception_results = myDB.select("SELECT DISTINCT show_name, tvdb_id FROM scene_exceptions")
-    for cur_exception in all_exception_results:
-
-        cur_exception_name = cur_exception["show_name"]
-        cur_tvdb_id = int(cur_exception["tvdb_id"])
+    if show_name.lower() in ids_by_name:
+        return ids_by_name[show_name.lower()]
 
-        if show_name.lower() in (cur_exception_name.lower(), helpers.sanitizeSceneName(cur_exception_name).lower().replace('.', ' ')):
-            logger.log(u"Scene exception lookup got tvdb id " + str(cur_tvdb_id) + u", using that", logger.DEBUG)
-            return cur_tvdb_id
+    cur_tvdb_id = ids_by_scene_name.get(show_name.lower())
+    if cur_tvdb_id != None:
+        logger.log(u"Scene exception lookup got tvdb id " + str(cur_tvdb_id) + u", using that", logger.DEBUG)
 
-    return None
+    return cur_tvdb_id
 
 
 def retrieve_exceptions():
@@ -70,6 +112,7 @@ def retrieve_exceptions():
     remote_exception_dict = {}
     local_exception_dict = {}
     query_list = []
+    new_exception_names = []
 
     # remote exceptions are stored on github pages
     url = 'http://midgetspy.github.com/sb_tvdb_scene_exceptions/exceptions.txt'
@@ -118,6 +161,7 @@ def retrieve_exceptions():
             for cur_exception_name in remote_exception_dict[cur_tvdb_id]:
                 if cur_exception_name not in local_exception_dict[cur_tvdb_id]:
                     query_list.append(["INSERT INTO scene_exceptions (tvdb_id,show_name,provider) VALUES (?,?,?);", [cur_tvdb_id, cur_exception_name, provider]])
+                    new_exception_names.append(cur_exception_name)
 
         # check local against remote for removed exceptions
         for cur_tvdb_id in local_exception_dict:
@@ -132,9 +176,11 @@ def retrieve_exceptions():
         if query_list:
             logger.log(u"Updating scene exceptions")
             myDB.mass_action(query_list, logTransaction=True)
+            load_exceptions()
 
-            logger.log(u"Clear name cache")
-            name_cache.clearCache()
+            # only the names which are new exceptions could have a show now, the other unknown names expire on their own
+            logger.log(u"Clear new exceptions from the name cache")
+            name_cache.clearCache(new_exception_names)
 
             logger.log(u"Performing a vacuum on database: " + myDB.filename)
             myDB.action("VACUUM")
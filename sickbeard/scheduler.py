@@ -16,18 +16,131 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import datetime
-import time
+import heapq
+import itertools
+import select
+import socket
 import threading
 import traceback
 
 from sickbeard import logger
 from sickbeard.exceptions import ex
 
-class Scheduler:
+# schedulers with a cycle up to this long keep their worker thread between runs, so the queue schedulers
+# that run every few seconds don't start a thread (and open a new DB connection) on every run
+KEEP_WORKER_CYCLE = datetime.timedelta(minutes=1)
+
+
+def _socketPair():
+    """
+    Returns a pair of connected sockets, select() only works on sockets on Windows so we can't use a pipe
+    """
+    if hasattr(socket, 'socketpair'):
+        return socket.socketpair()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+
+    writer = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    writer.connect(listener.getsockname())
+    reader = listener.accept()[0]
+    listener.close()
+
+    return reader, writer
+
+
+def _seconds(delta):
+    return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
+
+class _Dispatcher(object):
+    """
+    A single thread which sleeps until the next scheduler is due and hands its action to the scheduler's worker thread.
+
+    Schedulers are kept in a heap of (due time, count, scheduler) entries. Whenever a scheduler's timing
+    changes it gets a new entry, the count of the current one is kept on the scheduler so old entries
+    are just dropped when they come up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heap = []
+        self.counter = itertools.count()
+        self.thread = None
+        self.wakeReader = None
+        self.wakeWriter = None
+
+    def schedule(self, scheduler):
+        with self.lock:
+            scheduler._entry = self.counter.next()
+            heapq.heappush(self.heap, (scheduler.nextRunTime(), scheduler._entry, scheduler))
+
+            if self.thread == None:
+                self.wakeReader, self.wakeWriter = _socketPair()
+                self.thread = threading.Thread(None, self.run, "SCHEDULER")
+                self.thread.setDaemon(True)
+                self.thread.start()
+
+        self.wake()
+
+    def unschedule(self, scheduler):
+        with self.lock:
+            scheduler._entry = None
+
+    def wake(self):
+        try:
+            self.wakeWriter.send('x')
+        except socket.error:
+            # the buffer is full so it's going to wake up anyway
+            pass
+
+    def _dispatchDue(self):
+        """
+        Starts every scheduler that's due, returns the number of seconds until the next one or None if there isn't one
+        """
+        with self.lock:
+            while self.heap:
+                dueTime, entry, scheduler = self.heap[0]
+
+                # its timing changed or it was aborted since this entry was made
+                if entry != scheduler._entry:
+                    heapq.heappop(self.heap)
+                    continue
+
+                timeLeft = _seconds(dueTime - datetime.datetime.now())
+                if timeLeft > 0:
+                    return timeLeft
+
+                heapq.heappop(self.heap)
+                scheduler._entry = None
+                scheduler._dispatch()
+
+        return None
+
+    def run(self):
+        while True:
+            timeout = self._dispatchDue()
+
+            readable = select.select([self.wakeReader], [], [], timeout)[0]
+            if readable:
+                self.wakeReader.recv(1024)
+
+
+_dispatcher = _Dispatcher()
+
+
+class Scheduler(object):
 
     def __init__(self, action, cycleTime=datetime.timedelta(minutes=10), runImmediately=True, threadName="ScheduledThread", silent=False):
 
+        self._entry = None
+        self._started = False
+        self._abort = False
+
         if runImmediately:
             self.lastRun = datetime.datetime.fromordinal(1)
         else:
@@ -36,17 +149,63 @@ class Scheduler:
         self.action = action
         self.cycleTime = cycleTime
 
+        # the worker thread which runs the action, it waits for the dispatcher between runs if the cycle
+        # is short enough and is started again when needed otherwise
         self.thread = None
+        self._workerAlive = False
+        self._workerLock = threading.Lock()
+        self._due = threading.Event()
+        self._running = False
         self.threadName = threadName
         self.silent = silent
 
-        self.initThread()
+    def _reschedule(self):
+        if self._started and not self._abort and not self.isRunning():
+            _dispatcher.schedule(self)
+
+    def _getLastRun(self):
+        return self._lastRun
+
+    def _setLastRun(self, lastRun):
+        self._lastRun = lastRun
+        self._reschedule()
+
+    lastRun = property(_getLastRun, _setLastRun)
+
+    def _getCycleTime(self):
+        return self._cycleTime
+
+    def _setCycleTime(self, cycleTime):
+        self._cycleTime = cycleTime
+        self._reschedule()
 
-        self.abort = False
+    cycleTime = property(_getCycleTime, _setCycleTime)
 
-    def initThread(self):
-        if self.thread == None or not self.thread.isAlive():
-            self.thread = threading.Thread(None, self.runAction, self.threadName)
+    def _getAbort(self):
+        return self._abort
+
+    def _setAbort(self, abort):
+        self._abort = abort
+        if abort:
+            self._started = False
+            _dispatcher.unschedule(self)
+
+            # wake the worker so it exits
+            with self._workerLock:
+                self._due.set()
+
+    abort = property(_getAbort, _setAbort)
+
+    def start(self):
+        self._abort = False
+        self._started = True
+        self._reschedule()
+
+    def isRunning(self):
+        return self._running
+
+    def nextRunTime(self):
+        return self.lastRun + self.cycleTime
 
     def timeLeft(self):
         return self.cycleTime - (datetime.datetime.now() - self.lastRun)
@@ -57,25 +216,51 @@ class Scheduler:
             return True
         return False
 
-    def runAction(self):
+    def _dispatch(self):
+        self._lastRun = datetime.datetime.now()
+
+        with self._workerLock:
+            self._running = True
+            self._due.set()
+
+            if not self._workerAlive:
+                self._workerAlive = True
+                self.thread = threading.Thread(None, self._work, self.threadName)
+                self.thread.start()
 
+    def _work(self):
         while True:
+            self._due.wait()
 
-            currentTime = datetime.datetime.now()
+            with self._workerLock:
+                self._due.clear()
+                if self._abort:
+                    self._running = False
+                    self._workerAlive = False
+                    return
+                # woken by an abort which was undone by start() before we got here
+                if not self._running:
+                    continue
 
-            if currentTime - self.lastRun > self.cycleTime:
-                self.lastRun = currentTime
-                try:
-                    if not self.silent:
-                        logger.log(u"Starting new thread: "+self.threadName, logger.DEBUG)
-                    self.action.run()
-                except Exception, e:
-                    logger.log(u"Exception generated in thread "+self.threadName+": " + ex(e), logger.ERROR)
-                    logger.log(repr(traceback.format_exc()), logger.DEBUG)
+            self.runAction()
+
+            # a long wait isn't worth keeping the thread around for, unless it's already due again
+            with self._workerLock:
+                if self.cycleTime > KEEP_WORKER_CYCLE and not self._due.isSet():
+                    self._workerAlive = False
+                    return
+
+    def runAction(self):
 
-            if self.abort:
-                self.abort = False
-                self.thread = None
-                return
+        try:
+            if not self.silent:
+                logger.log(u"Starting new thread: "+self.threadName, logger.DEBUG)
+            self.action.run()
+        except Exception, e:
+            logger.log(u"Exception generated in thread "+self.threadName+": " + ex(e), logger.ERROR)
+            logger.log(repr(traceback.format_exc()), logger.DEBUG)
 
-            time.sleep(1)
+        # schedule the next run now that we're done
+        self._running = False
+        if self._started and not self._abort:
+            _dispatcher.schedule(self)
@@ -19,6 +19,9 @@
 from __future__ import with_statement
 
 import os
+import Queue
+import threading
+import time
 import traceback
 
 import sickbeard
@@ -140,31 +143,113 @@ def snatchEpisode(result, endStatus=SNATCHED):
     return True
 
 
-def searchForNeededEpisodes():
+class _ProviderSearch(object):
+    """
+    One provider's part of a searchProviders call
+    """
 
-    logger.log(u"Searching all providers for any needed episodes")
+    def __init__(self, provider):
+        self.provider = provider
+        self.results = None
+        self.error = None
+        self.traceback = None
+        self.startTime = None
+        self.started = threading.Event()
+        self.done = threading.Event()
 
-    foundResults = {}
 
-    didSearch = False
+def _providerSearchWorker(searchFunc, jobs, cancelled, threadName):
 
-    # ask all providers for any episodes it finds
-    for curProvider in providers.sortedProviderList():
+    while not cancelled.isSet():
 
-        if not curProvider.isActive():
-            continue
+        try:
+            job = jobs.get_nowait()
+        except Queue.Empty:
+            return
+
+        threading.currentThread().setName(threadName + "-" + job.provider.getID().upper())
 
-        curFoundResults = {}
+        job.startTime = time.time()
+        job.started.set()
 
         try:
-            curFoundResults = curProvider.searchRSS()
-        except exceptions.AuthException, e:
-            logger.log(u"Authentication error: " + ex(e), logger.ERROR)
-            continue
+            job.results = searchFunc(job.provider)
         except Exception, e:
-            logger.log(u"Error while searching " + curProvider.name + ", skipping: " + ex(e), logger.ERROR)
-            logger.log(traceback.format_exc(), logger.DEBUG)
-            continue
+            job.error = e
+            job.traceback = traceback.format_exc()
+
+        job.done.set()
+
+
+def searchProviders(searchFunc):
+    """
+    Calls searchFunc(provider) on every active provider, running up to PROVIDER_THREADS of them at once.
+
+    Yields (provider, results) in provider priority order as each provider finishes. Providers that raise
+    an exception or take longer than PROVIDER_TIMEOUT seconds are logged and skipped. Providers that
+    haven't started yet are cancelled when the caller stops iterating.
+    """
+
+    jobList = [_ProviderSearch(x) for x in providers.sortedProviderList() if x.isActive()]
+
+    jobs = Queue.Queue()
+    for job in jobList:
+        jobs.put(job)
+
+    cancelled = threading.Event()
+    threadName = threading.currentThread().getName()
+
+    def startWorker():
+        worker = threading.Thread(None, _providerSearchWorker, threadName, (searchFunc, jobs, cancelled, threadName))
+        worker.setDaemon(True)
+        worker.start()
+
+    # without a worker nothing would ever start
+    for i in range(min(max(sickbeard.PROVIDER_THREADS, 1), len(jobList))):
+        startWorker()
+
+    try:
+        for job in jobList:
+
+            # every provider before this one has finished or timed out so a worker will pick it up
+            job.started.wait(sickbeard.PROVIDER_TIMEOUT)
+            if not job.started.isSet():
+                logger.log(u"Searching " + job.provider.name + " didn't start within " + str(sickbeard.PROVIDER_TIMEOUT) + " seconds, skipping it", logger.ERROR)
+                startWorker()
+                continue
+
+            job.done.wait(max(job.startTime + sickbeard.PROVIDER_TIMEOUT - time.time(), 0))
+
+            if not job.done.isSet():
+                logger.log(u"Searching " + job.provider.name + " took longer than " + str(sickbeard.PROVIDER_TIMEOUT) + " seconds, skipping it", logger.ERROR)
+                # the worker is stuck waiting on the provider so start another one for the rest of them
+                startWorker()
+                continue
+
+            if isinstance(job.error, exceptions.AuthException):
+                logger.log(u"Authentication error: " + ex(job.error), logger.ERROR)
+                continue
+            elif job.error:
+                logger.log(u"Error while searching " + job.provider.name + ", skipping: " + ex(job.error), logger.ERROR)
+                logger.log(job.traceback, logger.DEBUG)
+                continue
+
+            yield (job.provider, job.results)
+
+    finally:
+        cancelled.set()
+
+
+def searchForNeededEpisodes():
+
+    logger.log(u"Searching all providers for any needed episodes")
+
+    foundResults = {}
+
+    didSearch = False
+
+    # ask all providers for any episodes it finds
+    for curProvider, curFoundResults in searchProviders(lambda x: x.searchRSS()):
 
         didSearch = True
 
@@ -275,20 +360,7 @@ def findEpisode(episode, manualSearch=False):
 
     didSearch = False
 
-    for curProvider in providers.sortedProviderList():
-
-        if not curProvider.isActive():
-            continue
-
-        try:
-            curFoundResults = curProvider.findEpisode(episode, manualSearch=manualSearch)
-        except exceptions.AuthException, e:
-            logger.log(u"Authentication error: " + ex(e), logger.ERROR)
-            continue
-        except Exception, e:
-            logger.log(u"Error while searching " + curProvider.name + ", skipping: " + ex(e), logger.ERROR)
-            logger.log(traceback.format_exc(), logger.DEBUG)
-            continue
+    for curProvider, curFoundResults in searchProviders(lambda x: x.findEpisode(episode, manualSearch=manualSearch)):
 
         didSearch = True
 
@@ -325,32 +397,18 @@ def findSeason(show, season):
 
     didSearch = False
 
-    for curProvider in providers.sortedProviderList():
-
-        if not curProvider.isActive():
-            continue
+    for curProvider, curResults in searchProviders(lambda x: x.findSeasonResults(show, season)):
 
-        try:
-            curResults = curProvider.findSeasonResults(show, season)
+        # make a list of all the results for this provider
+        for curEp in curResults:
 
-            # make a list of all the results for this provider
-            for curEp in curResults:
+            # skip non-tv crap
+            curResults[curEp] = filter(lambda x: show_name_helpers.filterBadReleases(x.name) and show_name_helpers.isGoodResult(x.name, show), curResults[curEp])
 
-                # skip non-tv crap
-                curResults[curEp] = filter(lambda x: show_name_helpers.filterBadReleases(x.name) and show_name_helpers.isGoodResult(x.name, show), curResults[curEp])
-
-                if curEp in foundResults:
-                    foundResults[curEp] += curResults[curEp]
-                else:
-                    foundResults[curEp] = curResults[curEp]
-
-        except exceptions.AuthException, e:
-            logger.log(u"Authentication error: " + ex(e), logger.ERROR)
-            continue
-        except Exception, e:
-            logger.log(u"Error while searching " + curProvider.name + ", skipping: " + ex(e), logger.ERROR)
-            logger.log(traceback.format_exc(), logger.DEBUG)
-            continue
+            if curEp in foundResults:
+                foundResults[curEp] += curResults[curEp]
+            else:
+                foundResults[curEp] = curResults[curEp]
 
         didSearch = True
 
@@ -35,20 +35,14 @@ MANUAL_SEARCH = 30
 class SearchQueue(generic_queue.GenericQueue):
 
     def __init__(self):
-        generic_queue.GenericQueue.__init__(self)
+        generic_queue.GenericQueue.__init__(self, sickbeard.SEARCH_QUEUE_THREADS)
         self.queue_name = "SEARCHQUEUE"
 
     def is_in_queue(self, show, segment):
-        for cur_item in self.queue:
-            if isinstance(cur_item, BacklogQueueItem) and cur_item.show == show and cur_item.segment == segment:
-                return True
-        return False
+        return self.is_queued((BACKLOG_SEARCH, show.tvdbid, segment))
 
     def is_ep_in_queue(self, ep_obj):
-        for cur_item in self.queue:
-            if isinstance(cur_item, ManualSearchQueueItem) and cur_item.ep_obj == ep_obj:
-                return True
-        return False
+        return self.is_queued((MANUAL_SEARCH, ep_obj.show.tvdbid, ep_obj.season, ep_obj.episode))
 
     def pause_backlog(self):
         self.min_priority = generic_queue.QueuePriorities.HIGH
@@ -61,7 +55,7 @@ class SearchQueue(generic_queue.GenericQueue):
         return self.min_priority >= generic_queue.QueuePriorities.NORMAL
 
     def is_backlog_in_progress(self):
-        for cur_item in self.queue + [self.currentItem]:
+        for cur_item in self.queue + self.currentItems:
             if isinstance(cur_item, BacklogQueueItem):
                 return True
         return False
@@ -87,6 +81,12 @@ class ManualSearchQueueItem(generic_queue.QueueItem):
 
         self.success = None
 
+    def get_lock_key(self):
+        return self.ep_obj.show.tvdbid
+
+    def get_queue_key(self):
+        return (MANUAL_SEARCH, self.ep_obj.show.tvdbid, self.ep_obj.season, self.ep_obj.episode)
+
     def execute(self):
         generic_queue.QueueItem.execute(self)
 
@@ -203,6 +203,12 @@ class BacklogQueueItem(generic_queue.QueueItem):
         anyQualities, bestQualities = common.Quality.splitQuality(self.show.quality)  #@UnusedVariable
         self.wantSeason = self._need_any_episodes(statusResults, bestQualities)
 
+    def get_lock_key(self):
+        return self.show.tvdbid
+
+    def get_queue_key(self):
+        return (BACKLOG_SEARCH, self.show.tvdbid, self.segment)
+
     def execute(self):
 
         generic_queue.QueueItem.execute(self)
@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import sickbeard
 
 from sickbeard.common import countryList
@@ -23,9 +25,11 @@ from sickbeard.helpers import sanitizeSceneName
 from sickbeard.scene_exceptions import get_scene_exceptions
 from sickbeard import logger
 from sickbeard import db
+from sickbeard import scene_exceptions
 
 import re
 import datetime
+import threading
 
 from name_parser.parser import NameParser, InvalidNameException
 
@@ -33,23 +37,51 @@ resultFilters = ["sub(pack|s|bed)", "nlsub(bed|s)?", "swesub(bed)?",
                  "(dir|sample|sub|nfo)fix", "sample", "(dvd)?extras",
                  "dub(bed)?"]
 
+# (the ignore words it was compiled with, the regex) for filterBadReleases
+_releaseFilter = (None, None)
+
+
+def compileReleaseFilter():
+    """
+    Compiles resultFilters and sickbeard.IGNORE_WORDS into the single regex filterBadReleases uses,
+    it needs to be called whenever IGNORE_WORDS changes.
+    """
+    global _releaseFilter
+
+    ignore_words = sickbeard.IGNORE_WORDS
 
-def filterBadReleases(name):
+    words = []
+    for x in resultFilters + ignore_words.split(','):
+        x = x.strip()
+        try:
+            re.compile(x)
+        except re.error:
+            logger.log(u"Ignore word " + x + " isn't a valid regex, matching it as plain text", logger.WARNING)
+            x = re.escape(x)
+        words.append(x)
+
+    _releaseFilter = (ignore_words, re.compile('(^|[\W_])(?P<word>' + '|'.join(words) + ')($|[\W_])', re.I))
+    return _releaseFilter
+
+
+def filterBadReleases(name, parse_result=None):
     """
     Filters out non-english and just all-around stupid releases by comparing them
     to the resultFilters contents.
 
     name: the release name to check
+    parse_result: the ParseResult of the name if the caller already has it
 
     Returns: True if the release name is OK, False if it's bad.
     """
 
-    try:
-        fp = NameParser()
-        parse_result = fp.parse(name)
-    except InvalidNameException:
-        logger.log(u"Unable to parse the filename " + name + " into a valid episode", logger.WARNING)
-        return False
+    if not parse_result:
+        try:
+            fp = NameParser()
+            parse_result = fp.parse(name)
+        except InvalidNameException:
+            logger.log(u"Unable to parse the filename " + name + " into a valid episode", logger.WARNING)
+            return False
 
     # use the extra info and the scene group to filter against
     check_string = ''
@@ -65,11 +97,16 @@ def filterBadReleases(name):
     if not check_string:
         return True
 
+    # in case IGNORE_WORDS was changed without recompiling
+    releaseFilter = _releaseFilter
+    if releaseFilter[0] != sickbeard.IGNORE_WORDS:
+        releaseFilter = compileReleaseFilter()
+
     # if any of the bad strings are in the name then say no
-    for x in resultFilters + sickbeard.IGNORE_WORDS.split(','):
-        if re.search('(^|[\W_])' + x.strip() + '($|[\W_])', check_string, re.I):
-            logger.log(u"Invalid scene release: " + name + " contains " + x + ", ignoring it", logger.DEBUG)
-            return False
+    match = releaseFilter[1].search(check_string)
+    if match:
+        logger.log(u"Invalid scene release: " + name + " contains " + match.group('word') + ", ignoring it", logger.DEBUG)
+        return False
 
     return True
 
@@ -187,22 +224,13 @@ def isGoodResult(name, show, log=True):
     Use an automatically-created regex to make sure the result actually is the show it claims to be
     """
 
-    all_show_names = allPossibleShowNames(show)
-    showNames = map(sanitizeSceneName, all_show_names) + all_show_names
-
-    for curName in set(showNames):
-        escaped_name = re.sub('\\\\[\\s.-]', '\W+', re.escape(curName))
-        if show.startyear:
-            escaped_name += "(?:\W+" + str(show.startyear) + ")?"
-        curRegex = '^' + escaped_name + '\W+(?:(?:S\d[\dE._ -])|(?:\d\d?x)|(?:\d{4}\W\d\d\W\d\d)|(?:(?:part|pt)[\._ -]?(\d|[ivx]))|Season\W+\d+\W+|E\d+\W+)'
-        if log:
-            logger.log(u"Checking if show " + name + " matches " + curRegex, logger.DEBUG)
-
-        match = re.search(curRegex, name, re.I)
+    curRegex = showNameMatcher.getShowRegex(show)
+    if log:
+        logger.log(u"Checking if show " + name + " matches " + curRegex.pattern, logger.DEBUG)
 
-        if match:
-            logger.log(u"Matched " + curRegex + " to " + name, logger.DEBUG)
-            return True
+    if curRegex.match(name):
+        logger.log(u"Matched " + curRegex.pattern + " to " + name, logger.DEBUG)
+        return True
 
     if log:
         logger.log(u"Provider gave result " + name + " but that doesn't seem like a valid result for " + show.name + " so I'm ignoring it")
@@ -246,3 +274,132 @@ def allPossibleShowNames(show):
     showNames += newShowNames
 
     return showNames
+
+
+class ShowNameMatcher(object):
+    """
+    Matches release names to shows without building regexes over and over.
+
+    Each show gets one compiled regex with all of its possible names in a single alternation, which is kept
+    until the show's names or the scene exceptions change. To find which show a release is for the shows are
+    also indexed by the leading word of each of their names, a release can only be for a show with one of its
+    names starting with the same word as the release, so only those shows' regexes are tried.
+    """
+
+    _leading_word = re.compile('[A-Za-z0-9_]*')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self, show=None):
+        """
+        Throws away the index along with the regexes for the given show, or all of them if no show is given.
+        Call it whenever a show's names change.
+        """
+        with self.lock:
+            if show:
+                self._showRegexes.pop(show.tvdbid, None)
+                self._index = None
+                return
+
+            self._showRegexes = {}
+            self._index = None
+            self._indexedList = None
+            self._indexedCount = 0
+            self._exceptionsVersion = scene_exceptions.exceptionsVersion
+
+    def _checkExceptions(self):
+        if self._exceptionsVersion != scene_exceptions.exceptionsVersion:
+            self.invalidate()
+
+    @staticmethod
+    def _showSignature(show):
+        return (show.name, show.tvrname, show.startyear)
+
+    def _leadingWord(self, name):
+        return self._leading_word.match(name).group(0).lower()
+
+    def _buildShowRegex(self, show):
+        all_show_names = allPossibleShowNames(show)
+        showNames = map(sanitizeSceneName, all_show_names) + all_show_names
+
+        escapedNames = []
+        for curName in set(showNames):
+            escaped_name = re.sub('\\\\[\\s.-]', '\W+', re.escape(curName))
+            if escaped_name not in escapedNames:
+                escapedNames.append(escaped_name)
+
+        curRegex = '^(?:' + '|'.join(escapedNames) + ')'
+        if show.startyear:
+            curRegex += "(?:\W+" + str(show.startyear) + ")?"
+        curRegex += '\W+(?:(?:S\d[\dE._ -])|(?:\d\d?x)|(?:\d{4}\W\d\d\W\d\d)|(?:(?:part|pt)[\._ -]?(\d|[ivx]))|Season\W+\d+\W+|E\d+\W+)'
+
+        leadingWords = set([self._leadingWord(x) for x in showNames])
+
+        return (self._showSignature(show), re.compile(curRegex, re.I), leadingWords)
+
+    def _getShowEntry(self, show):
+        self._checkExceptions()
+
+        with self.lock:
+            entry = self._showRegexes.get(show.tvdbid)
+
+        if not entry or entry[0] != self._showSignature(show):
+            entry = self._buildShowRegex(show)
+            with self.lock:
+                self._showRegexes[show.tvdbid] = entry
+
+        return entry
+
+    def getShowRegex(self, show):
+        """
+        Returns the compiled regex which matches release names for the given show
+        """
+        return self._getShowEntry(show)[1]
+
+    def _getIndex(self):
+        showList = sickbeard.showList or []
+
+        self._checkExceptions()
+
+        with self.lock:
+            # the list is kept so a new list can't be mistaken for it by ending up at the same address
+            if self._index != None and showList is self._indexedList and len(showList) == self._indexedCount:
+                return self._index
+
+        index = {}
+        for (curPosition, curShow) in enumerate(showList):
+            for curWord in self._getShowEntry(curShow)[2]:
+                index.setdefault(curWord, []).append((curPosition, curShow))
+
+        with self.lock:
+            self._index = index
+            self._indexedList = showList
+            self._indexedCount = len(showList)
+
+        return index
+
+    def findShow(self, name):
+        """
+        Finds the show in sickbeard.showList which the release name is for.
+
+        name: the release name
+
+        Returns: the first show in the list whose regex matches the name or None
+        """
+
+        index = self._getIndex()
+
+        candidates = index.get('', [])
+        curWord = self._leadingWord(name)
+        if curWord:
+            candidates = candidates + index.get(curWord, [])
+
+        for (curPosition, curShow) in sorted(set(candidates)):
+            if self.getShowRegex(curShow).match(name):
+                return curShow
+
+        return None
+
+showNameMatcher = ShowNameMatcher()
@@ -36,15 +36,14 @@ from sickbeard.exceptions import ex
 class ShowQueue(generic_queue.GenericQueue):
 
     def __init__(self):
-        generic_queue.GenericQueue.__init__(self)
+        generic_queue.GenericQueue.__init__(self, sickbeard.SHOW_QUEUE_THREADS)
         self.queue_name = "SHOWQUEUE"
 
     def _isInQueue(self, show, actions):
         return show in [x.show for x in self.queue if x.action_id in actions]
 
     def _isBeingSomethinged(self, show, actions):
-        return self.currentItem != None and show == self.currentItem.show and \
-                self.currentItem.action_id in actions
+        return show in [x.show for x in self.currentItems if x.action_id in actions]
 
     def isInUpdateQueue(self, show):
         return self._isInQueue(show, (ShowQueueActions.UPDATE, ShowQueueActions.FORCEUPDATE))
@@ -68,7 +67,7 @@ class ShowQueue(generic_queue.GenericQueue):
         return self._isBeingSomethinged(show, (ShowQueueActions.RENAME,))
 
     def _getLoadingShowList(self):
-        return [x for x in self.queue + [self.currentItem] if x != None and x.isLoading]
+        return [x for x in self.queue + self.currentItems if x.isLoading]
 
     loadingShowList = property(_getLoadingShowList)
 
@@ -153,7 +152,11 @@ class ShowQueueItem(generic_queue.QueueItem):
         self.show = show
 
     def isInQueue(self):
-        return self in sickbeard.showQueueScheduler.action.queue + [sickbeard.showQueueScheduler.action.currentItem] #@UndefinedVariable
+        return self in sickbeard.showQueueScheduler.action.queue + sickbeard.showQueueScheduler.action.currentItems #@UndefinedVariable
+
+    def get_lock_key(self):
+        # only one thing at a time for each show
+        return self.show.tvdbid
 
     def _getName(self):
         return str(self.show.tvdbid)
@@ -192,6 +195,10 @@ class QueueItemAdd(ShowQueueItem):
 
     show_name = property(_getName)
 
+    def get_lock_key(self):
+        # we might not have a show object yet
+        return self.tvdb_id
+
     def _isLoading(self):
         """
         Returns True if we've gotten far enough to have a show object, or False
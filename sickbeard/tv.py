@@ -23,6 +23,8 @@ import datetime
 import threading
 import re
 import glob
+import traceback
+import weakref
 
 import sickbeard
 
@@ -38,6 +40,7 @@ from sickbeard.exceptions import ex
 from sickbeard import tvrage
 from sickbeard import image_cache
 from sickbeard import postProcessor
+from sickbeard import show_name_helpers
 
 from sickbeard import encodingKludge as ek
 
@@ -45,10 +48,100 @@ from common import Quality, Overview
 from common import DOWNLOADED, SNATCHED, SNATCHED_PROPER, ARCHIVED, IGNORED, UNAIRED, WANTED, SKIPPED, UNKNOWN
 from common import NAMING_DUPLICATE, NAMING_EXTEND, NAMING_LIMITED_EXTEND, NAMING_SEPARATED_REPEAT, NAMING_LIMITED_EXTEND_E_PREFIXED
 
+# the EpisodeSaveBatch which is collecting episode saves in the current thread, if any
+_active_save_batch = threading.local()
+
+# held while an episode's lock is created so two threads can't each make one
+_episode_lock_lock = threading.Lock()
+
+
+class EpisodeSaveBatch(object):
+    """
+    Unit of work for episode saves. While a batch is active in the current thread TVEpisode.saveToDB()
+    only records the episode, they are all written to the DB in a single transaction when the
+    outermost batch exits. Nested batches just add to the outer one.
+
+    with EpisodeSaveBatch():
+        for curEp in episodes:
+            curEp.saveToDB()
+    """
+
+    def __init__(self):
+        self.episodes = []
+        self._episode_ids = set()
+        self._forced_ids = set()
+        self._outer = None
+
+    @staticmethod
+    def current():
+        return getattr(_active_save_batch, "batch", None)
+
+    def __enter__(self):
+        self._outer = EpisodeSaveBatch.current()
+        if self._outer is None:
+            _active_save_batch.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._outer is None:
+            _active_save_batch.batch = None
+            # episodes saved before an error would already be in the DB without the batch, so flush regardless
+            self.flush()
+        return False
+
+    def add(self, ep_obj, forceSave=False):
+        if id(ep_obj) not in self._episode_ids:
+            self._episode_ids.add(id(ep_obj))
+            self.episodes.append(ep_obj)
+        if forceSave:
+            self._forced_ids.add(id(ep_obj))
+
+    def discard(self, ep_obj):
+        if id(ep_obj) in self._episode_ids:
+            self._episode_ids.remove(id(ep_obj))
+            self._forced_ids.discard(id(ep_obj))
+            self.episodes = [x for x in self.episodes if x is not ep_obj]
+
+    def flush(self):
+
+        # only the episodes that changed since they were loaded or last saved
+        rows = [(x, x._getDBRow(id(x) in self._forced_ids)) for x in self.episodes]
+
+        # the rest are set back to what's in the DB already, there's nothing to write but they're clean again
+        for (cur_ep, cur_row) in rows:
+            if cur_row[2] == []:
+                cur_ep.dirty = False
+        rows = [(x, y) for (x, y) in rows if y[2] != []]
+
+        self.episodes = []
+        self._episode_ids = set()
+        self._forced_ids = set()
+
+        if not rows:
+            return
+
+        logger.log(u"Saving " + str(len(rows)) + u" episodes to the database in one transaction", logger.DEBUG)
+
+        myDB = db.DBConnection()
+        myDB.mass_upsert("tv_episodes", [y for (x, y) in rows])
+
+        for (cur_ep, cur_row) in rows:
+            cur_ep._savedToDB(cur_row)
+
 
 class TVShow(object):
 
-    def __init__(self, tvdbid, lang=""):
+    # the columns of the show's row in tv_shows besides tvdb_id
+    _dbColumns = ("show_name", "tvr_id", "location", "network", "genre", "runtime", "quality", "airs", "status",
+                  "flatten_folders", "paused", "air_by_date", "startyear", "tvr_name", "lang", "last_update_tvdb")
+
+    def __init__(self, tvdbid, lang="", sqlShow=None):
+        """
+        tvdbid: the TVDB id of the show
+        lang: the language to get the show's info from TVDB in
+        sqlShow: the show's tv_shows row if it's already been selected, the show is then loaded from it
+                 instead of the database and isn't saved since nothing about it has changed
+        """
 
         self.tvdbid = tvdbid
 
@@ -73,15 +166,28 @@ class TVShow(object):
         self.lock = threading.Lock()
         self._isDirGood = False
 
+        # (newValueDict, tvdbid) of what's in the DB for this show, None if that isn't known
+        self._dbRow = None
+
+        # season -> episode -> TVEpisode for the EPISODE_CACHE_SIZE most recently used episodes
         self.episodes = {}
+        self._episodeUse = {}
+        self._episodeUseCount = 0
+        # every episode object of the show that's still around, so one that was dropped from
+        # self.episodes while something else was using it is picked up again instead of made twice
+        self._liveEpisodes = weakref.WeakValueDictionary()
+        # guards the four above, getEpisode is called from several threads at once (searches, the web UI)
+        self._episodeLock = threading.RLock()
 
         otherShow = helpers.findCertainShow(sickbeard.showList, self.tvdbid)
         if otherShow != None:
             raise exceptions.MultipleShowObjectsException("Can't create a show if it already exists")
 
-        self.loadFromDB()
-
-        self.saveToDB()
+        if sqlShow:
+            self._loadFromRow(sqlShow)
+        else:
+            self.loadFromDB()
+            self.saveToDB()
 
     def _getLocation(self):
         # no dir check needed if missing show dirs are created during post-processing
@@ -112,74 +218,125 @@ class TVShow(object):
     # delete references to anything that's not in the internal lists
     def flushEpisodes(self):
 
-        for curSeason in self.episodes:
-            for curEp in self.episodes[curSeason]:
-                myEp = self.episodes[curSeason][curEp]
-                self.episodes[curSeason][curEp] = None
-                del myEp
+        with self._episodeLock:
+            for curSeason in self.episodes:
+                self.episodes[curSeason] = {}
+            self._episodeUse = {}
+            # episodes are loaded fresh from the DB after this, even if an old one is still around somewhere
+            self._liveEpisodes = weakref.WeakValueDictionary()
 
-    def getAllEpisodes(self, season=None, has_location=False):
+    def _evictEpisodes(self):
+        """
+        Drops the least recently used episodes from self.episodes once there are more than EPISODE_CACHE_SIZE of them,
+        down to 90% of the limit so it isn't done for every new episode. Locked episodes are kept.
+        Has to be called with self._episodeLock held.
+        """
 
-        myDB = db.DBConnection()
+        max_size = sickbeard.EPISODE_CACHE_SIZE
+        if max_size <= 0 or len(self._episodeUse) <= max_size:
+            return
+
+        for (cur_key, cur_use) in sorted(self._episodeUse.items(), key=lambda x: x[1]):
+            if len(self._episodeUse) <= max_size * 9 / 10:
+                break
+
+            (season, episode) = cur_key
+            cur_ep = self.episodes.get(season, {}).get(episode)
+            if cur_ep != None and cur_ep.isLocked():
+                continue
+
+            self.episodes.get(season, {}).pop(episode, None)
+            self._episodeUse.pop(cur_key, None)
 
-        sql_selection = "SELECT season, episode, "
+    def _forgetEpisode(self, season, episode):
+        with self._episodeLock:
+            self.episodes.get(season, {}).pop(episode, None)
+            self._episodeUse.pop((season, episode), None)
+            self._liveEpisodes.pop((season, episode), None)
+
+    def getAllEpisodes(self, season=None, has_location=False):
 
-        # subselection to detect multi-episodes early, share_location > 0
-        sql_selection = sql_selection + " (SELECT COUNT (*) FROM tv_episodes WHERE showid = tve.showid AND season = tve.season AND location != '' AND location = tve.location AND episode != tve.episode) AS share_location "
+        myDB = db.DBConnection()
 
-        sql_selection = sql_selection + " FROM tv_episodes tve WHERE showid = " + str(self.tvdbid)
+        sql_selection = "SELECT * FROM tv_episodes WHERE showid = ?"
+        sql_args = [self.tvdbid]
 
         if season is not None:
-            sql_selection = sql_selection + " AND season = " + str(season)
+            sql_selection = sql_selection + " AND season = ?"
+            sql_args.append(season)
         if has_location:
-            sql_selection = sql_selection + " AND location != '' "
+            sql_selection = sql_selection + " AND location != ''"
 
         # need ORDER episode ASC to rename multi-episodes in order S01E01-02
         sql_selection = sql_selection + " ORDER BY season ASC, episode ASC"
 
-        results = myDB.select(sql_selection)
+        results = myDB.select(sql_selection, sql_args)
+
+        # group the rows by file to find multi-episodes, they're all in the same season so they're all in the results
+        eps_by_location = {}
+        for cur_result in results:
+            if cur_result["location"]:
+                eps_by_location.setdefault((int(cur_result["season"]), cur_result["location"]), []).append(cur_result)
 
         ep_list = []
         for cur_result in results:
-            cur_ep = self.getEpisode(int(cur_result["season"]), int(cur_result["episode"]))
+            cur_ep = self.getEpisode(int(cur_result["season"]), int(cur_result["episode"]), sqlResult=cur_result)
             if cur_ep:
                 cur_ep.relatedEps = []
                 if cur_ep.location:
-                    # if there is a location, check if it's a multi-episode (share_location > 0) and put them in relatedEps
-                    if cur_result["share_location"] > 0:
-                        related_eps_result = myDB.select("SELECT * FROM tv_episodes WHERE showid = ? AND season = ? AND location = ? AND episode != ? ORDER BY episode ASC", [self.tvdbid, cur_ep.season, cur_ep.location, cur_ep.episode])
-                        for cur_related_ep in related_eps_result:
-                            related_ep = self.getEpisode(int(cur_related_ep["season"]), int(cur_related_ep["episode"]))
+                    # if there is a location, check if it's a multi-episode (it shares its location) and put them in relatedEps
+                    if len(eps_by_location.get((int(cur_result["season"]), cur_result["location"]), [])) > 1:
+                        for cur_related_ep in eps_by_location.get((cur_ep.season, cur_ep.location), []):
+                            if int(cur_related_ep["episode"]) == cur_ep.episode:
+                                continue
+                            related_ep = self.getEpisode(int(cur_related_ep["season"]), int(cur_related_ep["episode"]), sqlResult=cur_related_ep)
                             if related_ep not in cur_ep.relatedEps:
                                 cur_ep.relatedEps.append(related_ep)
                 ep_list.append(cur_ep)
 
         return ep_list
 
-    def getEpisode(self, season, episode, file=None, noCreate=False):
+    def getEpisode(self, season, episode, file=None, noCreate=False, sqlResult=None):
+        """
+        Returns the TVEpisode for the given episode, creating it if there isn't one yet.
+
+        sqlResult: the episode's tv_episodes row if it's already been selected, a new episode is loaded from it
+        """
 
         #return TVEpisode(self, season, episode)
 
-        if not season in self.episodes:
-            self.episodes[season] = {}
+        # held while the episode is made too so two threads can't both make the same one
+        with self._episodeLock:
+            if not season in self.episodes:
+                self.episodes[season] = {}
 
-        ep = None
+            ep = self.episodes[season].get(episode)
 
-        if not episode in self.episodes[season] or self.episodes[season][episode] == None:
-            if noCreate:
-                return None
+            if ep == None:
+                ep = self._liveEpisodes.get((season, episode))
 
-            logger.log(str(self.tvdbid) + u": An object for episode " + str(season) + "x" + str(episode) + " didn't exist in the cache, trying to create it", logger.DEBUG)
+                if ep == None:
+                    if noCreate:
+                        return None
 
-            if file != None:
-                ep = TVEpisode(self, season, episode, file)
-            else:
-                ep = TVEpisode(self, season, episode)
+                    logger.log(str(self.tvdbid) + u": An object for episode " + str(season) + "x" + str(episode) + " didn't exist in the cache, trying to create it", logger.DEBUG)
+
+                    if file != None:
+                        ep = TVEpisode(self, season, episode, file, sqlResult=sqlResult)
+                    else:
+                        ep = TVEpisode(self, season, episode, sqlResult=sqlResult)
+
+                    self._liveEpisodes[(season, episode)] = ep
 
-            if ep != None:
                 self.episodes[season][episode] = ep
 
-        return self.episodes[season][episode]
+            self._episodeUseCount += 1
+            self._episodeUse[(season, episode)] = self._episodeUseCount
+
+            # after the use is counted so the new episode counts towards the limit and is the last to go
+            self._evictEpisodes()
+
+            return ep
 
     def should_update(self, update_date=datetime.date.today()):
 
@@ -274,6 +431,11 @@ class TVShow(object):
         # get file list
         mediaFiles = helpers.listMediaFiles(self._location)
 
+        with EpisodeSaveBatch():
+            self._loadEpisodesFromFiles(mediaFiles)
+
+    def _loadEpisodesFromFiles(self, mediaFiles):
+
         # create TVEpisodes from each media file (if possible)
         for mediaFile in mediaFiles:
 
@@ -387,32 +549,33 @@ class TVShow(object):
 
         scannedEps = {}
 
-        for season in showObj:
-            scannedEps[season] = {}
-            for episode in showObj[season]:
-                # need some examples of wtf episode 0 means to decide if we want it or not
-                if episode == 0:
-                    continue
-                try:
-                    #ep = TVEpisode(self, season, episode)
-                    ep = self.getEpisode(season, episode)
-                except exceptions.EpisodeNotFoundException:
-                    logger.log(str(self.tvdbid) + u": TVDB object for " + str(season) + "x" + str(episode) + " is incomplete, skipping this episode")
-                    continue
-                else:
+        with EpisodeSaveBatch():
+            for season in showObj:
+                scannedEps[season] = {}
+                for episode in showObj[season]:
+                    # need some examples of wtf episode 0 means to decide if we want it or not
+                    if episode == 0:
+                        continue
                     try:
-                        ep.loadFromTVDB(tvapi=t)
-                    except exceptions.EpisodeDeletedException:
-                        logger.log(u"The episode was deleted, skipping the rest of the load")
+                        #ep = TVEpisode(self, season, episode)
+                        ep = self.getEpisode(season, episode)
+                    except exceptions.EpisodeNotFoundException:
+                        logger.log(str(self.tvdbid) + u": TVDB object for " + str(season) + "x" + str(episode) + " is incomplete, skipping this episode")
                         continue
+                    else:
+                        try:
+                            ep.loadFromTVDB(tvapi=t)
+                        except exceptions.EpisodeDeletedException:
+                            logger.log(u"The episode was deleted, skipping the rest of the load")
+                            continue
 
-                with ep.lock:
-                    logger.log(str(self.tvdbid) + u": Loading info from theTVDB for episode " + str(season) + "x" + str(episode), logger.DEBUG)
-                    ep.loadFromTVDB(season, episode, tvapi=t)
-                    if ep.dirty:
-                        ep.saveToDB()
+                    with ep.lock:
+                        logger.log(str(self.tvdbid) + u": Loading info from theTVDB for episode " + str(season) + "x" + str(episode), logger.DEBUG)
+                        ep.loadFromTVDB(season, episode, tvapi=t)
+                        if ep.dirty:
+                            ep.saveToDB()
 
-                scannedEps[season][episode] = True
+                    scannedEps[season][episode] = True
 
         # Done updating save last update date
         self.last_update_tvdb = datetime.date.today().toordinal()
@@ -617,43 +780,49 @@ class TVShow(object):
             logger.log(str(self.tvdbid) + u": Unable to find the show in the database")
             return
         else:
-            if self.name == "":
-                self.name = sqlResults[0]["show_name"]
-            self.tvrname = sqlResults[0]["tvr_name"]
-            if self.network == "":
-                self.network = sqlResults[0]["network"]
-            if self.genre == "":
-                self.genre = sqlResults[0]["genre"]
+            self._loadFromRow(sqlResults[0])
+
+    def _loadFromRow(self, sqlShow):
+
+        if self.name == "":
+            self.name = sqlShow["show_name"]
+        self.tvrname = sqlShow["tvr_name"]
+        if self.network == "":
+            self.network = sqlShow["network"]
+        if self.genre == "":
+            self.genre = sqlShow["genre"]
 
-            self.runtime = sqlResults[0]["runtime"]
+        self.runtime = sqlShow["runtime"]
 
-            self.status = sqlResults[0]["status"]
-            if self.status == None:
-                self.status = ""
-            self.airs = sqlResults[0]["airs"]
-            if self.airs == None:
-                self.airs = ""
-            self.startyear = sqlResults[0]["startyear"]
-            if self.startyear == None:
-                self.startyear = 0
+        self.status = sqlShow["status"]
+        if self.status == None:
+            self.status = ""
+        self.airs = sqlShow["airs"]
+        if self.airs == None:
+            self.airs = ""
+        self.startyear = sqlShow["startyear"]
+        if self.startyear == None:
+            self.startyear = 0
 
-            self.air_by_date = sqlResults[0]["air_by_date"]
-            if self.air_by_date == None:
-                self.air_by_date = 0
+        self.air_by_date = sqlShow["air_by_date"]
+        if self.air_by_date == None:
+            self.air_by_date = 0
 
-            self.quality = int(sqlResults[0]["quality"])
-            self.flatten_folders = int(sqlResults[0]["flatten_folders"])
-            self.paused = int(sqlResults[0]["paused"])
+        self.quality = int(sqlShow["quality"])
+        self.flatten_folders = int(sqlShow["flatten_folders"])
+        self.paused = int(sqlShow["paused"])
 
-            self._location = sqlResults[0]["location"]
+        self._location = sqlShow["location"]
 
-            if self.tvrid == 0:
-                self.tvrid = int(sqlResults[0]["tvr_id"])
+        if self.tvrid == 0:
+            self.tvrid = int(sqlShow["tvr_id"])
 
-            if self.lang == "":
-                self.lang = sqlResults[0]["lang"]
+        if self.lang == "":
+            self.lang = sqlShow["lang"]
 
-            self.last_update_tvdb = sqlResults[0]["last_update_tvdb"]
+        self.last_update_tvdb = sqlShow["last_update_tvdb"]
+
+        self._dbRow = (dict((x, sqlShow[x]) for x in self._dbColumns), self.tvdbid)
 
     def loadFromTVDB(self, cache=True, tvapi=None, cachedSeason=None):
 
@@ -768,6 +937,11 @@ class TVShow(object):
         myDB = db.DBConnection()
         sqlResults = myDB.select("SELECT * FROM tv_episodes WHERE showid = ? AND location != ''", [self.tvdbid])
 
+        with EpisodeSaveBatch():
+            self._checkEpisodeLocations(sqlResults)
+
+    def _checkEpisodeLocations(self, sqlResults):
+
         for ep in sqlResults:
             curLoc = os.path.normpath(ep["location"])
             season = int(ep["season"])
@@ -794,10 +968,10 @@ class TVShow(object):
                     curEp.saveToDB()
 
     def saveToDB(self):
-
-        logger.log(str(self.tvdbid) + u": Saving show info to database", logger.DEBUG)
-
-        myDB = db.DBConnection()
+        """
+        Saves the show to the database. If it was loaded from or saved to the database before only the
+        columns which changed since then are updated, and nothing at all if none did.
+        """
 
         controlValueDict = {"tvdb_id": self.tvdbid}
         newValueDict = {"show_name": self.name,
@@ -818,7 +992,24 @@ class TVShow(object):
                         "last_update_tvdb": self.last_update_tvdb
                         }
 
-        myDB.upsert("tv_shows", newValueDict, controlValueDict)
+        if self._dbRow != None and self._dbRow[1] == self.tvdbid:
+            changedColumns = [x for x in newValueDict if newValueDict[x] != self._dbRow[0].get(x)]
+        else:
+            changedColumns = None
+
+        if changedColumns == []:
+            logger.log(str(self.tvdbid) + u": Not saving show info to database - nothing has changed", logger.DEBUG)
+        else:
+            logger.log(str(self.tvdbid) + u": Saving show info to database", logger.DEBUG)
+
+            myDB = db.DBConnection()
+            myDB.mass_upsert("tv_shows", [(newValueDict, controlValueDict, changedColumns)])
+
+            self._dbRow = (newValueDict, self.tvdbid)
+
+        # the name or ids might have changed
+        helpers.showIndex.update(self)
+        show_name_helpers.showNameMatcher.invalidate(self)
 
     def __str__(self):
         toReturn = ""
@@ -927,17 +1118,46 @@ def dirty_setter(attr_name):
     return wrapper
 
 
+def loadShowsFromDB():
+    """
+    Populates the showList with shows from the database, they're all loaded from a single query
+    """
+
+    myDB = db.DBConnection()
+    sqlResults = myDB.select("SELECT * FROM tv_shows")
+
+    for sqlShow in sqlResults:
+        try:
+            curShow = TVShow(int(sqlShow["tvdb_id"]), sqlShow=sqlShow)
+            sickbeard.showList.append(curShow)
+        except Exception, e:
+            logger.log(u"There was an error creating the show in " + sqlShow["location"] + ": " + str(e).decode('utf-8'), logger.ERROR)
+            logger.log(traceback.format_exc(), logger.DEBUG)
+
+        # TODO: update the existing shows if the showlist has something in it
+
+
 class TVEpisode(object):
 
-    def __init__(self, show, season, episode, file=""):
+    # a show can have thousands of these in memory so they don't get a __dict__
+    __slots__ = ("_name", "_season", "_episode", "_description", "_airdate", "_hasnfo", "_hastbn", "_status",
+                 "_tvdbid", "_file_size", "_release_name", "_location", "_lock", "_dbRow", "dirty", "show",
+                 "relatedEps", "__weakref__")
+
+    # the columns of the episode's row in tv_episodes besides showid, season and episode
+    _dbColumns = ("tvdbid", "name", "description", "airdate", "hasnfo", "hastbn", "status", "location", "file_size",
+                  "release_name")
+
+    def __init__(self, show, season, episode, file="", sqlResult=None):
 
         self._name = ""
         self._season = season
         self._episode = episode
         self._description = ""
         self._airdate = datetime.date.fromordinal(1)
-        self._hasnfo = False
-        self._hastbn = False
+        # None until the metadata files are looked for, which is only done when they're first needed
+        self._hasnfo = None
+        self._hastbn = None
         self._status = UNKNOWN
         self._tvdbid = 0
         self._file_size = 0
@@ -949,21 +1169,27 @@ class TVEpisode(object):
         self.show = show
         self._location = file
 
-        self.lock = threading.Lock()
+        # most episodes are never locked, the lock is made the first time it's needed
+        self._lock = None
 
-        self.specifyEpisode(self.season, self.episode)
+        # what's in the DB for this episode as ((column values in _dbColumns order), (showid, season, episode)),
+        # None if that isn't known. Tuples because there's one of these for every episode in memory.
+        self._dbRow = None
 
-        self.relatedEps = []
+        if sqlResult:
+            self._loadFromRow(sqlResult, season, episode)
+        else:
+            self.specifyEpisode(self.season, self.episode)
 
-        self.checkForMetaFiles()
+        self.relatedEps = []
 
     name = property(lambda self: self._name, dirty_setter("_name"))
     season = property(lambda self: self._season, dirty_setter("_season"))
     episode = property(lambda self: self._episode, dirty_setter("_episode"))
     description = property(lambda self: self._description, dirty_setter("_description"))
     airdate = property(lambda self: self._airdate, dirty_setter("_airdate"))
-    hasnfo = property(lambda self: self._hasnfo, dirty_setter("_hasnfo"))
-    hastbn = property(lambda self: self._hastbn, dirty_setter("_hastbn"))
+    hasnfo = property(lambda self: self._getMetaFileFlag("_hasnfo"), dirty_setter("_hasnfo"))
+    hastbn = property(lambda self: self._getMetaFileFlag("_hastbn"), dirty_setter("_hastbn"))
     status = property(lambda self: self._status, dirty_setter("_status"))
     tvdbid = property(lambda self: self._tvdbid, dirty_setter("_tvdbid"))
     #location = property(lambda self: self._location, dirty_setter("_location"))
@@ -983,28 +1209,49 @@ class TVEpisode(object):
 
     location = property(lambda self: self._location, _set_location)
 
+    def _getLock(self):
+        if self._lock == None:
+            with _episode_lock_lock:
+                if self._lock == None:
+                    self._lock = threading.Lock()
+        return self._lock
+
+    lock = property(_getLock)
+
+    def isLocked(self):
+        """
+        Returns True if some thread holds this episode's lock, without making a lock if it doesn't have one
+        """
+        return self._lock != None and self._lock.locked()
+
+    def _getMetaFileFlag(self, attr_name):
+        if getattr(self, attr_name) is None:
+            self.checkForMetaFiles()
+        return getattr(self, attr_name)
+
     def checkForMetaFiles(self):
 
-        oldhasnfo = self.hasnfo
-        oldhastbn = self.hastbn
+        oldhasnfo = self._hasnfo
+        oldhastbn = self._hastbn
 
         cur_nfo = False
         cur_tbn = False
 
-        # check for nfo and tbn
-        if ek.ek(os.path.isfile, self.location):
-            for cur_provider in sickbeard.metadata_provider_dict.values():
-                if cur_provider.episode_metadata:
-                    new_result = cur_provider._has_episode_metadata(self)
-                else:
-                    new_result = False
-                cur_nfo = new_result or cur_nfo
+        # check for nfo and tbn, the files are all found from one listing of each directory
+        with helpers.dirListingCache.batch():
+            if helpers.dirListingCache.isFile(self.location):
+                for cur_provider in sickbeard.metadata_provider_dict.values():
+                    if cur_provider.episode_metadata:
+                        new_result = cur_provider._has_episode_metadata(self)
+                    else:
+                        new_result = False
+                    cur_nfo = new_result or cur_nfo
 
-                if cur_provider.episode_thumbnails:
-                    new_result = cur_provider._has_episode_thumb(self)
-                else:
-                    new_result = False
-                cur_tbn = new_result or cur_tbn
+                    if cur_provider.episode_thumbnails:
+                        new_result = cur_provider._has_episode_thumb(self)
+                    else:
+                        new_result = False
+                    cur_tbn = new_result or cur_tbn
 
         self.hasnfo = cur_nfo
         self.hastbn = cur_tbn
@@ -1053,33 +1300,39 @@ class TVEpisode(object):
             logger.log(str(self.show.tvdbid) + u": Episode " + str(self.season) + "x" + str(self.episode) + " not found in the database", logger.DEBUG)
             return False
         else:
-            #NAMEIT logger.log(u"AAAAA from" + str(self.season)+"x"+str(self.episode) + " -" + self.name + " to " + str(sqlResults[0]["name"]))
-            if sqlResults[0]["name"] != None:
-                self.name = sqlResults[0]["name"]
-            self.season = season
-            self.episode = episode
-            self.description = sqlResults[0]["description"]
-            if self.description == None:
-                self.description = ""
-            self.airdate = datetime.date.fromordinal(int(sqlResults[0]["airdate"]))
-            #logger.log(u"1 Status changes from " + str(self.status) + " to " + str(sqlResults[0]["status"]), logger.DEBUG)
-            self.status = int(sqlResults[0]["status"])
-
-            # don't overwrite my location
-            if sqlResults[0]["location"] != "" and sqlResults[0]["location"] != None:
-                self.location = os.path.normpath(sqlResults[0]["location"])
-            if sqlResults[0]["file_size"]:
-                self.file_size = int(sqlResults[0]["file_size"])
-            else:
-                self.file_size = 0
+            self._loadFromRow(sqlResults[0], season, episode)
+            return True
 
-            self.tvdbid = int(sqlResults[0]["tvdbid"])
+    def _loadFromRow(self, sqlResult, season, episode):
 
-            if sqlResults[0]["release_name"] != None:
-                self.release_name = sqlResults[0]["release_name"]
+        #NAMEIT logger.log(u"AAAAA from" + str(self.season)+"x"+str(self.episode) + " -" + self.name + " to " + str(sqlResult["name"]))
+        if sqlResult["name"] != None:
+            self.name = sqlResult["name"]
+        self.season = season
+        self.episode = episode
+        self.description = sqlResult["description"]
+        if self.description == None:
+            self.description = ""
+        self.airdate = datetime.date.fromordinal(int(sqlResult["airdate"]))
+        #logger.log(u"1 Status changes from " + str(self.status) + " to " + str(sqlResult["status"]), logger.DEBUG)
+        self.status = int(sqlResult["status"])
+
+        # don't overwrite my location
+        if sqlResult["location"] != "" and sqlResult["location"] != None:
+            self.location = os.path.normpath(sqlResult["location"])
+        if sqlResult["file_size"]:
+            self.file_size = int(sqlResult["file_size"])
+        else:
+            self.file_size = 0
 
-            self.dirty = False
-            return True
+        self.tvdbid = int(sqlResult["tvdbid"])
+
+        if sqlResult["release_name"] != None:
+            self.release_name = sqlResult["release_name"]
+
+        self._dbRow = (tuple([sqlResult[x] for x in self._dbColumns]), (self.show.tvdbid, season, episode))
+
+        self.dirty = False
 
     def loadFromTVDB(self, season=None, episode=None, cache=True, tvapi=None, cachedSeason=None):
 
@@ -1319,7 +1572,12 @@ class TVEpisode(object):
         # remove myself from the show dictionary
         if self.show.getEpisode(self.season, self.episode, noCreate=True) == self:
             logger.log(u"Removing myself from my show's list", logger.DEBUG)
-            del self.show.episodes[self.season][self.episode]
+            self.show._forgetEpisode(self.season, self.episode)
+
+        # make sure a pending batched save doesn't put me back
+        cur_batch = EpisodeSaveBatch.current()
+        if cur_batch:
+            cur_batch.discard(self)
 
         # delete myself from the DB
         logger.log(u"Deleting myself from the database", logger.DEBUG)
@@ -1337,15 +1595,63 @@ class TVEpisode(object):
                     last save (aka if the record is not dirty).
         """
 
+        # if nothing has looked for the metadata files yet do it now so the DB gets what's on disk
+        self._getMetaFileFlag("_hasnfo")
+
         if not self.dirty and not forceSave:
             logger.log(str(self.show.tvdbid) + u": Not saving episode to db - record is not dirty", logger.DEBUG)
             return
 
+        # if a batch is active it'll write us to the DB when it's done
+        cur_batch = EpisodeSaveBatch.current()
+        if cur_batch:
+            cur_batch.add(self, forceSave)
+            return
+
+        cur_row = self._getDBRow(forceSave)
+
+        if cur_row[2] == []:
+            logger.log(str(self.show.tvdbid) + u": Not saving episode to db - nothing has changed", logger.DEBUG)
+            self.dirty = False
+            return
+
         logger.log(str(self.show.tvdbid) + u": Saving episode details to database", logger.DEBUG)
 
         logger.log(u"STATUS IS " + str(self.status), logger.DEBUG)
 
+        # use a custom update/insert method to get the data into the DB, only the changed columns are updated
         myDB = db.DBConnection()
+        myDB.mass_upsert("tv_episodes", [cur_row])
+
+        self._savedToDB(cur_row)
+
+    def _getDBRow(self, forceSave=False):
+        """
+        Returns a (newValueDict, controlValueDict, changedColumns) row for DBConnection.mass_upsert. changedColumns
+        are the columns that changed since the episode was loaded from or saved to the DB, it's None if the whole
+        row has to be written.
+        """
+
+        newValueDict, controlValueDict = self._getDBValues()
+
+        if forceSave or self._dbRow == None or self._dbRow[1] != self._dbKey(controlValueDict):
+            return (newValueDict, controlValueDict, None)
+
+        return (newValueDict, controlValueDict, [x for (x, old_value) in zip(self._dbColumns, self._dbRow[0]) if newValueDict[x] != old_value])
+
+    @staticmethod
+    def _dbKey(controlValueDict):
+        return (controlValueDict["showid"], controlValueDict["season"], controlValueDict["episode"])
+
+    def _savedToDB(self, row):
+        self._dbRow = (tuple([row[0][x] for x in self._dbColumns]), self._dbKey(row[1]))
+        self.dirty = False
+
+    def _getDBValues(self):
+        """
+        Returns a (newValueDict, controlValueDict) tuple to upsert this episode's row with.
+        """
+
         newValueDict = {"tvdbid": self.tvdbid,
                         "name": self.name,
                         "description": self.description,
@@ -1360,8 +1666,7 @@ class TVEpisode(object):
                             "season": self.season,
                             "episode": self.episode}
 
-        # use a custom update/insert method to get the data into the DB
-        myDB.upsert("tv_episodes", newValueDict, controlValueDict)
+        return (newValueDict, controlValueDict)
 
     def fullPath(self):
         if self.location == None or self.location == "":
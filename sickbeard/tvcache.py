@@ -45,14 +45,7 @@ class CacheDBConnection(db.DBConnection):
     def __init__(self, providerName):
         db.DBConnection.__init__(self, "cache.db")
 
-        # Create the table if it's not already there
-        try:
-            sql = "CREATE TABLE [" + providerName + "] (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT);"
-            self.connection.execute(sql)
-            self.connection.commit()
-        except sqlite3.OperationalError, e:
-            if str(e) != "table [" + providerName + "] already exists":
-                raise
+        # the provider_cache table shared by all providers is created by the cache_db migrations
 
         # Create the table if it's not already there
         try:
@@ -72,6 +65,9 @@ class TVCache():
         self.providerID = self.provider.getID()
         self.minTime = 10
 
+        # urls of feed items we couldn't parse, so we don't try again every update
+        self._rejectedURLs = {}
+
     def _getDB(self):
 
         return CacheDBConnection(self.providerID)
@@ -80,7 +76,32 @@ class TVCache():
 
         myDB = self._getDB()
 
-        myDB.action("DELETE FROM [" + self.providerID + "] WHERE 1")
+        myDB.action("DELETE FROM provider_cache WHERE provider = ?", [self.providerID])
+
+    def _trimCache(self):
+        """
+        Removes the cache entries which are older than the cache retention
+        """
+
+        oldest = datetime.datetime.today() - datetime.timedelta(days=sickbeard.PROVIDER_CACHE_RETENTION)
+        oldestTimestamp = int(time.mktime(oldest.timetuple()))
+
+        myDB = self._getDB()
+        myDB.action("DELETE FROM provider_cache WHERE provider = ? AND time < ?", [self.providerID, oldestTimestamp])
+
+        for url in [x for x in self._rejectedURLs if self._rejectedURLs[x] < oldestTimestamp]:
+            del self._rejectedURLs[url]
+
+    def _isCached(self, url):
+        """
+        Returns True if the item at the given url was already added to the cache (or rejected) by an earlier update
+        """
+
+        if url in self._rejectedURLs:
+            return True
+
+        myDB = self._getDB()
+        return len(myDB.select("SELECT 1 FROM provider_cache WHERE provider = ? AND url = ? LIMIT 1", [self.providerID, url])) > 0
 
     def _getRSSData(self):
 
@@ -109,9 +130,9 @@ class TVCache():
             else:
                 return []
 
-            # now that we've loaded the current RSS feed lets delete the old cache
-            logger.log(u"Clearing " + self.provider.name + " cache and updating with new information")
-            self._clearCache()
+            # now that we've loaded the current RSS feed lets age out the old cache entries, the rest we keep
+            logger.log(u"Updating " + self.provider.name + " cache with new information")
+            self._trimCache()
 
             parsedXML = helpers.parse_xml(data)
 
@@ -193,6 +214,11 @@ class TVCache():
 
     def _addCacheEntry(self, name, url, season=None, episodes=None, tvdb_id=0, tvrage_id=0, quality=None, extraNames=[]):
 
+        # we already did the work for items that were in an earlier feed
+        if self._isCached(url):
+            logger.log(u"Skipping " + name + ", it's already in the cache", logger.DEBUG)
+            return
+
         myDB = self._getDB()
 
         parse_result = None
@@ -208,10 +234,12 @@ class TVCache():
 
         if not parse_result:
             logger.log(u"Giving up because I'm unable to parse this name: " + name, logger.DEBUG)
+            self._rejectedURLs[url] = int(time.time())
             return False
 
         if not parse_result.series_name:
             logger.log(u"No series name retrieved from " + name + ", unable to cache it", logger.DEBUG)
+            self._rejectedURLs[url] = int(time.time())
             return False
 
         tvdb_lang = None
@@ -265,12 +293,11 @@ class TVCache():
                 # if the DB lookup fails then do a comprehensive regex search
                 if tvdb_id == None:
                     logger.log(u"Couldn't figure out a show name straight from the DB, trying a regex search instead", logger.DEBUG)
-                    for curShow in sickbeard.showList:
-                        if show_name_helpers.isGoodResult(name, curShow, False):
-                            logger.log(u"Successfully matched " + name + " to " + curShow.name + " with regex", logger.DEBUG)
-                            tvdb_id = curShow.tvdbid
-                            tvdb_lang = curShow.lang
-                            break
+                    curShow = show_name_helpers.showNameMatcher.findShow(name)
+                    if curShow:
+                        logger.log(u"Successfully matched " + name + " to " + curShow.name + " with regex", logger.DEBUG)
+                        tvdb_id = curShow.tvdbid
+                        tvdb_lang = curShow.lang
 
                 # if tvdb_id was anything but None (0 or a number) then
                 if not from_cache:
@@ -314,16 +341,15 @@ class TVCache():
                 logger.log(u"Unable to contact TVDB: " + ex(e), logger.WARNING)
                 return False
 
-        episodeText = "|" + "|".join(map(str, episodes)) + "|"
-
         # get the current timestamp
         curTimestamp = int(time.mktime(datetime.datetime.today().timetuple()))
 
         if not quality:
             quality = Quality.nameQuality(name)
 
-        myDB.action("INSERT INTO [" + self.providerID + "] (name, season, episodes, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?)",
-                    [name, season, episodeText, tvrage_id, tvdb_id, url, curTimestamp, quality])
+        # one row per episode, results without episode numbers still get a row (for propers)
+        myDB.mass_action([["INSERT INTO provider_cache (provider, name, season, episode, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?,?)",
+                           [self.providerID, name, season, curEpisode, tvrage_id, tvdb_id, url, curTimestamp, quality]] for curEpisode in episodes or [None]])
 
     def searchCache(self, episode, manualSearch=False):
         neededEps = self.findNeededEpisodes(episode, manualSearch)
@@ -333,13 +359,14 @@ class TVCache():
 
         myDB = self._getDB()
 
-        sql = "SELECT * FROM [" + self.providerID + "] WHERE name LIKE '%.PROPER.%' OR name LIKE '%.REPACK.%'"
+        sql = "SELECT DISTINCT name, url, time FROM provider_cache WHERE provider = ? AND (name LIKE '%.PROPER.%' OR name LIKE '%.REPACK.%')"
+        params = [self.providerID]
 
         if date != None:
-            sql += " AND time >= " + str(int(time.mktime(date.timetuple())))
+            sql += " AND time >= ?"
+            params.append(int(time.mktime(date.timetuple())))
 
-        #return filter(lambda x: x['tvdbid'] != 0, myDB.select(sql))
-        return myDB.select(sql)
+        return myDB.select(sql, params)
 
     def findNeededEpisodes(self, episode=None, manualSearch=False):
         neededEps = {}
@@ -350,13 +377,20 @@ class TVCache():
         myDB = self._getDB()
 
         if not episode:
-            sqlResults = myDB.select("SELECT * FROM [" + self.providerID + "]")
+            sqlResults = myDB.select("SELECT * FROM provider_cache WHERE provider = ? AND episode IS NOT NULL ORDER BY rowid", [self.providerID])
         else:
-            sqlResults = myDB.select("SELECT * FROM [" + self.providerID + "] WHERE tvdbid = ? AND season = ? AND episodes LIKE ?", [episode.show.tvdbid, episode.season, "%|" + str(episode.episode) + "|%"])
+            sqlResults = myDB.select("SELECT * FROM provider_cache WHERE provider = ? AND tvdbid = ? AND season = ? AND episode = ?", [self.providerID, episode.show.tvdbid, episode.season, episode.episode])
+
+        seenURLs = set()
 
         # for each cache entry
         for curResult in sqlResults:
 
+            # multi-episode results have a row per episode, only use the first one of them (ignoring multi-eps for now)
+            if curResult["url"] in seenURLs:
+                continue
+            seenURLs.add(curResult["url"])
+
             # skip non-tv crap
             if not show_name_helpers.filterBadReleases(curResult["name"]):
                 continue
@@ -366,14 +400,11 @@ class TVCache():
             if not showObj:
                 continue
 
-            # get season and ep data (ignoring multi-eps for now)
+            # get season and ep data
             curSeason = int(curResult["season"])
             if curSeason == -1:
                 continue
-            curEp = curResult["episodes"].split("|")[1]
-            if not curEp:
-                continue
-            curEp = int(curEp)
+            curEp = int(curResult["episode"])
             curQuality = int(curResult["quality"])
 
             # if the show says we want that episode then add it to the list
@@ -37,6 +37,8 @@ from sickbeard import search_queue
 from sickbeard.common import SNATCHED, SNATCHED_PROPER, DOWNLOADED, SKIPPED, UNAIRED, IGNORED, ARCHIVED, WANTED, UNKNOWN
 from common import Quality, qualityPresetStrings, statusStrings
 from sickbeard import image_cache
+from sickbeard import name_cache
+from sickbeard.name_parser.parser import name_parser_cache
 from lib.tvdb_api import tvdb_api, tvdb_exceptions
 
 try:
@@ -150,7 +152,6 @@ class Api:
         t.seasonSQLResults = seasonSQLResults
         t.episodeSQLResults = episodeSQLResults
 
-        myDB.connection.close()
         if len(sickbeard.API_KEY) == 32:
             t.apikey = sickbeard.API_KEY
         else:
@@ -778,7 +779,6 @@ class CMD_ComingEpisodes(ApiCall):
                 finalEpResults[status] = []
 
             finalEpResults[status].append(ep)
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, finalEpResults)
 
 
@@ -836,7 +836,6 @@ class CMD_Episode(ApiCall):
         episode["quality"] = _get_quality_string(quality)
         episode["file_size_human"] = _sizeof_fmt(episode["file_size"])
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, episode)
 
 
@@ -1017,7 +1016,6 @@ class CMD_Exceptions(ApiCall):
             for row in sqlResults:
                 scene_exceptions.append(row["show_name"])
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, scene_exceptions)
 
 
@@ -1072,7 +1070,6 @@ class CMD_History(ApiCall):
             row["resource"] = os.path.basename(row["resource"])
             results.append(row)
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, results)
 
 
@@ -1091,7 +1088,6 @@ class CMD_HistoryClear(ApiCall):
         myDB = db.DBConnection()
         myDB.action("DELETE FROM history WHERE 1=1")
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, msg="History cleared")
 
 
@@ -1110,7 +1106,6 @@ class CMD_HistoryTrim(ApiCall):
         myDB = db.DBConnection()
         myDB.action("DELETE FROM history WHERE date < " + str((datetime.datetime.today() - datetime.timedelta(days=30)).strftime(history.dateFormat)))
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, msg="Removed history entries greater than 30 days old")
 
 
@@ -1266,7 +1261,6 @@ class CMD_SickBeardCheckScheduler(ApiCall):
         nextSearch = str(sickbeard.currentSearchScheduler.timeLeft()).split('.')[0]
         nextBacklog = sickbeard.backlogSearchScheduler.nextRun().strftime(dateFormat).decode(sickbeard.SYS_ENCODING)
 
-        myDB.connection.close()
         data = {"backlog_is_paused": int(backlogPaused), "backlog_is_running": int(backlogRunning), "last_backlog": _ordinal_to_dateForm(sqlResults[0]["last_backlog"]), "search_is_running": int(searchStatus), "next_search": nextSearch, "next_backlog": nextBacklog}
         return _responds(RESULT_SUCCESS, data)
 
@@ -1388,6 +1382,36 @@ class CMD_SickBeardGetRootDirs(ApiCall):
         return _responds(RESULT_SUCCESS, _getRootDirs())
 
 
+class CMD_SickBeardParserCache(ApiCall):
+    _help = {"desc": "get the name parser cache statistics"}
+
+    def __init__(self, args, kwargs):
+        # required
+        # optional
+        # super, missing, help
+        ApiCall.__init__(self, args, kwargs)
+
+    def run(self):
+        """ get the size and hit/miss/eviction counts of the name parser cache """
+
+        return _responds(RESULT_SUCCESS, name_parser_cache.stats())
+
+
+class CMD_SickBeardNameCache(ApiCall):
+    _help = {"desc": "get the show name cache statistics"}
+
+    def __init__(self, args, kwargs):
+        # required
+        # optional
+        # super, missing, help
+        ApiCall.__init__(self, args, kwargs)
+
+    def run(self):
+        """ get the size and hit ratio of the show name cache """
+
+        return _responds(RESULT_SUCCESS, name_cache.getStats())
+
+
 class CMD_SickBeardPauseBacklog(ApiCall):
     _help = {"desc": "pause the backlog search",
              "optionalParameters": {"pause ": {"desc": "pause or unpause the global backlog"} }
@@ -2077,7 +2101,6 @@ class CMD_ShowSeasonList(ApiCall):
         for row in sqlResults:
             seasonList.append(int(row["season"]))
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, seasonList)
 
 
@@ -2137,7 +2160,6 @@ class CMD_ShowSeasons(ApiCall):
                     seasons[curEpisode] = {}
                 seasons[curEpisode] = row
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, seasons)
 
 
@@ -2298,7 +2320,6 @@ class CMD_ShowStats(ApiCall):
             statusString = statusStrings.statusStrings[statusCode].lower().replace(" ", "_").replace("(", "").replace(")", "")
             episodes_stats[statusString] = episode_status_counts_total[statusCode]
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, episodes_stats)
 
 
@@ -2398,7 +2419,6 @@ class CMD_ShowsStats(ApiCall):
         stats["ep_downloaded"] = myDB.select("SELECT COUNT(*) FROM tv_episodes WHERE status IN (" + ",".join([str(show) for show in Quality.DOWNLOADED + [ARCHIVED]]) + ") AND season != 0 and episode != 0 AND airdate <= " + today + "")[0][0]
         stats["ep_total"] = myDB.select("SELECT COUNT(*) FROM tv_episodes WHERE season != 0 AND episode != 0 AND (airdate != 1 OR status IN (" + ",".join([str(show) for show in (Quality.DOWNLOADED + Quality.SNATCHED + Quality.SNATCHED_PROPER) + [ARCHIVED]]) + ")) AND airdate <= " + today + " AND status != " + str(IGNORED) + "")[0][0]
 
-        myDB.connection.close()
         return _responds(RESULT_SUCCESS, stats)
 
 # WARNING: never define a cmd call string that contains a "_" (underscore)
@@ -2424,6 +2444,8 @@ _functionMaper = {"help": CMD_Help,
                   "sb.getdefaults": CMD_SickBeardGetDefaults,
                   "sb.getmessages": CMD_SickBeardGetMessages,
                   "sb.getrootdirs": CMD_SickBeardGetRootDirs,
+                  "sb.namecache": CMD_SickBeardNameCache,
+                  "sb.parsercache": CMD_SickBeardParserCache,
                   "sb.pausebacklog": CMD_SickBeardPauseBacklog,
                   "sb.ping": CMD_SickBeardPing,
                   "sb.restart": CMD_SickBeardRestart,
@@ -40,6 +40,9 @@ from sickbeard import encodingKludge as ek
 from sickbeard import search_queue
 from sickbeard import image_cache
 from sickbeard import naming
+from sickbeard import name_cache
+from sickbeard import show_name_helpers
+from sickbeard.name_parser.parser import name_parser_cache
 
 from sickbeard.providers import newznab
 from sickbeard.common import Quality, Overview, statusStrings
@@ -163,6 +166,8 @@ class ManageSearches:
         t.backlogPaused = sickbeard.searchQueueScheduler.action.is_backlog_paused()  # @UndefinedVariable
         t.backlogRunning = sickbeard.searchQueueScheduler.action.is_backlog_in_progress()  # @UndefinedVariable
         t.searchStatus = sickbeard.currentSearchScheduler.action.amActive  # @UndefinedVariable
+        t.parserCacheStats = name_parser_cache.stats()
+        t.nameCacheStats = name_cache.getStats()
         t.submenu = ManageMenu
 
         return _munge(t)
@@ -1221,6 +1226,7 @@ class ConfigHidden:
         sickbeard.CREATE_MISSING_SHOW_DIRS = config.checkbox_to_value(create_missing_show_dirs)
         sickbeard.ADD_SHOWS_WO_DIR = config.checkbox_to_value(add_shows_wo_dir)
         sickbeard.IGNORE_WORDS = ignore_words
+        show_name_helpers.compileReleaseFilter()
 
         sickbeard.save_config()
 
@@ -1247,7 +1253,6 @@ class ConfigHidden:
 
         myDB = db.DBConnection()
         sql_result = myDB.select("SELECT tvdb_id,show_name,status FROM tv_shows WHERE status != 'Continuing' ORDER BY show_id DESC LIMIT 400")
-        myDB.connection.close()
 
         if (len(sql_result)) > 1:
             logger.log(u"There were " + str(len(sql_result)) + " shows in your database that need checking (limited to 400).", logger.MESSAGE)
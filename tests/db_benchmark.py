@@ -0,0 +1,426 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+DB benchmarks against a synthetic library.
+
+pool:  times a DB-bound refresh of the library, once with a fresh sqlite connection per
+       DBConnection (the old behaviour) and once with the pooled connections.
+batch: times saving every episode of one large show, once episode by episode and once
+       inside an EpisodeSaveBatch.
+cache: times episode lookups in the provider cache, once against the old per-provider
+       tables with pipe-delimited episode lists and once against provider_cache.
+startup: times loading the show list at startup, once creating each show from its own query
+       and saving it back (the old behaviour) and once loading them all from one query.
+episodes: times getting all the episodes of a large show with a multi-episode file for every
+       other pair of episodes, once with a query per episode and per multi-episode (the old
+       behaviour) and once loading them all from one query.
+update: counts what's written for a daily TVDB update of a large show, where earlier in the day
+       some of the episodes were saved and a few of them get a new status in the update. Once
+       writing every column of every episode that was ever changed (the old behaviour) and once
+       writing just the changed columns of the changed episodes.
+
+Usage: python db_benchmark.py pool [number of shows] [episodes per show]
+       python db_benchmark.py batch [number of episodes]
+       python db_benchmark.py cache [cached items] [providers] [lookups]
+       python db_benchmark.py startup [number of shows]
+       python db_benchmark.py episodes [number of episodes]
+       python db_benchmark.py update [number of episodes]
+"""
+
+import random
+import sqlite3
+import sys
+import time
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import db
+from sickbeard import tv
+from sickbeard.tv import EpisodeSaveBatch, TVShow
+
+
+def _unpooled_connection(filename):
+    connection = sqlite3.connect(filename, 20)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def seed_library(num_shows, num_episodes):
+    myDB = db.DBConnection()
+
+    show_rows = []
+    episode_rows = []
+    for tvdb_id in range(1, num_shows + 1):
+        show_rows.append(["INSERT INTO tv_shows (tvdb_id, show_name, location, quality, flatten_folders, paused, tvr_id, lang, last_update_tvdb) VALUES (?,?,?,?,?,?,?,?,?)",
+                          [tvdb_id, u"Show " + str(tvdb_id), test.SHOWDIR, 4, 0, 0, 0, "en", 1]])
+        for episode in range(1, num_episodes + 1):
+            episode_rows.append(["INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location, file_size, release_name) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                                 [tvdb_id, tvdb_id * 1000 + episode, u"Episode " + str(episode), 1, episode, u"", 1, 0, 0, 5, u"", 0, u""]])
+
+    myDB.mass_action(show_rows + episode_rows)
+
+
+def refresh_library(num_shows, num_episodes):
+    sickbeard.showList = []
+
+    for tvdb_id in range(1, num_shows + 1):
+        show = TVShow(tvdb_id)
+        sickbeard.showList.append(show)
+
+        for episode in range(1, num_episodes + 1):
+            ep = show.getEpisode(1, episode)
+            ep.loadFromDB(1, episode)
+            ep.saveToDB(forceSave=True)
+
+
+def save_show(num_episodes):
+    show = TVShow(1)
+    sickbeard.showList = [show]
+
+    for episode in range(1, num_episodes + 1):
+        ep = show.getEpisode(episode / 100 + 1, episode % 100)
+        ep.name = u"Episode " + str(episode)
+        ep.description = u"Updated description " * 10
+        ep.saveToDB()
+
+
+def save_show_batched(num_episodes):
+    with EpisodeSaveBatch():
+        save_show(num_episodes)
+
+
+def run(label, func, *args):
+    test.setUp_test_db()
+
+    start = time.time()
+    func(*args)
+    elapsed = time.time() - start
+
+    test.tearDown_test_db()
+    sickbeard.showList = []
+
+    print "%-10s %8.2fs" % (label, elapsed)
+    return elapsed
+
+
+def benchmark_pool(num_shows=500, num_episodes=20):
+    print "=================="
+    print "DB BENCHMARK - refreshing %d shows with %d episodes each" % (num_shows, num_episodes)
+    print "=================="
+
+    def seed_and_refresh():
+        seed_library(num_shows, num_episodes)
+        start = time.time()
+        refresh_library(num_shows, num_episodes)
+        # don't count the seeding
+        return time.time() - start
+
+    pooled_connection = db._getConnection
+
+    db._getConnection = _unpooled_connection
+    test.setUp_test_db()
+    before = seed_and_refresh()
+    test.tearDown_test_db()
+    print "%-10s %8.2fs" % ("unpooled", before)
+
+    db._getConnection = pooled_connection
+    test.setUp_test_db()
+    after = seed_and_refresh()
+    test.tearDown_test_db()
+    print "%-10s %8.2fs" % ("pooled", after)
+
+    print "speedup:   %8.2fx" % (before / after)
+
+
+def benchmark_batch(num_episodes=1000):
+    print "=================="
+    print "DB BENCHMARK - saving a show with %d episodes" % num_episodes
+    print "=================="
+
+    before = run("single", save_show, num_episodes)
+    after = run("batched", save_show_batched, num_episodes)
+
+    print "single:    %8.0f episodes/s" % (num_episodes / before)
+    print "batched:   %8.0f episodes/s" % (num_episodes / after)
+    print "speedup:   %8.2fx" % (before / after)
+
+
+def seed_cache(num_items, num_providers):
+    myDB = db.DBConnection("cache.db")
+
+    old_rows = []
+    new_rows = []
+    for provider in range(num_providers):
+        providerID = "provider" + str(provider)
+        old_rows.append(["CREATE TABLE [" + providerID + "] (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT)"])
+
+        for item in range(num_items / num_providers):
+            tvdb_id = item % 500
+            season = item / 500 % 10 + 1
+            episode = item / 5000 + 1
+            name = "Show.%d.S%02dE%02d.%d.720p.HDTV.x264-GROUP" % (tvdb_id, season, episode, item)
+            url = "http://" + providerID + "/" + str(item)
+
+            old_rows.append(["INSERT INTO [" + providerID + "] (name, season, episodes, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?)",
+                             [name, season, "|" + str(episode) + "|", 0, tvdb_id, url, 1, 4]])
+            new_rows.append(["INSERT INTO provider_cache (provider, name, season, episode, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?,?)",
+                             [providerID, name, season, episode, 0, tvdb_id, url, 1, 4]])
+
+    myDB.mass_action(old_rows + new_rows)
+
+
+def lookup_old(lookups, num_providers):
+    myDB = db.DBConnection("cache.db")
+    for tvdb_id, season, episode in lookups:
+        for provider in range(num_providers):
+            myDB.select("SELECT * FROM [provider" + str(provider) + "] WHERE tvdbid = ? AND season = ? AND episodes LIKE ?",
+                        [tvdb_id, season, "%|" + str(episode) + "|%"])
+
+
+def lookup_new(lookups, num_providers):
+    myDB = db.DBConnection("cache.db")
+    for tvdb_id, season, episode in lookups:
+        for provider in range(num_providers):
+            myDB.select("SELECT * FROM provider_cache WHERE provider = ? AND tvdbid = ? AND season = ? AND episode = ?",
+                        ["provider" + str(provider), tvdb_id, season, episode])
+
+
+def benchmark_cache(num_items=100000, num_providers=10, num_lookups=200):
+    print "=================="
+    print "DB BENCHMARK - %d episode lookups in %d cached items across %d providers" % (num_lookups, num_items, num_providers)
+    print "=================="
+
+    random.seed(0)
+    lookups = [(random.randint(0, 499), random.randint(1, 10), random.randint(1, num_items / 5000 + 1)) for x in range(num_lookups)]
+
+    test.setUp_test_db()
+    seed_cache(num_items, num_providers)
+
+    start = time.time()
+    lookup_old(lookups, num_providers)
+    before = time.time() - start
+    print "%-10s %8.2fs" % ("per table", before)
+
+    start = time.time()
+    lookup_new(lookups, num_providers)
+    after = time.time() - start
+    print "%-10s %8.2fs" % ("indexed", after)
+
+    test.tearDown_test_db()
+
+    print "speedup:   %8.2fx" % (before / after)
+
+
+def load_shows_one_by_one():
+    myDB = db.DBConnection()
+    for sqlShow in myDB.select("SELECT * FROM tv_shows"):
+        sickbeard.showList.append(TVShow(int(sqlShow["tvdb_id"])))
+
+
+def count_queries(func):
+    """
+    Calls func and returns how long it took and how many queries it ran
+    """
+    queries = []
+    execute = db.DBConnection._execute
+
+    def counting_execute(self, query, args=None):
+        queries.append(query)
+        return execute(self, query, args)
+
+    db.DBConnection._execute = counting_execute
+    try:
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+    finally:
+        db.DBConnection._execute = execute
+
+    return elapsed, len(queries), len([x for x in queries if not db._isReadOnly(x)])
+
+
+def benchmark_startup(num_shows=800):
+    print "=================="
+    print "DB BENCHMARK - loading %d shows at startup" % num_shows
+    print "=================="
+
+    results = []
+    for (label, func) in (("per show", load_shows_one_by_one), ("bulk", tv.loadShowsFromDB)):
+        test.setUp_test_db()
+        seed_library(num_shows, 0)
+        sickbeard.showList = []
+
+        elapsed, queries, writes = count_queries(func)
+        assert len(sickbeard.showList) == num_shows
+
+        test.tearDown_test_db()
+        sickbeard.showList = []
+
+        print "%-10s %8.2fs  %6d queries  %6d writes" % (label, elapsed, queries, writes)
+        results.append(elapsed)
+
+    print "speedup:   %8.2fx" % (results[0] / results[1])
+
+
+def get_all_episodes_one_by_one(show):
+    """
+    TVShow.getAllEpisodes the way it used to be, loading each episode with its own query
+    """
+    myDB = db.DBConnection()
+
+    results = myDB.select("SELECT season, episode, (SELECT COUNT (*) FROM tv_episodes WHERE showid = tve.showid AND season = tve.season AND location != '' AND location = tve.location AND episode != tve.episode) AS share_location FROM tv_episodes tve WHERE showid = ? ORDER BY season ASC, episode ASC", [show.tvdbid])
+
+    def get_episode(season, episode):
+        ep = show.getEpisode(season, episode, noCreate=True)
+        if not ep:
+            ep = show.getEpisode(season, episode)
+            # test_lib stops TVEpisode loading itself from the db
+            ep.loadFromDB(season, episode)
+        return ep
+
+    ep_list = []
+    for cur_result in results:
+        cur_ep = get_episode(int(cur_result["season"]), int(cur_result["episode"]))
+        cur_ep.relatedEps = []
+        if cur_ep.location and cur_result["share_location"] > 0:
+            related_eps_result = myDB.select("SELECT * FROM tv_episodes WHERE showid = ? AND season = ? AND location = ? AND episode != ? ORDER BY episode ASC", [show.tvdbid, cur_ep.season, cur_ep.location, cur_ep.episode])
+            for cur_related_ep in related_eps_result:
+                related_ep = get_episode(int(cur_related_ep["season"]), int(cur_related_ep["episode"]))
+                if related_ep not in cur_ep.relatedEps:
+                    cur_ep.relatedEps.append(related_ep)
+        ep_list.append(cur_ep)
+
+    return ep_list
+
+
+def benchmark_episodes(num_episodes=2000):
+    print "=================="
+    print "DB BENCHMARK - getting all %d episodes of a show" % num_episodes
+    print "=================="
+
+    results = []
+    for (label, func) in (("per episode", get_all_episodes_one_by_one), ("bulk", lambda show: show.getAllEpisodes())):
+        test.setUp_test_db()
+        seed_library(1, 0)
+
+        myDB = db.DBConnection()
+        myDB.mass_action([["INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location, file_size, release_name) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                           [1, episode, u"Episode " + str(episode), episode / 100 + 1, episode % 100, u"", 1, 0, 0, 4, u"/show/episode" + str(episode / 2) + ".avi", 0, u""]]
+                          for episode in range(num_episodes)])
+
+        sickbeard.showList = []
+        tv.loadShowsFromDB()
+
+        elapsed, queries, writes = count_queries(lambda: func(sickbeard.showList[0]))
+
+        test.tearDown_test_db()
+        sickbeard.showList = []
+
+        print "%-11s %8.2fs  %6d queries" % (label, elapsed, queries)
+        results.append(elapsed)
+
+    print "speedup:   %8.2fx" % (results[0] / results[1])
+
+
+def daily_update(eps, rand):
+    # what the update gets from TVDB: the same values, with a new status for a few episodes
+    with EpisodeSaveBatch():
+        for cur_ep in eps:
+            with cur_ep.lock:
+                cur_ep.name = cur_ep.name
+                cur_ep.description = cur_ep.description
+                if rand.random() < 0.05:
+                    cur_ep.status = 3 if cur_ep.status != 3 else 5
+                if cur_ep.dirty:
+                    cur_ep.saveToDB()
+
+
+def benchmark_update(num_episodes=2000):
+    print "=================="
+    print "DB BENCHMARK - daily update of a show with %d episodes" % num_episodes
+    print "=================="
+
+    savedToDB = tv.TVEpisode._savedToDB
+    getDBRow = tv.TVEpisode._getDBRow
+
+    for label in ("every column", "changed"):
+        if label == "every column":
+            # the episodes stay dirty after they're saved and every save writes the whole row
+            tv.TVEpisode._savedToDB = lambda self, row: None
+            tv.TVEpisode._getDBRow = lambda self, forceSave=False: getDBRow(self, True)
+
+        test.setUp_test_db()
+        try:
+            seed_library(1, 0)
+
+            myDB = db.DBConnection()
+            myDB.mass_action([["INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location, file_size, release_name) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                               [1, episode, u"Episode " + str(episode), episode / 100 + 1, episode % 100, u"A description of the episode. " * 20, 1, 0, 0, 5, u"", 0, u""]]
+                              for episode in range(num_episodes)])
+
+            sickbeard.showList = []
+            tv.loadShowsFromDB()
+            show = sickbeard.showList[0]
+            eps = show.getAllEpisodes()
+            rand = random.Random(0)
+
+            # earlier in the day a search snatched some of them
+            for cur_ep in eps:
+                if rand.random() < 0.2:
+                    cur_ep.status = 2
+                    cur_ep.saveToDB()
+
+            written = []
+            execute = db.DBConnection._execute
+
+            def counting_execute(self, query, args=None):
+                if not db._isReadOnly(query):
+                    written.append(len(query) + sum([len(unicode(x)) for x in args or []]))
+                return execute(self, query, args)
+
+            db.DBConnection._execute = counting_execute
+            try:
+                start = time.time()
+                daily_update(eps, rand)
+                elapsed = time.time() - start
+            finally:
+                db.DBConnection._execute = execute
+        finally:
+            tv.TVEpisode._savedToDB = savedToDB
+            tv.TVEpisode._getDBRow = getDBRow
+            test.tearDown_test_db()
+            sickbeard.showList = []
+
+        print "%-13s %8.2fs  %6d writes  %8d bytes of SQL and values" % (label, elapsed, len(written), sum(written))
+
+
+if __name__ == '__main__':
+    benchmarks = {"pool": benchmark_pool,
+                  "batch": benchmark_batch,
+                  "cache": benchmark_cache,
+                  "startup": benchmark_startup,
+                  "episodes": benchmark_episodes,
+                  "update": benchmark_update}
+
+    if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+        print __doc__
+        sys.exit(1)
+
+    benchmarks[sys.argv[1]](*[int(x) for x in sys.argv[2:]])
@@ -17,9 +17,14 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+import sqlite3
+import threading
 import unittest
+
 import test_lib as test
 
+from sickbeard.databases import cache_db, mainDB
+
 
 class DBBasicTests(test.SickbeardTestDBCase):
 
@@ -31,10 +36,240 @@ class DBBasicTests(test.SickbeardTestDBCase):
         self.db.select("SELECT * FROM tv_episodes WHERE showid = ? AND location != ''", [0000])
 
 
+class DBUpsertTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(DBUpsertTests, self).setUp()
+        self.db = test.db.DBConnection()
+        self.native_upsert = test.db.NATIVE_UPSERT
+
+    def tearDown(self):
+        test.db.NATIVE_UPSERT = self.native_upsert
+        super(DBUpsertTests, self).tearDown()
+
+    def _upsert_episode(self, name):
+        self.db.upsert("tv_episodes", {"name": name, "status": 5}, {"showid": 1, "season": 1, "episode": 1})
+
+    def _check_upsert(self):
+        self._upsert_episode("first")
+        self._upsert_episode("second")
+
+        results = self.db.select("SELECT name FROM tv_episodes WHERE showid = 1")
+        self.assertEqual([x["name"] for x in results], ["second"])
+
+    def test_native_upsert(self):
+        if not test.db.NATIVE_UPSERT:
+            return
+        self.assertTrue(self.db._hasUniqueIndex("tv_episodes", ["episode", "showid", "season"]))
+        self._check_upsert()
+
+    def test_fallback_upsert(self):
+        test.db.NATIVE_UPSERT = False
+        self._check_upsert()
+
+    def test_upsert_without_unique_index(self):
+        cacheDB = test.TestCacheDBConnection("provider")
+        self.assertFalse(cacheDB._hasUniqueIndex("lastUpdate", ["provider"]))
+
+        cacheDB.upsert("lastUpdate", {"time": 1}, {"provider": "provider"})
+        cacheDB.upsert("lastUpdate", {"time": 2}, {"provider": "provider"})
+
+        results = cacheDB.select("SELECT time FROM lastUpdate")
+        self.assertEqual([x["time"] for x in results], [2])
+
+
+class DBEpisodeUniqueIndexTests(test.SickbeardTestDBCase):
+
+    def test_migration_removes_duplicates(self):
+        myDB = test.db.DBConnection()
+
+        # put the db back to v14
+        myDB.action("DROP INDEX idx_showid_season_episode")
+        myDB.action("UPDATE db_version SET db_version = 14")
+        test.db._unique_keys.clear()
+
+        for name in ("older", "newer"):
+            myDB.action("INSERT INTO tv_episodes (showid, season, episode, name) VALUES (?, ?, ?, ?)", [1, 1, 1, name])
+
+        mainDB.AddEpisodeUniqueIndex(myDB).execute()
+
+        self.assertEqual(myDB.checkDBVersion(), 15)
+        self.assertEqual([x["name"] for x in myDB.select("SELECT name FROM tv_episodes")], ["older"])
+        self.assertRaises(sqlite3.IntegrityError, myDB.action, "INSERT INTO tv_episodes (showid, season, episode) VALUES (1, 1, 1)")
+
+
+class DBProviderCacheTests(test.SickbeardTestDBCase):
+
+    def test_migration_splits_episode_lists(self):
+        myDB = test.db.DBConnection(test.TESTCACHEDBNAME)
+
+        # put back an old style provider table
+        myDB.action("DROP TABLE provider_cache")
+        myDB.action("CREATE TABLE [womble_s_index] (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT)")
+        myDB.action("INSERT INTO [womble_s_index] VALUES (?,?,?,?,?,?,?,?)", ["Show.S01E01E02", 1, "|1|2|", 0, 1, "http://a", 1, 4])
+        myDB.action("INSERT INTO [womble_s_index] VALUES (?,?,?,?,?,?,?,?)", ["Show.S01", 1, "", 0, 1, "http://b", 1, 4])
+
+        cache_db.AddProviderCache(myDB).execute()
+
+        self.assertFalse(myDB.select("SELECT name FROM sqlite_master WHERE name = ?", ["womble_s_index"]))
+        rows = myDB.select("SELECT provider, url, season, episode FROM provider_cache ORDER BY rowid")
+        self.assertEqual([(x["provider"], x["url"], x["episode"]) for x in rows],
+                         [("womble_s_index", "http://a", 1), ("womble_s_index", "http://a", 2), ("womble_s_index", "http://b", None)])
+
+
+class DBConnectionPoolTests(test.SickbeardTestDBCase):
+
+    def test_same_thread_reuses_connection(self):
+        self.assertTrue(test.db.DBConnection().connection is test.db.DBConnection().connection)
+
+    def test_files_get_separate_connections(self):
+        self.assertFalse(test.db.DBConnection().connection is test.db.DBConnection(test.TESTCACHEDBNAME).connection)
+
+    def test_threads_get_separate_connections(self):
+        connections = []
+
+        def get_connection():
+            connections.append(test.db.DBConnection().connection)
+
+        worker = threading.Thread(target=get_connection)
+        worker.start()
+        worker.join()
+
+        self.assertFalse(connections[0] is test.db.DBConnection().connection)
+
+    def test_wal_journal_mode(self):
+        self.assertEqual(test.db.DBConnection().select("PRAGMA journal_mode")[0][0], "wal")
+
+    def test_row_types(self):
+        dict_row = test.db.DBConnection(row_type="dict").select("SELECT 1 AS foo")[0]
+        self.assertEqual(dict_row, {"foo": 1})
+
+        # the dict row type of the shared connection must not leak into other DBConnections
+        self.assertEqual(test.db.DBConnection().select("SELECT 1 AS foo")[0]["foo"], 1)
+
+    def test_close_all_connections(self):
+        old_connection = test.db.DBConnection().connection
+        test.db.closeAllConnections()
+
+        new_db = test.db.DBConnection()
+        self.assertFalse(old_connection is new_db.connection)
+        new_db.select("SELECT * FROM tv_shows")
+
+    def test_close_all_connections_leaves_other_threads_alone(self):
+        opened = threading.Event()
+        closed = threading.Event()
+        results = []
+
+        def use_connection():
+            myDB = test.db.DBConnection()
+            myDB.select("SELECT * FROM tv_shows")
+            opened.set()
+            closed.wait(10)
+            try:
+                # still usable, the thread only gets a new one the next time it asks
+                results.append(myDB.select("SELECT COUNT(*) FROM tv_shows")[0][0])
+                results.append(test.db.DBConnection().connection is myDB.connection)
+            except Exception, e:
+                results.append(e)
+
+        worker = threading.Thread(target=use_connection)
+        worker.start()
+        opened.wait(10)
+        test.db.closeAllConnections()
+        closed.set()
+        worker.join(10)
+
+        self.assertEqual(results, [0, False])
+
+
+class DBConcurrencyTests(test.SickbeardTestDBCase):
+
+    def _run_in_thread(self, target):
+        worker = threading.Thread(target=target)
+        worker.daemon = True
+        worker.start()
+        return worker
+
+    def test_reader_not_blocked_by_writer(self):
+        myDB = test.db.DBConnection()
+
+        with myDB.write_lock:
+            reader = self._run_in_thread(lambda: test.db.DBConnection().select("SELECT * FROM tv_episodes"))
+            reader.join(5)
+            self.assertFalse(reader.isAlive())
+
+    def test_writers_serialized_per_file(self):
+        myDB = test.db.DBConnection()
+        test.TestCacheDBConnection("provider")
+
+        with myDB.write_lock:
+            cache_writer = self._run_in_thread(lambda: test.db.DBConnection(test.TESTCACHEDBNAME).action("INSERT INTO lastUpdate (provider, time) VALUES (?, ?)", ["provider", 1]))
+            cache_writer.join(5)
+            self.assertFalse(cache_writer.isAlive())
+
+            main_writer = self._run_in_thread(lambda: test.db.DBConnection().action("INSERT INTO info (last_backlog, last_tvdb) VALUES (?, ?)", [1, 1]))
+            main_writer.join(0.5)
+            self.assertTrue(main_writer.isAlive())
+
+        main_writer.join(5)
+        self.assertFalse(main_writer.isAlive())
+        self.assertEqual(len(myDB.select("SELECT * FROM info")), 1)
+
+    def test_stress_ui_search_and_show_queue(self):
+        iterations = 200
+        errors = []
+
+        test.TestCacheDBConnection("provider")
+
+        def collect_errors(func):
+            def wrapper():
+                try:
+                    func()
+                except Exception, e:
+                    errors.append(e)
+            return wrapper
+
+        @collect_errors
+        def web_ui():
+            myDB = test.db.DBConnection(row_type="dict")
+            for i in range(iterations):
+                myDB.select("SELECT * FROM tv_episodes WHERE showid = ? ORDER BY season, episode", [1])
+                myDB.select("SELECT * FROM tv_shows")
+
+        @collect_errors
+        def search():
+            cacheDB = test.db.DBConnection(test.TESTCACHEDBNAME)
+            myDB = test.db.DBConnection()
+            for i in range(iterations):
+                cacheDB.action("INSERT INTO provider_cache (provider, name, season, episode, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?,?)",
+                               ["provider", "Show.S01E%02d.720p.HDTV.x264-GROUP" % i, 1, i, 0, 1, "http://localhost/%d" % i, i, 8])
+                myDB.select("SELECT status FROM tv_episodes WHERE showid = ? AND season = ? AND episode = ?", [1, 1, i])
+
+        @collect_errors
+        def show_queue():
+            myDB = test.db.DBConnection()
+            for i in range(iterations):
+                myDB.upsert("tv_episodes", {"name": u"Episode", "status": 5}, {"showid": 1, "season": 1, "episode": i})
+
+        workers = [self._run_in_thread(web_ui) for i in range(3)] + [self._run_in_thread(search), self._run_in_thread(show_queue)]
+        for worker in workers:
+            worker.join(60)
+            self.assertFalse(worker.isAlive())
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(test.db.DBConnection().select("SELECT * FROM tv_episodes WHERE showid = 1")), iterations)
+        self.assertEqual(len(test.db.DBConnection(test.TESTCACHEDBNAME).select("SELECT * FROM provider_cache")), iterations)
+
+
 if __name__ == '__main__':
     print "=================="
     print "STARTING - DB TESTS"
     print "=================="
     print "######################################################################"
     suite = unittest.TestLoader().loadTestsFromTestCase(DBBasicTests)
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(DBUpsertTests))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(DBEpisodeUniqueIndexTests))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(DBProviderCacheTests))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(DBConnectionPoolTests))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(DBConcurrencyTests))
     unittest.TextTestRunner(verbosity=2).run(suite)
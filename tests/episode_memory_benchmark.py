@@ -0,0 +1,128 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Episode object memory benchmark against a synthetic library.
+
+Loads every episode of every show the way a long running Sick Beard ends up touching them all and
+reports how much the resident memory grew and how many episode objects the shows still hold. Each
+way is run in its own process:
+
+old:   an episode class with a __dict__ and a lock made for every episode, no limit on the episodes
+       each show keeps (the old behaviour)
+slots: the slotted TVEpisode with locks made on demand, no limit on the episodes each show keeps
+lru:   the slotted TVEpisode with EPISODE_CACHE_SIZE episodes kept per show
+
+Usage: python episode_memory_benchmark.py [number of shows] [episodes per show] [episode cache size]
+"""
+
+import gc
+import resource
+import subprocess
+import sys
+import threading
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import db
+from sickbeard import tv
+from sickbeard.tv import TVShow
+
+DESCRIPTION = u"A description of the episode, about as long as the ones that come from theTVDB. " * 4
+
+
+def old_episode_class():
+    """
+    Returns TVEpisode the way it used to be: with a __dict__ and a lock made for every episode
+    """
+
+    attrs = dict((k, v) for (k, v) in tv.TVEpisode.__dict__.items() if k not in tv.TVEpisode.__slots__ + ('__slots__',))
+    new_init = tv.TVEpisode.__init__.im_func
+
+    def __init__(self, *args, **kwargs):
+        new_init(self, *args, **kwargs)
+        self._lock = threading.Lock()
+    attrs['__init__'] = __init__
+
+    return type('OldTVEpisode', (object,), attrs)
+
+
+def seed_library(num_shows, num_episodes):
+    myDB = db.DBConnection()
+
+    rows = []
+    for tvdb_id in range(1, num_shows + 1):
+        rows.append(["INSERT INTO tv_shows (tvdb_id, show_name, location, quality, flatten_folders, paused, tvr_id, lang, last_update_tvdb) VALUES (?,?,?,?,?,?,?,?,?)",
+                     [tvdb_id, u"Show " + str(tvdb_id), test.SHOWDIR, 4, 0, 0, 0, "en", 1]])
+        for episode in range(1, num_episodes + 1):
+            rows.append(["INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location, file_size, release_name) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                         [tvdb_id, tvdb_id * 10000 + episode, u"Episode " + str(episode), episode / 25 + 1, episode % 25 + 1, DESCRIPTION, 1, 0, 0, 5, u"", 0, u""]])
+
+    myDB.mass_action(rows)
+
+
+def max_rss():
+    # kB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(mode, num_shows, num_episodes, cache_size):
+    if mode == 'old':
+        tv.TVEpisode = old_episode_class()
+    sickbeard.EPISODE_CACHE_SIZE = cache_size if mode == 'lru' else 0
+
+    test.setUp_test_db()
+    try:
+        seed_library(num_shows, num_episodes)
+
+        tv.loadShowsFromDB()
+        gc.collect()
+        before = max_rss()
+
+        for cur_show in sickbeard.showList:
+            for cur_ep in cur_show.getAllEpisodes():
+                cur_ep.lock
+
+        gc.collect()
+        after = max_rss()
+        cached = sum(len(x) for cur_show in sickbeard.showList for x in cur_show.episodes.values())
+    finally:
+        test.tearDown_test_db()
+
+    print "%-6s %10d kB  %8.0f bytes per episode  %8d episodes kept" % (mode, after - before, (after - before) * 1024.0 / (num_shows * num_episodes), cached)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--run':
+        run(sys.argv[2], *[int(x) for x in sys.argv[3:]])
+        sys.exit(0)
+
+    if [x for x in sys.argv[1:] if not x.isdigit()]:
+        print __doc__
+        sys.exit(1)
+
+    args = [int(x) for x in sys.argv[1:]]
+    args += [100, 500, 100][len(args):]
+
+    print "=================="
+    print "EPISODE MEMORY BENCHMARK - %d shows, %d episodes each, %d cached per show" % tuple(args)
+    print "=================="
+
+    for cur_mode in ('old', 'slots', 'lru'):
+        subprocess.call([sys.executable, __file__, '--run', cur_mode] + [str(x) for x in args])
@@ -0,0 +1,139 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+filterBadReleases benchmark with a large RSS feed.
+
+Every item of a synthetic feed (some of them with ignore words or bad release words in them) is
+parsed and then filtered, the way the RSS cache handles a feed. Compares building a regex for every
+filter word and parsing the name again with the single compiled filter regex and the parse result
+being passed in. Every result is checked to be the same both ways.
+
+Usage: python filter_benchmark.py [number of feed items]
+"""
+
+import random
+import re
+import sys
+import time
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import show_name_helpers
+from sickbeard.name_parser.parser import NameParser, InvalidNameException, name_parser_cache
+
+from name_parser_benchmark import make_name
+
+BAD_WORDS = ["German", "FRENCH", "Core2HD", "DUTCH", "swedish", "480p", "SUBPACK", "NLSubs", "SAMPLE", "DVDExtras", "DirFix", "Dubbed", "SWESUB"]
+
+
+def make_feed(num_items, seed=0):
+    rand = random.Random(seed)
+    feed = []
+    for i in range(num_items):
+        name = make_name(rand)
+        if rand.random() < 0.2:
+            name = name.replace('.', '.' + rand.choice(BAD_WORDS) + '.', 1)
+        feed.append(name)
+    return feed
+
+
+def old_filterBadReleases(name):
+    """
+    filterBadReleases the way it used to be
+    """
+    try:
+        fp = NameParser()
+        parse_result = fp.parse(name)
+    except InvalidNameException:
+        return False
+
+    check_string = ''
+    if parse_result.extra_info:
+        check_string = parse_result.extra_info
+    if parse_result.release_group:
+        if check_string:
+            check_string = check_string + '-' + parse_result.release_group
+        else:
+            check_string = parse_result.release_group
+
+    if not check_string:
+        return True
+
+    for x in show_name_helpers.resultFilters + sickbeard.IGNORE_WORDS.split(','):
+        if re.search('(^|[\W_])' + x.strip() + '($|[\W_])', check_string, re.I):
+            return False
+
+    return True
+
+
+def handle_feed_old(feed):
+    results = []
+    for name in feed:
+        try:
+            NameParser().parse(name)
+        except InvalidNameException:
+            pass
+        results.append(old_filterBadReleases(name))
+    return results
+
+
+def handle_feed_new(feed):
+    results = []
+    for name in feed:
+        try:
+            parse_result = NameParser().parse(name)
+        except InvalidNameException:
+            results.append(show_name_helpers.filterBadReleases(name))
+        else:
+            results.append(show_name_helpers.filterBadReleases(name, parse_result))
+    return results
+
+
+def benchmark(label, func, feed):
+    name_parser_cache.clear()
+
+    start = time.time()
+    results = func(feed)
+    elapsed = time.time() - start
+
+    print "%-9s %8.2fs  %10.0f items/s" % (label, elapsed, len(feed) / elapsed)
+    return results, elapsed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print __doc__
+        sys.exit(1)
+
+    num_items = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    feed = make_feed(num_items)
+
+    print "=================="
+    print "FILTER BENCHMARK - %d feed items" % num_items
+    print "=================="
+
+    before, before_time = benchmark("per word", handle_feed_old, feed)
+    after, after_time = benchmark("compiled", handle_feed_new, feed)
+
+    mismatches = [name for (name, old, new) in zip(feed, before, after) if old != new]
+    for name in mismatches[:10]:
+        print "MISMATCH:", name
+
+    print "speedup:  %7.2fx, %d mismatched results, %d filtered out" % (before_time / after_time, len(mismatches), after.count(False))
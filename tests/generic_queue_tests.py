@@ -0,0 +1,223 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import unittest
+
+import test_lib as test
+
+from sickbeard import generic_queue
+from sickbeard.generic_queue import QueuePriorities
+
+
+class BlockingQueueItem(generic_queue.QueueItem):
+    """
+    Runs until release() is called
+    """
+
+    def __init__(self, name, lock_key=None, priority=QueuePriorities.NORMAL):
+        generic_queue.QueueItem.__init__(self, name)
+        self.lock_key = lock_key
+        self.priority = priority
+        self.released = threading.Event()
+
+    def get_lock_key(self):
+        return self.lock_key
+
+    def get_queue_key(self):
+        return ("blocking", self.name)
+
+    def execute(self):
+        generic_queue.QueueItem.execute(self)
+        self.released.wait(10)
+        self.finish()
+
+    def release(self):
+        self.released.set()
+        self.thread.join(10)
+
+
+class SlowKeyQueueItem(BlockingQueueItem):
+    """
+    Stops in get_lock_key() while slow is set, until go is set
+    """
+
+    def __init__(self, name, lock_key=None, priority=QueuePriorities.NORMAL):
+        BlockingQueueItem.__init__(self, name, lock_key, priority)
+        self.slow = False
+        self.inside = threading.Event()
+        self.go = threading.Event()
+
+    def get_lock_key(self):
+        if self.slow:
+            self.inside.set()
+            self.go.wait(10)
+        return self.lock_key
+
+
+class GenericQueueTests(unittest.TestCase):
+
+    def tearDown(self):
+        for queueItem in self.queue.currentItems + self.queue.queue:
+            queueItem.released.set()
+
+    def _makeQueue(self, max_workers, *items):
+        self.queue = generic_queue.GenericQueue(max_workers)
+        for queueItem in items:
+            self.queue.add_item(queueItem)
+        self.queue.run()
+        return self.queue
+
+    def _running(self):
+        return [x.name for x in self.queue.currentItems]
+
+    def test_single_worker_runs_one_at_a_time(self):
+        a, b = BlockingQueueItem("a", 1), BlockingQueueItem("b", 2)
+        self._makeQueue(1, a, b)
+        self.assertEqual(self._running(), ["a"])
+
+        a.release()
+        self.queue.run()
+        self.assertEqual(self._running(), ["b"])
+        self.assertFalse(a.inProgress)
+
+    def test_different_keys_run_together(self):
+        self._makeQueue(2, BlockingQueueItem("a", 1), BlockingQueueItem("b", 2), BlockingQueueItem("c", 3))
+        self.assertEqual(self._running(), ["a", "b"])
+        self.assertEqual([x.name for x in self.queue.queue], ["c"])
+
+    def test_same_key_never_runs_together(self):
+        a = BlockingQueueItem("a", 1)
+        self._makeQueue(3, a, BlockingQueueItem("a again", 1), BlockingQueueItem("b", 2))
+        self.assertEqual(self._running(), ["a", "b"])
+
+        a.release()
+        self.queue.run()
+        self.assertEqual(self._running(), ["b", "a again"])
+
+    def test_priority_order(self):
+        self._makeQueue(2, BlockingQueueItem("low", 1, QueuePriorities.LOW),
+                           BlockingQueueItem("normal", 2),
+                           BlockingQueueItem("high", 3, QueuePriorities.HIGH))
+        self.assertEqual(self._running(), ["high", "normal"])
+
+    def test_insertion_order_within_priority(self):
+        self._makeQueue(1, *[BlockingQueueItem(x, x) for x in "abcde"])
+        self.assertEqual(self._running(), ["a"])
+        self.assertEqual([x.name for x in self.queue.sorted_queue()], ["b", "c", "d", "e"])
+
+    def test_queue_keys(self):
+        a = BlockingQueueItem("a", 1)
+        self._makeQueue(1, a, BlockingQueueItem("b", 2))
+
+        # a is running so it's not queued anymore
+        self.assertFalse(self.queue.is_queued(("blocking", "a")))
+        self.assertTrue(self.queue.is_queued(("blocking", "b")))
+
+        a.release()
+        self.queue.run()
+        self.assertFalse(self.queue.is_queued(("blocking", "b")))
+
+    def test_keyless_item_runs_alone(self):
+        a = BlockingQueueItem("a", 1)
+        rss = BlockingQueueItem("rss")
+        self._makeQueue(3, a, rss, BlockingQueueItem("b", 2))
+
+        # b has to wait behind rss which has to wait for a
+        self.assertEqual(self._running(), ["a"])
+
+        a.release()
+        self.queue.run()
+        self.assertEqual(self._running(), ["rss"])
+
+        rss.release()
+        self.queue.run()
+        self.assertEqual(self._running(), ["b"])
+
+    def test_min_priority(self):
+        self._makeQueue(2, BlockingQueueItem("low", 1, QueuePriorities.LOW))
+        self.queue.run()
+
+        self.queue.min_priority = QueuePriorities.HIGH
+        self.queue.add_item(BlockingQueueItem("normal", 2))
+        self.queue.add_item(BlockingQueueItem("high", 3, QueuePriorities.HIGH))
+        self.queue.run()
+
+        self.assertEqual(self._running(), ["low", "high"])
+
+    def test_queue_is_complete_during_run(self):
+        self._makeQueue(2, BlockingQueueItem("a", 1))
+        slow = SlowKeyQueueItem("slow", 2)
+        self.queue.add_item(BlockingQueueItem("a again", 1))
+        self.queue.add_item(slow)
+
+        # run() has taken "a again" off the heap to get past it when it gets to the slow item
+        slow.slow = True
+        runner = threading.Thread(target=self.queue.run)
+        runner.start()
+        slow.inside.wait(10)
+
+        seen = []
+        reader = threading.Thread(target=lambda: seen.extend([x.name for x in self.queue.queue]))
+        reader.start()
+        reader.join(0.2)
+
+        slow.slow = False
+        slow.go.set()
+        runner.join(10)
+        reader.join(10)
+
+        self.assertEqual(seen, ["a again"])
+        self.assertEqual(self._running(), ["a", "slow"])
+
+    def _assertRunDoesntLook(self):
+        def get_lock_key():
+            self.fail("run() looked at a queued item")
+        for queueItem in self.queue.queue:
+            queueItem.get_lock_key = get_lock_key
+        try:
+            self.queue.run()
+        finally:
+            for queueItem in self.queue.queue:
+                del queueItem.get_lock_key
+
+    def test_items_waiting_on_a_key_are_not_scanned(self):
+        self._makeQueue(2, BlockingQueueItem("a", 1), *[BlockingQueueItem("a" + str(x), 1) for x in range(50)])
+        self.assertEqual(self._running(), ["a"])
+
+        # everything queued is waiting on a so there's nothing to look for
+        self._assertRunDoesntLook()
+        self.assertEqual(self._running(), ["a"])
+        self.assertEqual(len(self.queue.queue), 50)
+
+    def test_items_waiting_on_keyless_item_are_not_scanned(self):
+        self._makeQueue(2, BlockingQueueItem("rss"), *[BlockingQueueItem(str(x), x) for x in range(50)])
+        self.assertEqual(self._running(), ["rss"])
+
+        self._assertRunDoesntLook()
+        self.assertEqual(self._running(), ["rss"])
+        self.assertEqual(len(self.queue.queue), 50)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - GENERIC QUEUE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(GenericQueueTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,164 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Episode metadata file benchmark against a synthetic show folder.
+
+Creates a show folder with a season folder per season and a file for each episode, some of them with
+an nfo and a thumbnail, and counts the stat and listdir calls for creating every episode and for
+getting hasnfo/hastbn of every episode with all the metadata providers turned on. It's done once
+checking for every file with its own stat when the episode is created (the old behaviour) and once
+with the lazy checks and the directory listing cache. Every result is checked to be the same both ways.
+
+Usage: python metafiles_benchmark.py [number of seasons] [episodes per season]
+"""
+
+import os
+import shutil
+import sys
+import time
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import helpers, metadata
+from sickbeard import encodingKludge as ek
+from sickbeard.tv import TVEpisode, TVShow
+
+BENCHDIR = os.path.join(test.TESTDIR, 'metafiles benchmark')
+
+fs_calls = {'stat': 0, 'listdir': 0}
+
+
+def _counted(name, func):
+    def wrapper(path, *args, **kwargs):
+        # the logger looks at its own file for every line it writes, that's the same either way
+        if not path.startswith(sickbeard.LOG_DIR):
+            fs_calls[name] += 1
+        return func(path, *args, **kwargs)
+    return wrapper
+
+
+class NoDirListingCache:
+    """
+    Stands in for helpers.dirListingCache to check every file with a stat the way it used to be done
+    """
+
+    def isFile(self, path):
+        return ek.ek(os.path.isfile, path)
+
+    def batch(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def make_files(num_seasons, num_episodes):
+    files = []
+    for season in range(1, num_seasons + 1):
+        season_dir = os.path.join(BENCHDIR, 'Season %02d' % season)
+        os.makedirs(os.path.join(season_dir, 'metadata'))
+
+        for episode in range(1, num_episodes + 1):
+            file_path = os.path.join(season_dir, 'Show Name - %dx%02d - Episode Name.mkv' % (season, episode))
+            open(file_path, 'w').close()
+
+            if episode % 2:
+                open(helpers.replaceExtension(file_path, 'nfo'), 'w').close()
+            if episode % 3 == 0:
+                open(helpers.replaceExtension(file_path, 'tbn'), 'w').close()
+
+            files.append((season, episode, file_path))
+
+    # make the directory listings old enough to be trusted
+    for cur_dir, dir_names, file_names in os.walk(BENCHDIR):
+        os.utime(cur_dir, (time.time() - 60, time.time() - 60))
+
+    return files
+
+
+def run(label, show, files, eager):
+    fs_calls.update(stat=0, listdir=0)
+    start = time.time()
+
+    episodes = []
+    for (season, episode, file_path) in files:
+        cur_ep = TVEpisode(show, season, episode, file_path)
+        if eager:
+            cur_ep.checkForMetaFiles()
+        episodes.append(cur_ep)
+
+    created = dict(fs_calls)
+
+    results = [(x.hasnfo, x.hastbn) for x in episodes]
+    elapsed = time.time() - start
+
+    print "%-9s %8.2fs  %8d stats %6d listdirs creating, %8d stats %6d listdirs in all" % (label, elapsed, created['stat'], created['listdir'], fs_calls['stat'], fs_calls['listdir'])
+    return results, elapsed
+
+
+def benchmark(num_seasons=10, num_episodes=25):
+    if os.path.exists(BENCHDIR):
+        shutil.rmtree(BENCHDIR)
+    files = make_files(num_seasons, num_episodes)
+
+    sickbeard.metadata_provider_dict = {}
+    for cur_id in metadata.available_generators():
+        cur_provider = metadata._getMetadataModule(cur_id).metadata_class(episode_metadata=True, episode_thumbnails=True)
+        sickbeard.metadata_provider_dict[cur_provider.name] = cur_provider
+
+    print "=================="
+    print "METAFILES BENCHMARK - %d episodes, %d providers" % (len(files), len(sickbeard.metadata_provider_dict))
+    print "=================="
+
+    old_stat, old_listdir = os.stat, os.listdir
+    test.setUp_test_db()
+    try:
+        show = TVShow(1)
+        os.stat, os.listdir = _counted('stat', os.stat), _counted('listdir', os.listdir)
+
+        cache = helpers.dirListingCache
+        helpers.dirListingCache = NoDirListingCache()
+        try:
+            before, before_time = run("stat", show, files, True)
+        finally:
+            helpers.dirListingCache = cache
+
+        after, after_time = run("cached", show, files, False)
+    finally:
+        os.stat, os.listdir = old_stat, old_listdir
+        test.tearDown_test_db()
+        shutil.rmtree(BENCHDIR)
+
+    mismatches = [x for (x, old, new) in zip(files, before, after) if old != new]
+    for cur_file in mismatches[:10]:
+        print "MISMATCH:", cur_file[2]
+
+    print "speedup:  %7.2fx, %d mismatched results" % (before_time / after_time, len(mismatches))
+
+
+if __name__ == '__main__':
+    if [x for x in sys.argv[1:] if not x.isdigit()]:
+        print __doc__
+        sys.exit(1)
+
+    benchmark(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,110 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import test_lib as test
+
+from sickbeard import name_cache
+
+
+class NameCacheTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(NameCacheTests, self).setUp()
+        self._ttl = name_cache.NEGATIVE_TTL
+
+    def tearDown(self):
+        name_cache.NEGATIVE_TTL = self._ttl
+        name_cache.resetCache()
+        super(NameCacheTests, self).tearDown()
+
+    def _rows(self):
+        myDB = test.db.DBConnection(test.TESTCACHEDBNAME)
+        return [(x["name"], x["tvdb_id"]) for x in myDB.select("SELECT name, tvdb_id FROM scene_names ORDER BY name")]
+
+    def test_lookup(self):
+        name_cache.addNameToCache('Show Name', 1)
+
+        self.assertEqual(name_cache.retrieveNameFromCache('Show.Name'), 1)
+        self.assertEqual(name_cache.retrieveNameFromCache('Other Show'), None)
+
+        stats = name_cache.getStats()
+        self.assertEqual((stats['size'], stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 1, 0.5))
+
+    def test_written_behind(self):
+        name_cache.addNameToCache('Show Name', 1)
+        self.assertEqual(self._rows(), [])
+
+        name_cache.flush()
+        self.assertEqual(self._rows(), [('Show.Name', 1)])
+
+        # it comes back from the db
+        name_cache.resetCache()
+        self.assertEqual(name_cache.retrieveNameFromCache('Show Name'), 1)
+
+    def test_one_row_per_name(self):
+        name_cache.addNameToCache('Show Name', 0)
+        name_cache.addNameToCache('Show Name', 1)
+        name_cache.flush()
+
+        self.assertEqual(self._rows(), [('Show.Name', 1)])
+        self.assertEqual(name_cache.retrieveNameFromCache('Show Name'), 1)
+
+    def test_unknown_names_expire(self):
+        name_cache.addNameToCache('Show Name', 1)
+        name_cache.addNameToCache('Unknown Name', 0)
+        self.assertEqual(name_cache.retrieveNameFromCache('Unknown Name'), 0)
+
+        name_cache.NEGATIVE_TTL = -1
+        name_cache.addNameToCache('Unknown Name', 0)
+        self.assertEqual(name_cache.retrieveNameFromCache('Unknown Name'), None)
+        self.assertEqual(name_cache.retrieveNameFromCache('Show Name'), 1)
+
+        name_cache.flush()
+        self.assertEqual(self._rows(), [('Show.Name', 1)])
+
+    def test_clear_some_names(self):
+        name_cache.addNameToCache('Show Name', 1)
+        name_cache.addNameToCache('Unknown Name', 0)
+        name_cache.addNameToCache('Other Name', 0)
+
+        name_cache.clearCache(['Unknown Name', 'Show Name'])
+
+        self.assertEqual(name_cache.retrieveNameFromCache('Show Name'), 1)
+        self.assertEqual(name_cache.retrieveNameFromCache('Unknown Name'), None)
+        self.assertEqual(name_cache.retrieveNameFromCache('Other Name'), 0)
+        self.assertEqual(self._rows(), [('Other.Name', 0), ('Show.Name', 1)])
+
+    def test_clear_all_unknown_names(self):
+        name_cache.addNameToCache('Show Name', 1)
+        name_cache.addNameToCache('Unknown Name', 0)
+
+        name_cache.clearCache()
+
+        self.assertEqual(name_cache.retrieveNameFromCache('Unknown Name'), None)
+        self.assertEqual(self._rows(), [('Show.Name', 1)])
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - NAME CACHE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(NameCacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
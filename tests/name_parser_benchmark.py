@@ -0,0 +1,139 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Name parser benchmark against a synthetic set of scene release names.
+
+Parses every name with a new NameParser each time (the way the rest of Sick Beard uses it), once
+compiling the regexes per parser and trying all of them in turn (the old behaviour) and once with
+the shared regexes and their hints. Every result is checked to be the same both ways.
+
+Usage: python name_parser_benchmark.py [number of names]
+"""
+
+import random
+import re
+import sys
+import time
+
+import test_lib as test
+
+from sickbeard.name_parser import parser, regexes
+from sickbeard.name_parser.parser import InvalidNameException
+
+SHOWS = ["Show.Name", "The.Show", "Mr.Show.Name", "Show.Name.2010", "Show.Name.US", "The.Daily.Show",
+         "Show-Name", "Show_Name", "Show Name -", "Some.Longer.Show.Name.With.Words", "Show.1.0.Name"]
+QUALITIES = ["HDTV.XviD", "720p.HDTV.x264", "1080i.HDTV.DD5.1.MPEG2", "720p.WEB-DL.DD5.1.H.264", "PDTV.XviD",
+             "DSR.XviD", "1080p.BluRay.x264", "DVDRip.XviD", "HDTV.x264", "480p.HDTV.x264", "Proper.HDTV.XviD"]
+GROUPS = ["LOL", "FQM", "DIMENSION", "2HD", "CtrlHD", "ORENJi", "NoTV", "ASAP", "KILLERS", "Sys"]
+
+
+def make_name(rand):
+    show = rand.choice(SHOWS)
+    quality = rand.choice(QUALITIES)
+    group = rand.choice(GROUPS)
+    season = rand.randint(1, 20)
+    episode = rand.randint(1, 24)
+
+    kind = rand.random()
+    if kind < 0.55:
+        return "%s.S%02dE%02d.%s-%s" % (show, season, episode, quality, group)
+    elif kind < 0.62:
+        return "%s.S%02dE%02dE%02d.%s-%s" % (show, season, episode, episode + 1, quality, group)
+    elif kind < 0.65:
+        return "%s.S%02dE%02d.S%02dE%02d.%s-%s" % (show, season, episode, season, episode + 1, quality, group)
+    elif kind < 0.72:
+        return "%s.%dx%02d.%s-%s" % (show, season, episode, quality, group)
+    elif kind < 0.80:
+        return "%s.%d.%02d.%02d.%s-%s" % (show, rand.randint(2005, 2012), rand.randint(1, 12), rand.randint(1, 28), quality, group)
+    elif kind < 0.85:
+        return "%s.S%02d.%s-%s" % (show, season, quality, group)
+    elif kind < 0.88:
+        return "%s.%d%02d.%s-%s" % (show, season, episode, quality, group)
+    elif kind < 0.90:
+        return "%s.Part.%d.%s-%s" % (show, episode, quality, group)
+    elif kind < 0.93:
+        return "%s - %dx%02d - Episode Name" % (show, season, episode)
+    elif kind < 0.95:
+        return "%s - %02d - Episode Name" % (show, episode)
+    else:
+        # nothing that looks like an episode, these go through every regex
+        return "%s.%s-%s" % (show, quality, group)
+
+
+def make_names(num_names, seed=0):
+    rand = random.Random(seed)
+    return [make_name(rand) for x in range(num_names)]
+
+
+class UnhintedNameParser(parser.NameParser):
+    """
+    NameParser the way it used to be: compiles every regex when it's created and tries them all in turn
+    """
+
+    def __init__(self, file_name=True):
+        parser.NameParser.__init__(self, file_name)
+        self.compiled_regexes = [(name, re.compile(pattern, re.VERBOSE | re.IGNORECASE), None) for (name, pattern) in regexes.ep_regexes]
+
+
+def result_tuple(result):
+    if not result:
+        return None
+    return (result.series_name, result.season_number, result.episode_numbers, result.extra_info,
+            result.release_group, result.air_date, result.which_regex)
+
+
+def parse_all(parser_class, names):
+    results = []
+    for name in names:
+        try:
+            results.append(result_tuple(parser_class()._parse_string(name)))
+        except InvalidNameException, e:
+            results.append(str(e))
+    return results
+
+
+def benchmark(label, parser_class, names):
+    start = time.time()
+    results = parse_all(parser_class, names)
+    elapsed = time.time() - start
+
+    print "%-9s %8.2fs  %10.0f names/s" % (label, elapsed, len(names) / elapsed)
+    return results, elapsed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print __doc__
+        sys.exit(1)
+
+    num_names = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    names = make_names(num_names)
+
+    print "=================="
+    print "NAME PARSER BENCHMARK - %d names" % num_names
+    print "=================="
+
+    before, before_time = benchmark("unhinted", UnhintedNameParser, names)
+    after, after_time = benchmark("hinted", parser.NameParser, names)
+
+    mismatches = [name for (name, old, new) in zip(names, before, after) if old != new]
+    for name in mismatches[:10]:
+        print "MISMATCH:", name
+
+    print "speedup:  %7.2fx, %d mismatched results" % (before_time / after_time, len(mismatches))
@@ -214,6 +214,80 @@ class ComboTests(unittest.TestCase):
             # paths when test is run on Windows.
             self._test_combo(os.path.normpath(name), result, which_regexes)
 
+class HintTests(unittest.TestCase):
+
+    def test_hints_never_skip_a_match(self):
+        names = failure_cases + [x[0] for x in combination_test_cases]
+        for section in simple_test_cases:
+            names += simple_test_cases[section].keys()
+
+        for name in names:
+            for (cur_regex_name, cur_regex, cur_hint) in parser.compiled_regexes:
+                if cur_hint and cur_regex.match(name):
+                    self.assertTrue(cur_hint.search(name), cur_regex_name + ' hint skips ' + name)
+
+class CacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self._cache_size = sickbeard.NAME_PARSER_CACHE_SIZE
+        sickbeard.NAME_PARSER_CACHE_SIZE = 2
+        parser.name_parser_cache.clear()
+
+    def tearDown(self):
+        sickbeard.NAME_PARSER_CACHE_SIZE = self._cache_size
+        parser.name_parser_cache.clear()
+
+    def test_hits_and_misses(self):
+        np = parser.NameParser(True)
+        first = np.parse('Show.Name.S01E02.HDTV.XviD-RLSGROUP')
+        self.assertTrue(np.parse('Show.Name.S01E02.HDTV.XviD-RLSGROUP') is first)
+
+        stats = parser.name_parser_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_least_recently_used_is_evicted(self):
+        np = parser.NameParser(True)
+        a = np.parse('Show.Name.S01E01.HDTV.XviD-RLSGROUP')
+        np.parse('Show.Name.S01E02.HDTV.XviD-RLSGROUP')
+        np.parse('Show.Name.S01E01.HDTV.XviD-RLSGROUP')
+        np.parse('Show.Name.S01E03.HDTV.XviD-RLSGROUP')
+
+        # E02 was the least recently used so E01 is still cached
+        self.assertTrue(np.parse('Show.Name.S01E01.HDTV.XviD-RLSGROUP') is a)
+        self.assertEqual(parser.name_parser_cache.stats()['evictions'], 1)
+        self.assertEqual(parser.name_parser_cache.stats()['size'], 2)
+
+    def test_file_name_mode_is_part_of_the_key(self):
+        name = 'Show.Name.S01E02.HDTV.XviD-RLSGROUP.avi'
+        self.assertEqual(parser.NameParser(True).parse(name).release_group, 'RLSGROUP')
+        self.assertEqual(parser.NameParser(False).parse(name).release_group, 'RLSGROUP.avi')
+
+class ParseManyTests(unittest.TestCase):
+
+    names = ['Show.Name.S01E02.HDTV.XviD-RLSGROUP', 'not a name', 'Show.Name.S01E03.HDTV.XviD-RLSGROUP',
+             'Show.Name.S01E02.HDTV.XviD-RLSGROUP', u'Show.Name.2010.11.23.WEB-DL']
+
+    def setUp(self):
+        parser.name_parser_cache.clear()
+
+    def tearDown(self):
+        parser.name_parser_cache.clear()
+
+    def _check_results(self, results):
+        self.assertEqual(len(results), len(self.names))
+        self.assertTrue(isinstance(results[1], parser.InvalidNameException))
+        self.assertEqual([x.episode_numbers for x in results[0::2]], [[2], [3], []])
+        self.assertEqual(results[4].air_date, datetime.date(2010, 11, 23))
+        self.assertEqual(results[0], results[3])
+
+    def test_parse_many(self):
+        results = parser.NameParser().parse_many(self.names)
+        self._check_results(results)
+
+        # the duplicate was only parsed once
+        self.assertTrue(results[0] is results[3])
+        self.assertEqual(parser.name_parser_cache.stats()['misses'], 4)
+
 class BasicTests(unittest.TestCase):
 
     def _test_names(self, np, section, transform=None, verbose=False):
@@ -349,3 +423,12 @@ if __name__ == '__main__':
 
     suite = unittest.TestLoader().loadTestsFromTestCase(FailureCaseTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(HintTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(CacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(ParseManyTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
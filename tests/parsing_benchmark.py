@@ -0,0 +1,225 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Release name benchmark and golden corpus check.
+
+Runs NameParser.parse, Quality.nameQuality, show_name_helpers.filterBadReleases and
+show_name_helpers.isGoodResult over every name in a corpus and reports the throughput and the
+p50/p99 latency of each, along with how many names each name parser regex matched.
+
+The results of each one are hashed into a digest. When a baseline is stored the numbers are
+compared against it, and a digest that doesn't match means something now gives different results
+than it did when the baseline was saved.
+
+The corpus is either a file with one release name per line or the synthetic names from
+name_parser_benchmark.py.
+
+Usage: python parsing_benchmark.py [--save] [--corpus file] [number of names]
+
+--save      store the results as the new baseline
+--corpus    read the release names from a file instead of generating them
+"""
+
+import hashlib
+import os.path
+import sys
+import time
+
+try:
+    import json
+except ImportError:
+    from lib import simplejson as json
+
+import test_lib as test
+
+from sickbeard import show_name_helpers
+from sickbeard.common import Quality
+from sickbeard.name_parser.parser import NameParser, InvalidNameException, name_parser_cache
+
+from name_parser_benchmark import make_names, result_tuple, SHOWS
+
+BASELINE_FILE = os.path.join(test.TESTDIR, 'parsing_benchmark_baseline.json')
+
+
+class BenchShow:
+
+    def __init__(self, tvdbid, name):
+        self.tvdbid = tvdbid
+        self.name = name
+        self.tvrname = None
+        self.startyear = 0
+
+
+def make_shows():
+    shows = []
+    for (tvdbid, name) in enumerate(SHOWS):
+        shows.append(BenchShow(tvdbid + 1, name.replace('.', ' ').replace('_', ' ').strip(' -')))
+    return shows
+
+
+def parse(name):
+    try:
+        return result_tuple(NameParser().parse(name))
+    except InvalidNameException:
+        return None
+
+
+def run_benchmark(func, args):
+    """
+    Calls func with every set of args, returns the latency of each call and a digest of what they returned
+    """
+    latencies = []
+    digest = hashlib.md5()
+
+    for cur_args in args:
+        start = time.time()
+        result = func(*cur_args)
+        latencies.append(time.time() - start)
+
+        digest.update(repr(result))
+
+    return latencies, digest.hexdigest()
+
+
+def summarize(latencies, digest):
+    latencies = sorted(latencies)
+    return {'ops': len(latencies) / max(sum(latencies), 1e-9),
+            'p50': latencies[len(latencies) / 2] * 1000000,
+            'p99': latencies[min(len(latencies) * 99 / 100, len(latencies) - 1)] * 1000000,
+            'digest': digest,
+            }
+
+
+def regex_hits(names):
+    hits = {}
+    for name in names:
+        result = parse(name)
+        if result:
+            for cur_regex in result[-1]:
+                hits[cur_regex] = hits.get(cur_regex, 0) + 1
+        else:
+            hits['(none)'] = hits.get('(none)', 0) + 1
+    return hits
+
+
+def change(old, new):
+    if not old:
+        return ''
+    return '%+7.1f%%' % ((new - old) * 100.0 / old)
+
+
+def report(corpus, results, hits, baseline):
+    if baseline and baseline['corpus'] != corpus:
+        print "The baseline was saved with a different corpus (%s), not comparing to it" % baseline['corpus']
+        baseline = None
+
+    print "%-18s %12s %8s %10s %8s %10s %8s  %s" % ('', 'ops/s', '', 'p50 (us)', '', 'p99 (us)', '', 'results')
+
+    for (cur_name, cur_result) in results:
+        old = baseline['benchmarks'].get(cur_name) if baseline else None
+
+        if not old:
+            same = ''
+        elif old['digest'] == cur_result['digest']:
+            same = 'same'
+        else:
+            same = 'CHANGED'
+
+        print "%-18s %12.0f %8s %10.1f %8s %10.1f %8s  %s" % (cur_name,
+                                                               cur_result['ops'], change(old and old['ops'], cur_result['ops']),
+                                                               cur_result['p50'], change(old and old['p50'], cur_result['p50']),
+                                                               cur_result['p99'], change(old and old['p99'], cur_result['p99']),
+                                                               same)
+
+    print
+    print "regex hits:"
+    total = sum(hits.values())
+    for (cur_regex, cur_hits) in sorted(hits.items(), key=lambda x: -x[1]):
+        old = baseline['regex_hits'].get(cur_regex, 0) if baseline else None
+        print "  %-20s %8d %6.1f%%  %s" % (cur_regex, cur_hits, cur_hits * 100.0 / total, '' if old == None else 'was %d' % old)
+
+
+def main(args):
+    save = '--save' in args
+    if save:
+        args.remove('--save')
+
+    if '--corpus' in args:
+        corpus_file = args[args.index('--corpus') + 1]
+        args.remove('--corpus')
+        args.remove(corpus_file)
+
+        names = [x.strip().decode('utf-8') for x in open(corpus_file) if x.strip()]
+        corpus = os.path.basename(corpus_file)
+    else:
+        names = None
+        corpus = None
+
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        print __doc__
+        sys.exit(1)
+
+    if args:
+        names = names[:int(args[0])] if names else make_names(int(args[0]))
+    elif not names:
+        names = make_names(20000)
+
+    corpus = "%s (%d names)" % (corpus or "generated", len(names))
+
+    shows = make_shows()
+    show_args = [(name, shows[i % len(shows)], False) for (i, name) in enumerate(names)]
+
+    benchmarks = [('parse', parse, [(x,) for x in names]),
+                  ('nameQuality', Quality.nameQuality, [(x,) for x in names]),
+                  ('filterBadReleases', show_name_helpers.filterBadReleases, [(x,) for x in names]),
+                  ('isGoodResult', show_name_helpers.isGoodResult, show_args),
+                  ]
+
+    print "=================="
+    print "PARSING BENCHMARK - %s" % corpus
+    print "=================="
+
+    test.setUp_test_db()
+    try:
+        results = []
+        for (cur_name, cur_func, cur_args) in benchmarks:
+            # warm up, then start without any cached parse results
+            run_benchmark(cur_func, cur_args[:1000])
+            name_parser_cache.clear()
+            results.append((cur_name, summarize(*run_benchmark(cur_func, cur_args))))
+
+        name_parser_cache.clear()
+        hits = regex_hits(names)
+    finally:
+        test.tearDown_test_db()
+
+    baseline = None
+    if os.path.isfile(BASELINE_FILE):
+        baseline = json.load(open(BASELINE_FILE))
+
+    report(corpus, results, hits, baseline)
+
+    if save:
+        json.dump({'corpus': corpus, 'benchmarks': dict(results), 'regex_hits': hits}, open(BASELINE_FILE, 'w'), indent=1, separators=(',', ': '), sort_keys=True)
+        print
+        print "Saved the baseline to " + BASELINE_FILE
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
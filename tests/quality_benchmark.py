@@ -0,0 +1,124 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Quality.nameQuality benchmark.
+
+Gets the quality of the name parser test names, a name with each quality string in it and a set of
+synthetic scene release names, once building the regexes on every call (the old behaviour) and once
+with the compiled rule table. Every result is checked to be the same both ways.
+
+Usage: python quality_benchmark.py [number of names]
+"""
+
+import os.path
+import re
+import sys
+import time
+
+import test_lib as test
+
+from sickbeard.common import Quality
+
+import name_parser_tests
+from name_parser_benchmark import make_names
+
+
+def old_nameQuality(name):
+    """
+    Quality.nameQuality the way it used to be
+    """
+    name = os.path.basename(name)
+
+    for x in sorted(Quality.qualityStrings, reverse=True):
+        if x == Quality.UNKNOWN:
+            continue
+
+        regex = '\W' + Quality.qualityStrings[x].replace(' ', '\W') + '\W'
+        regex_match = re.search(regex, name, re.I)
+        if regex_match:
+            return x
+
+    checkName = lambda namelist, func: func([re.search(x, name, re.I) for x in namelist])
+
+    if checkName(["(pdtv|hdtv|dsr|tvrip).(xvid|x264)"], all) and not checkName(["(720|1080)[pi]"], all) and not checkName(["hr.ws.pdtv.x264"], any):
+        return Quality.SDTV
+    elif checkName(["web.dl|webrip", "xvid|x264|h.?264"], all) and not checkName(["(720|1080)[pi]"], all):
+        return Quality.SDTV
+    elif checkName(["(dvdrip|bdrip)(.ws)?.(xvid|divx|x264)"], any) and not checkName(["(720|1080)[pi]"], all):
+        return Quality.SDDVD
+    elif checkName(["720p", "hdtv", "x264"], all) or checkName(["hr.ws.pdtv.x264"], any) and not checkName(["(1080)[pi]"], all):
+        return Quality.HDTV
+    elif checkName(["720p|1080i", "hdtv", "mpeg-?2"], all) or checkName(["1080i.hdtv", "h.?264"], all):
+        return Quality.RAWHDTV
+    elif checkName(["1080p", "hdtv", "x264"], all):
+        return Quality.FULLHDTV
+    elif checkName(["720p", "web.dl|webrip"], all) or checkName(["720p", "itunes", "h.?264"], all):
+        return Quality.HDWEBDL
+    elif checkName(["1080p", "web.dl|webrip"], all) or checkName(["1080p", "itunes", "h.?264"], all):
+        return Quality.FULLHDWEBDL
+    elif checkName(["720p", "bluray|hddvd", "x264"], all):
+        return Quality.HDBLURAY
+    elif checkName(["1080p", "bluray|hddvd", "x264"], all):
+        return Quality.FULLHDBLURAY
+    else:
+        return Quality.UNKNOWN
+
+
+def test_names():
+    names = []
+    for cur_cases in name_parser_tests.simple_test_cases.values():
+        names += cur_cases.keys()
+    names += [x[0] for x in name_parser_tests.combination_test_cases]
+    names += [x[0] for x in name_parser_tests.unicode_test_cases]
+    names += name_parser_tests.failure_cases
+    names += ["Show Name - S01E02 - " + x + " - GROUP" for x in Quality.qualityStrings.values()]
+    names += ["Show.Name.S01E02.HR.WS.PDTV.x264.1080p-GROUP", "Show.Name.S01E02.1080i.HDTV.MPEG2-GROUP",
+              "Show.Name.S01E02.iTunes.720p.h264-GROUP", "Show.Name.S01E02.720p.HDDVD.x264-GROUP"]
+    return names
+
+
+def benchmark(label, func, names):
+    start = time.time()
+    results = [func(x) for x in names]
+    elapsed = time.time() - start
+
+    print "%-9s %8.2fs  %10.0f names/s" % (label, elapsed, len(names) / elapsed)
+    return results, elapsed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print __doc__
+        sys.exit(1)
+
+    num_names = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    names = test_names() + make_names(num_names)
+
+    print "=================="
+    print "QUALITY BENCHMARK - %d names" % len(names)
+    print "=================="
+
+    before, before_time = benchmark("regexes", old_nameQuality, names)
+    after, after_time = benchmark("compiled", Quality.nameQuality, names)
+
+    mismatches = [name for (name, old, new) in zip(names, before, after) if old != new]
+    for name in mismatches[:10]:
+        print "MISMATCH:", name
+
+    print "speedup:  %7.2fx, %d mismatched results" % (before_time / after_time, len(mismatches))
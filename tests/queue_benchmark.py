@@ -0,0 +1,170 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Search queue benchmark with a large backlog.
+
+Queues backlog items for every season of a synthetic library (adding each one twice to exercise
+the duplicate check) and then runs the queue until it's empty. Compares the old sorted list queue
+with linear duplicate scans against the heap queue with the queue key index.
+
+Usage: python queue_benchmark.py [number of queued items]
+"""
+
+import datetime
+import sys
+import threading
+import time
+
+import test_lib as test
+
+from sickbeard import generic_queue, search_queue
+
+
+class BenchShow:
+
+    def __init__(self, tvdbid):
+        self.tvdbid = tvdbid
+        self.name = "Show " + str(tvdbid)
+
+
+class BenchBacklogItem(search_queue.BacklogQueueItem):
+    """
+    A backlog item which doesn't check the DB for wanted episodes and has nothing to do
+    """
+
+    def __init__(self, show, segment):
+        generic_queue.QueueItem.__init__(self, 'Backlog', search_queue.BACKLOG_SEARCH)
+        self.priority = generic_queue.QueuePriorities.LOW
+        self.thread_name = 'BACKLOG-' + str(show.tvdbid)
+
+        self.show = show
+        self.segment = segment
+        self.wantSeason = True
+
+    def execute(self):
+        pass
+
+
+class ListSearchQueue(object):
+    """
+    The search queue the way it used to be: a list which is sorted on every run and scanned for duplicates
+    """
+
+    def __init__(self):
+        self.currentItem = None
+        self.queue = []
+        self.thread = None
+        self.queue_name = "SEARCHQUEUE"
+        self.min_priority = 0
+
+    def is_in_queue(self, show, segment):
+        for cur_item in self.queue:
+            if isinstance(cur_item, search_queue.BacklogQueueItem) and cur_item.show == show and cur_item.segment == segment:
+                return True
+        return False
+
+    def add_item(self, item):
+        if not self.is_in_queue(item.show, item.segment):
+            item.added = datetime.datetime.now()
+            self.queue.append(item)
+
+    def run(self):
+        if self.thread == None or self.thread.isAlive() == False:
+
+            if self.currentItem != None:
+                self.currentItem.finish()
+                self.currentItem = None
+
+            if len(self.queue) > 0:
+
+                def sorter(x, y):
+                    if x.priority == y.priority:
+                        if y.added == x.added:
+                            return 0
+                        elif y.added < x.added:
+                            return 1
+                        elif y.added > x.added:
+                            return -1
+                    else:
+                        return y.priority - x.priority
+
+                self.queue.sort(cmp=sorter)
+
+                queueItem = self.queue[0]
+
+                if queueItem.priority < self.min_priority:
+                    return
+
+                threadName = self.queue_name + '-' + queueItem.get_thread_name()
+                self.thread = threading.Thread(None, queueItem.execute, threadName)
+                self.thread.start()
+
+                self.currentItem = queueItem
+
+                del self.queue[0]
+
+
+def make_items(num_items):
+    items = []
+    for tvdb_id in range(num_items / 10):
+        show = BenchShow(tvdb_id)
+        items += [BenchBacklogItem(show, season) for season in range(1, 11)]
+    return items
+
+
+def run_queue(queue):
+    while queue.queue:
+        queue.run()
+        for thread in [getattr(queue, 'thread', None)] + [x.thread for x in getattr(queue, 'currentItems', [])]:
+            if thread:
+                thread.join()
+    queue.run()
+
+
+def benchmark(label, queue, num_items):
+    items = make_items(num_items)
+
+    start = time.time()
+    for item in items + items:
+        queue.add_item(item)
+    enqueued = time.time() - start
+
+    start = time.time()
+    run_queue(queue)
+    drained = time.time() - start
+
+    print "%-8s enqueue %8.2fs   run %8.2fs" % (label, enqueued, drained)
+    return enqueued, drained
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print __doc__
+        sys.exit(1)
+
+    num_items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print "=================="
+    print "QUEUE BENCHMARK - %d backlog items" % num_items
+    print "=================="
+
+    before = benchmark("list", ListSearchQueue(), num_items)
+    after = benchmark("heap", search_queue.SearchQueue(), num_items)
+
+    print "speedup:  enqueue %7.2fx   run %7.2fx" % (before[0] / after[0], before[1] / after[1])
@@ -10,6 +10,7 @@ import sickbeard
 from sickbeard import db
 from sickbeard.databases import cache_db
 from sickbeard.tv import TVShow as Show
+from sickbeard.name_parser import parser
 
 
 class SceneTests(test.SickbeardTestDBCase):
@@ -71,6 +72,7 @@ class SceneTests(test.SickbeardTestDBCase):
         #common.sceneExceptions[-1] = ['Exception Test']
         myDB = db.DBConnection("cache.db")
         myDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [-1, 'Exception Test'])
+        scene_exceptions.load_exceptions()
         common.countryList['Full Country Name'] = 'FCN'
 
         self._test_allPossibleShowNames('Show Name', expected=['Show Name'])
@@ -89,6 +91,139 @@ class SceneTests(test.SickbeardTestDBCase):
         self._test_filterBadReleases('German.Show.S02.Some.Stuff-Grp', True)
         self._test_filterBadReleases('Show.S02.This.Is.German', False)
 
+    def test_filterBadReleases_ignore_words(self):
+        ignore_words = sickbeard.IGNORE_WORDS
+        try:
+            sickbeard.IGNORE_WORDS = "german,c++"
+            self._test_filterBadReleases('Show.S02.Some.Stuff-Grp', True)
+            self._test_filterBadReleases('Show.S02.Some.Stuff.C++-Grp', False)
+            self._test_filterBadReleases('Show.S02.Some.Stuff.Sample-Grp', False)
+
+            # changing them takes effect straight away
+            sickbeard.IGNORE_WORDS = "stuff"
+            self._test_filterBadReleases('Show.S02.Some.Stuff-Grp', False)
+            self._test_filterBadReleases('Show.S02.Some.German-Grp', True)
+        finally:
+            sickbeard.IGNORE_WORDS = ignore_words
+
+    def test_filterBadReleases_parse_result(self):
+        # the parse result is used instead of parsing the name again
+        parse_result = parser.ParseResult(None, 'Show', 2, [], 'Some.Stuff', 'Grp')
+        self.assertTrue(show_name_helpers.filterBadReleases('Show.S02.Some.German.Stuff-Grp', parse_result))
+        parse_result = parser.ParseResult(None, 'Show', 2, [], 'Some.Stuff', 'German')
+        self.assertFalse(show_name_helpers.filterBadReleases('Show.S02.Some.Stuff-Grp', parse_result))
+
+
+class ShowNameMatcherTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(ShowNameMatcherTests, self).setUp()
+        show_name_helpers.showNameMatcher.invalidate()
+
+        sickbeard.showList = []
+        for (tvdbid, name) in enumerate(['Show Name', 'Show Name Two', 'Other Show', '(Brackets) Show', 'Show Name'], 1):
+            s = Show(tvdbid)
+            s.name = name
+            sickbeard.showList.append(s)
+
+    def tearDown(self):
+        super(ShowNameMatcherTests, self).tearDown()
+        show_name_helpers.showNameMatcher.invalidate()
+
+    def _findShow(self, name):
+        curShow = show_name_helpers.showNameMatcher.findShow(name)
+        if curShow:
+            return curShow.tvdbid
+
+    def test_same_as_checking_every_show(self):
+        names = ['Show.Name.S01E02.Test-Test', 'Show.Name.Two.1x02.Test', 'Other.Show.2010.11.23.Test',
+                 '(Brackets).Show.S01E02', 'Show Name Season 2 Test', 'show_name_e02_test', 'Unknown.Show.S01E02',
+                 'Other.Show.Test', 'Show.Name.Three.S01E01']
+
+        for name in names:
+            expected = None
+            for curShow in sickbeard.showList:
+                if show_name_helpers.isGoodResult(name, curShow, False):
+                    expected = curShow.tvdbid
+                    break
+
+            self.assertEqual(self._findShow(name), expected, name)
+
+    def test_first_show_in_the_list_wins(self):
+        self.assertEqual(self._findShow('Show.Name.S01E02.Test-Test'), 1)
+
+    def test_list_changes(self):
+        self.assertEqual(self._findShow('New.Show.S01E02'), None)
+
+        s = Show(10)
+        s.name = 'New Show'
+        sickbeard.showList.append(s)
+        self.assertEqual(self._findShow('New.Show.S01E02'), 10)
+
+        sickbeard.showList = [x for x in sickbeard.showList if x.tvdbid != 10]
+        self.assertEqual(self._findShow('New.Show.S01E02'), None)
+
+    def test_list_replaced_with_same_length(self):
+        # named before the first lookup so renaming it doesn't throw the index away
+        s = Show(10)
+        s.name = 'New Show'
+        self.assertEqual(self._findShow('New.Show.S01E02'), None)
+
+        sickbeard.showList = sickbeard.showList[:-1] + [s]
+        self.assertEqual(len(sickbeard.showList), 5)
+        self.assertEqual(self._findShow('New.Show.S01E02'), 10)
+
+    def test_renamed_show(self):
+        sickbeard.showList[2].name = 'Renamed Show'
+        show_name_helpers.showNameMatcher.invalidate(sickbeard.showList[2])
+
+        self.assertEqual(self._findShow('Other.Show.S01E02'), None)
+        self.assertEqual(self._findShow('Renamed.Show.S01E02'), 3)
+
+    def test_scene_exceptions_change(self):
+        self.assertEqual(self._findShow('Exception.Name.S01E02'), None)
+
+        myDB = db.DBConnection("cache.db")
+        myDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [3, 'Exception Name'])
+        scene_exceptions.load_exceptions()
+
+        self.assertEqual(self._findShow('Exception.Name.S01E02'), 3)
+
+
+class SceneExceptionStoreTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(SceneExceptionStoreTests, self).setUp()
+
+        myDB = db.DBConnection("cache.db")
+        for (tvdb_id, show_name) in [(1, 'Show: Name'), (1, 'Show Name US'), (1, 'Show: Name'), (2, 'Other Show'), (3, 'Other Show')]:
+            myDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [tvdb_id, show_name])
+        scene_exceptions.load_exceptions()
+
+    def test_names_by_id(self):
+        self.assertEqual(scene_exceptions.get_scene_exceptions(1), ['Show: Name', 'Show Name US'])
+        self.assertEqual(scene_exceptions.get_scene_exceptions(4), [])
+
+    def test_id_by_name(self):
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('show name us'), 1)
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('Show Name'), 1)
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('Show.Name'), None)
+
+        # the first one in the table wins
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('other show'), 2)
+
+    def test_not_changed_until_reloaded(self):
+        version = scene_exceptions.exceptionsVersion
+
+        myDB = db.DBConnection("cache.db")
+        myDB.action("DELETE FROM scene_exceptions WHERE tvdb_id = 1")
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('Show Name US'), 1)
+
+        scene_exceptions.load_exceptions()
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('Show Name US'), None)
+        self.assertEqual(scene_exceptions.get_scene_exceptions(1), [])
+        self.assertEqual(scene_exceptions.exceptionsVersion, version + 1)
+
 
 class SceneExceptionTestCase(test.SickbeardTestDBCase):
 
@@ -117,10 +252,12 @@ class SceneExceptionTestCase(test.SickbeardTestDBCase):
 
         # put something in the cache
         name_cache.addNameToCache('Cached Name', 0)
+        name_cache.addNameToCache('Babylon5', 0)
 
-        # updating should clear the cache so our previously "Cached Name" won't be in there
+        # updating should forget "Babylon5" since it's an exception now but "Cached Name" has nothing to do with it
         scene_exceptions.retrieve_exceptions()
-        self.assertEqual(name_cache.retrieveNameFromCache('Cached Name'), None)
+        self.assertEqual(name_cache.retrieveNameFromCache('Babylon5'), None)
+        self.assertEqual(name_cache.retrieveNameFromCache('Cached Name'), 0)
 
         # put something in the cache
         name_cache.addNameToCache('Cached Name', 0)
@@ -137,5 +274,9 @@ if __name__ == '__main__':
     else:
         suite = unittest.TestLoader().loadTestsFromTestCase(SceneTests)
         unittest.TextTestRunner(verbosity=2).run(suite)
+        suite = unittest.TestLoader().loadTestsFromTestCase(ShowNameMatcherTests)
+        unittest.TextTestRunner(verbosity=2).run(suite)
+        suite = unittest.TestLoader().loadTestsFromTestCase(SceneExceptionStoreTests)
+        unittest.TextTestRunner(verbosity=2).run(suite)
         suite = unittest.TestLoader().loadTestsFromTestCase(SceneExceptionTestCase)
         unittest.TextTestRunner(verbosity=2).run(suite)
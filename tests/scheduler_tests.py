@@ -0,0 +1,164 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import datetime
+import threading
+import time
+import unittest
+
+import test_lib as test
+
+from sickbeard import scheduler
+
+
+class CountingAction:
+
+    def __init__(self, duration=0):
+        self.amActive = False
+        self.duration = duration
+        self.runs = 0
+        self.active = 0
+        self.most_active = 0
+        self.threadNames = set()
+        self.threads = set()
+
+    def run(self):
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+        self.runs += 1
+        self.threadNames.add(threading.currentThread().getName())
+        self.threads.add(threading.currentThread())
+        time.sleep(self.duration)
+        self.active -= 1
+
+
+class SchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.schedulers = []
+
+    def tearDown(self):
+        for curScheduler in self.schedulers:
+            curScheduler.abort = True
+
+    def _start(self, action, cycleTime, runImmediately=True, threadName="TEST"):
+        curScheduler = scheduler.Scheduler(action, cycleTime=datetime.timedelta(seconds=cycleTime), runImmediately=runImmediately, threadName=threadName, silent=True)
+        curScheduler.start()
+        self.schedulers.append(curScheduler)
+        return curScheduler
+
+    def test_runs_every_cycle(self):
+        action = CountingAction()
+        self._start(action, 0.2)
+
+        time.sleep(0.5)
+        self.assertTrue(2 <= action.runs <= 4, action.runs)
+        self.assertEqual(action.threadNames, set(["TEST"]))
+
+    def test_not_run_immediately(self):
+        action = CountingAction()
+        curScheduler = self._start(action, 60, runImmediately=False)
+
+        time.sleep(0.2)
+        self.assertEqual(action.runs, 0)
+        self.assertTrue(59 < scheduler._seconds(curScheduler.timeLeft()) <= 60)
+
+    def test_force_run_wakes_immediately(self):
+        action = CountingAction()
+        curScheduler = self._start(action, 3600, runImmediately=False)
+
+        self.assertTrue(curScheduler.forceRun())
+        time.sleep(0.2)
+        self.assertEqual(action.runs, 1)
+        self.assertTrue(scheduler._seconds(curScheduler.timeLeft()) > 3500)
+
+    def test_force_run_refused_while_active(self):
+        action = CountingAction()
+        action.amActive = True
+        curScheduler = self._start(action, 3600, runImmediately=False)
+
+        self.assertFalse(curScheduler.forceRun())
+
+    def test_cycle_time_change_wakes(self):
+        action = CountingAction()
+        curScheduler = self._start(action, 3600, runImmediately=False)
+
+        curScheduler.cycleTime = datetime.timedelta(seconds=0.1)
+        time.sleep(0.3)
+        self.assertTrue(action.runs >= 1)
+
+    def test_runs_never_overlap(self):
+        action = CountingAction(duration=0.3)
+        self._start(action, 0.05)
+
+        time.sleep(0.8)
+        self.assertEqual(action.most_active, 1)
+        self.assertTrue(action.runs >= 2)
+
+    def test_abort(self):
+        action = CountingAction()
+        curScheduler = self._start(action, 0.1)
+
+        time.sleep(0.25)
+        curScheduler.abort = True
+        runs = action.runs
+        time.sleep(0.3)
+        self.assertEqual(action.runs, runs)
+
+    def test_one_thread_for_all_schedulers(self):
+        threads = threading.activeCount()
+
+        for i in range(8):
+            self._start(CountingAction(), 3600, runImmediately=False, threadName="TEST" + str(i))
+
+        time.sleep(0.1)
+        # the dispatcher is started once for the process, no threads for idle schedulers
+        self.assertTrue(threading.activeCount() - threads <= 1)
+
+    def test_short_cycle_keeps_its_thread(self):
+        action = CountingAction()
+        curScheduler = self._start(action, 0.05)
+
+        time.sleep(0.4)
+        self.assertTrue(action.runs >= 3)
+        self.assertEqual(len(action.threads), 1)
+
+        curScheduler.abort = True
+        curScheduler.thread.join(1)
+        self.assertFalse(curScheduler.thread.isAlive())
+
+    def test_long_cycle_gives_its_thread_back(self):
+        action = CountingAction()
+        curScheduler = self._start(action, 3600)
+
+        time.sleep(0.2)
+        self.assertEqual(action.runs, 1)
+        self.assertFalse(curScheduler.thread.isAlive())
+
+        self.assertTrue(curScheduler.forceRun())
+        time.sleep(0.2)
+        self.assertEqual(action.runs, 2)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SCHEDULER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(SchedulerTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
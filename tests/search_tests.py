@@ -0,0 +1,195 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import BaseHTTPServer
+import SocketServer
+import threading
+import time
+import unittest
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import search
+from sickbeard.common import Quality
+from sickbeard.providers.generic import GenericProvider
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers /<delay>/<body> after sleeping for delay seconds
+    """
+
+    def do_GET(self):
+        delay, body = self.path.strip('/').split('/')
+
+        self.server.active += 1
+        self.server.most_active = max(self.server.most_active, self.server.active)
+        time.sleep(float(delay))
+        self.server.active -= 1
+
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    active = 0
+    most_active = 0
+
+
+class StubShow:
+    paused = False
+
+
+class StubEpisode:
+
+    def __init__(self, name):
+        self.name = name
+        self.show = StubShow()
+
+    def prettyName(self):
+        return self.name
+
+
+class StubProvider(GenericProvider):
+
+    episode = StubEpisode("Show - 1x01")
+
+    def __init__(self, name, url, delay):
+        GenericProvider.__init__(self, name)
+        self.providerType = GenericProvider.NZB
+        self.stubURL = url + "/" + str(delay) + "/" + self.getID()
+        self.searched = False
+
+    def isActive(self):
+        return True
+
+    def searchRSS(self):
+        self.searched = True
+        data = self.getURL(self.stubURL)
+
+        result = self.getResult([StubProvider.episode])
+        result.name = "Show.S01E01.720p.HDTV.x264-" + data
+        result.quality = Quality.HDTV
+        return {StubProvider.episode: [result]}
+
+
+class SearchProvidersTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(('127.0.0.1', 0), StubHandler)
+        self.url = "http://127.0.0.1:" + str(self.server.server_address[1])
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        server_thread.setDaemon(True)
+        server_thread.start()
+
+        self._saved = (sickbeard.providerList, sickbeard.newznabProviderList, sickbeard.PROVIDER_ORDER, sickbeard.PROVIDER_THREADS, sickbeard.PROVIDER_TIMEOUT)
+        sickbeard.newznabProviderList = []
+        sickbeard.PROVIDER_THREADS = 4
+        sickbeard.PROVIDER_TIMEOUT = 10
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        sickbeard.providerList, sickbeard.newznabProviderList, sickbeard.PROVIDER_ORDER, sickbeard.PROVIDER_THREADS, sickbeard.PROVIDER_TIMEOUT = self._saved
+
+    def _setProviders(self, *delays):
+        sickbeard.providerList = [StubProvider("Stub " + str(i), self.url, delay) for i, delay in enumerate(delays)]
+        sickbeard.PROVIDER_ORDER = [x.getID() for x in sickbeard.providerList]
+        return sickbeard.providerList
+
+    def _search(self):
+        start = time.time()
+        results = [(x.getID(), y.values()[0][0].name) for x, y in search.searchProviders(lambda x: x.searchRSS())]
+        return results, time.time() - start
+
+    def test_providers_run_in_parallel(self):
+        self._setProviders(0.5, 0.5, 0.5, 0.5)
+
+        results, elapsed = self._search()
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(elapsed < 1.5, elapsed)
+        self.assertEqual(self.server.most_active, 4)
+
+    def test_results_in_priority_order(self):
+        self._setProviders(0.6, 0.1, 0.3)
+
+        results, elapsed = self._search()
+
+        self.assertEqual([x[0] for x in results], ["stub_0", "stub_1", "stub_2"])
+        self.assertEqual([x[1] for x in results], ["Show.S01E01.720p.HDTV.x264-stub_0", "Show.S01E01.720p.HDTV.x264-stub_1", "Show.S01E01.720p.HDTV.x264-stub_2"])
+
+    def test_worker_pool_is_bounded(self):
+        sickbeard.PROVIDER_THREADS = 2
+        self._setProviders(0.3, 0.3, 0.3, 0.3)
+
+        results, elapsed = self._search()
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.server.most_active, 2)
+        self.assertTrue(elapsed >= 0.6, elapsed)
+
+    def test_no_provider_threads_still_searches(self):
+        sickbeard.PROVIDER_THREADS = 0
+        self._setProviders(0.1, 0.1)
+
+        results, elapsed = self._search()
+
+        self.assertEqual([x[0] for x in results], ["stub_0", "stub_1"])
+
+    def test_slow_provider_times_out(self):
+        sickbeard.PROVIDER_TIMEOUT = 1
+        self._setProviders(0.1, 3, 0.1)
+
+        results, elapsed = self._search()
+
+        self.assertEqual([x[0] for x in results], ["stub_0", "stub_2"])
+        self.assertTrue(elapsed < 2, elapsed)
+
+    def test_stopping_cancels_remaining_providers(self):
+        sickbeard.PROVIDER_THREADS = 1
+        stubs = self._setProviders(0.1, 0.3, 0.1)
+
+        for curProvider, curResults in search.searchProviders(lambda x: x.searchRSS()):
+            break
+
+        time.sleep(0.5)
+        self.assertEqual([x.searched for x in stubs], [True, True, False])
+
+    def test_needed_episodes_keep_priority_tie_break(self):
+        # the first provider is the slowest but its result still wins a tie on quality
+        self._setProviders(0.5, 0.1)
+
+        results = search.searchForNeededEpisodes()
+
+        self.assertEqual([x.name for x in results], ["Show.S01E01.720p.HDTV.x264-stub_0"])
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SEARCH TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(SearchProvidersTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -31,7 +31,7 @@ sys.path.append(os.path.abspath('../lib'))
 import sickbeard
 import shutil
 
-from sickbeard import encodingKludge as ek, providers, tvcache
+from sickbeard import encodingKludge as ek, providers, tvcache, scene_exceptions, name_cache
 from sickbeard import db
 from sickbeard.databases import mainDB
 from sickbeard.databases import cache_db
@@ -126,9 +126,9 @@ class SickbeardTestDBCase(unittest.TestCase):
 
 class TestDBConnection(db.DBConnection, object):
 
-    def __init__(self, dbFileName=TESTDBNAME):
+    def __init__(self, dbFileName=TESTDBNAME, row_type=None):
         dbFileName = os.path.join(TESTDIR, dbFileName)
-        super(TestDBConnection, self).__init__(dbFileName)
+        super(TestDBConnection, self).__init__(dbFileName, row_type=row_type)
 
 
 class TestCacheDBConnection(TestDBConnection, object):
@@ -136,15 +136,6 @@ class TestCacheDBConnection(TestDBConnection, object):
     def __init__(self, providerName):
         db.DBConnection.__init__(self, os.path.join(TESTDIR, TESTCACHEDBNAME))
 
-        # Create the table if it's not already there
-        try:
-            sql = "CREATE TABLE " + providerName + " (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT);"
-            self.connection.execute(sql)
-            self.connection.commit()
-        except sqlite3.OperationalError, e:
-            if str(e) != "table " + providerName + " already exists":
-                raise
-
         # Create the table if it's not already there
         try:
             sql = "CREATE TABLE lastUpdate (provider TEXT, time NUMERIC);"
@@ -173,6 +164,10 @@ def setUp_test_db():
     #and for cache.b too
     db.upgradeDatabase(db.DBConnection("cache.db"), cache_db.InitialSchema)
 
+    # forget the scene exceptions and names from the last test's db
+    scene_exceptions.load_exceptions()
+    name_cache.resetCache()
+
 
 def tearDown_test_db():
     """Deletes the test db
@@ -180,10 +175,13 @@ def tearDown_test_db():
     """
     # uncomment next line so leave the db intact between test and at the end
     #return False
-    if os.path.exists(os.path.join(TESTDIR, TESTDBNAME)):
-        os.remove(os.path.join(TESTDIR, TESTDBNAME))
-    if os.path.exists(os.path.join(TESTDIR, TESTCACHEDBNAME)):
-        os.remove(os.path.join(TESTDIR, TESTCACHEDBNAME))
+    # pooled connections would keep the deleted files open
+    db.closeAllConnections()
+
+    for db_name in (TESTDBNAME, TESTCACHEDBNAME):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(os.path.join(TESTDIR, db_name + suffix)):
+                os.remove(os.path.join(TESTDIR, db_name + suffix))
 
 
 def setUp_test_episode_file():
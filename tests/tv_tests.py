@@ -17,11 +17,16 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import threading
+import time
 import unittest
 import test_lib as test
 
 import sickbeard
-from sickbeard.tv import TVEpisode, TVShow
+from sickbeard import exceptions, helpers
+from sickbeard.metadata import xbmc
+from sickbeard.tv import EpisodeSaveBatch, TVEpisode, TVShow, loadShowsFromDB
 
 
 class TVShowTests(test.SickbeardTestDBCase):
@@ -61,6 +66,36 @@ class TVShowTests(test.SickbeardTestDBCase):
         show.loadFromDB(skipNFO=True)
         self.assertEqual(show.name, "newName")
 
+    def test_init_from_row(self):
+        show = TVShow(0001, "en")
+        show.name = "show name"
+        show.network = "cbs"
+        show.startyear = 1987
+        show.quality = 4
+        show.saveToDB()
+
+        myDB = test.db.DBConnection()
+        sqlShow = myDB.select("SELECT * FROM tv_shows WHERE tvdb_id = ?", [0001])[0]
+        myDB.action("UPDATE tv_shows SET show_name = ? WHERE tvdb_id = ?", ["changed name", 0001])
+
+        sickbeard.showList = []
+        rowShow = TVShow(0001, sqlShow=sqlShow)
+        self.assertEqual((rowShow.name, rowShow.network, rowShow.startyear, rowShow.quality, rowShow.lang), ("show name", "cbs", 1987, 4, "en"))
+
+        # it isn't written back
+        self.assertEqual(myDB.select("SELECT show_name FROM tv_shows WHERE tvdb_id = ?", [0001])[0]["show_name"], "changed name")
+
+    def test_loadShowsFromDB(self):
+        myDB = test.db.DBConnection()
+        for (tvdbid, name) in [(1, "show one"), (2, "show two")]:
+            myDB.action("INSERT INTO tv_shows (tvdb_id, show_name, location, quality, flatten_folders, paused, tvr_id, lang, last_update_tvdb) VALUES (?,?,?,?,?,?,?,?,?)",
+                        [tvdbid, name, test.SHOWDIR, 4, 0, 0, 0, "en", 1])
+
+        loadShowsFromDB()
+
+        self.assertEqual([(x.tvdbid, x.name) for x in sickbeard.showList], [(1, "show one"), (2, "show two")])
+        self.assertTrue(helpers.findCertainShow(sickbeard.showList, 2) is sickbeard.showList[1])
+
 
 class TVEpisodeTests(test.SickbeardTestDBCase):
 
@@ -77,6 +112,292 @@ class TVEpisodeTests(test.SickbeardTestDBCase):
         self.assertEqual(ep.name, "asdasdasdajkaj")
 
 
+class ChangedColumnsTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(ChangedColumnsTests, self).setUp()
+        sickbeard.showList = []
+        self.show = TVShow(0001, "en")
+
+        self.queries = []
+        self.execute = test.db.DBConnection._execute
+
+        def recording_execute(myDB, query, args=None):
+            if not test.db._isReadOnly(query):
+                self.queries.append(query)
+            return self.execute(myDB, query, args)
+        test.db.DBConnection._execute = recording_execute
+
+    def tearDown(self):
+        test.db.DBConnection._execute = self.execute
+        super(ChangedColumnsTests, self).tearDown()
+
+    def _loadEpisode(self, episode):
+        myDB = test.db.DBConnection()
+        myDB.action("INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location, file_size, release_name) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                    [self.show.tvdbid, episode, "Episode " + str(episode), 1, episode, "a long description", 1, 0, 0, 5, "", 0, ""])
+        sqlResult = myDB.select("SELECT * FROM tv_episodes WHERE showid = ? AND season = ? AND episode = ?", [self.show.tvdbid, 1, episode])[0]
+        del self.queries[:]
+        return TVEpisode(self.show, 1, episode, sqlResult=sqlResult)
+
+    def test_episode_changed_columns(self):
+        ep = self._loadEpisode(1)
+
+        ep.status = 3
+        ep.saveToDB()
+        self.assertEqual(len(self.queries), 1)
+        self.assertTrue(self.queries[0].startswith("UPDATE tv_episodes SET status = ? WHERE"))
+
+        ep.saveToDB()
+        ep.status = 5
+        ep.status = 3
+        ep.saveToDB()
+        self.assertEqual(len(self.queries), 1)
+
+        ep.saveToDB(forceSave=True)
+        self.assertEqual(len(self.queries), 2)
+
+        ep.loadFromDB(1, 1)
+        self.assertEqual(ep.status, 3)
+
+    def test_episode_batch(self):
+        eps = [self._loadEpisode(x) for x in range(1, 4)]
+
+        with EpisodeSaveBatch():
+            eps[0].name = "changed"
+            for ep in eps:
+                ep.saveToDB(forceSave=(ep is eps[2]))
+
+        self.assertEqual(len(self.queries), 2)
+        self.assertTrue(self.queries[0].startswith("UPDATE tv_episodes SET name = ? WHERE"))
+
+    def test_episode_batch_unchanged_is_clean(self):
+        ep = self._loadEpisode(1)
+
+        with EpisodeSaveBatch():
+            ep.status = 3
+            ep.status = 5
+            self.assertTrue(ep.dirty)
+            ep.saveToDB()
+
+        self.assertEqual(self.queries, [])
+        self.assertFalse(ep.dirty)
+
+    def test_deleted_episode_row(self):
+        ep = self._loadEpisode(1)
+        test.db.DBConnection().action("DELETE FROM tv_episodes")
+
+        ep.status = 3
+        ep.saveToDB()
+        sqlResults = test.db.DBConnection().select("SELECT name, status FROM tv_episodes")
+        self.assertEqual([(x["name"], x["status"]) for x in sqlResults], [("Episode 1", 3)])
+
+    def test_show_changed_columns(self):
+        self.show.saveToDB()
+        self.assertEqual(self.queries, [])
+
+        self.show.name = "new name"
+        self.show.saveToDB()
+        self.assertEqual(len(self.queries), 1)
+        self.assertTrue(self.queries[0].startswith("UPDATE tv_shows SET show_name = ? WHERE"))
+
+        sickbeard.showList = []
+        self.assertEqual(TVShow(0001, "en").name, "new name")
+
+
+class MetaFilesTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(MetaFilesTests, self).setUp()
+        self.oldProviders = sickbeard.metadata_provider_dict
+        sickbeard.metadata_provider_dict = {'XBMC': xbmc.metadata_class(episode_metadata=True, episode_thumbnails=True)}
+
+    def tearDown(self):
+        sickbeard.metadata_provider_dict = self.oldProviders
+        super(MetaFilesTests, self).tearDown()
+
+    def _touch(self, path):
+        open(path, 'w').close()
+        # make sure the directory looks changed even on file systems with a coarse mtime
+        os.utime(test.FILEDIR, (time.time() + 10, time.time() + 10))
+
+    def test_lazy(self):
+        self._touch(helpers.replaceExtension(test.FILEPATH, "nfo"))
+        ep = TVEpisode(TVShow(0001, "en"), 1, 1, test.FILEPATH)
+
+        self.assertEqual(ep._hasnfo, None)
+        self.assertEqual(ep.hasnfo, True)
+        self.assertEqual(ep.hastbn, False)
+
+    def test_checkForMetaFiles(self):
+        ep = TVEpisode(TVShow(0001, "en"), 1, 1, test.FILEPATH)
+        self.assertEqual(ep.hastbn, False)
+        self.assertFalse(ep.checkForMetaFiles())
+
+        self._touch(helpers.replaceExtension(test.FILEPATH, "tbn"))
+        self.assertTrue(ep.checkForMetaFiles())
+        self.assertEqual(ep.hastbn, True)
+        self.assertEqual(ep.hasnfo, False)
+
+    def test_saved_flags(self):
+        self._touch(helpers.replaceExtension(test.FILEPATH, "nfo"))
+        show = TVShow(0001, "en")
+        ep = TVEpisode(show, 1, 1, test.FILEPATH)
+        ep.saveToDB()
+
+        sqlResults = test.db.DBConnection().select("SELECT hasnfo, hastbn FROM tv_episodes WHERE showid = ?", [show.tvdbid])
+        self.assertEqual((sqlResults[0]["hasnfo"], sqlResults[0]["hastbn"]), (1, 0))
+
+
+class DirListingCacheTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(DirListingCacheTests, self).setUp()
+        self.cache = helpers.DirListingCache()
+
+    def test_isFile(self):
+        self.assertTrue(self.cache.isFile(test.FILEPATH))
+        self.assertFalse(self.cache.isFile(test.FILEPATH + ".nfo"))
+        self.assertFalse(self.cache.isFile(os.path.join(test.FILEDIR, "missing", "file.nfo")))
+        self.assertFalse(self.cache.isFile(""))
+
+    def test_directory_isnt_a_file(self):
+        os.mkdir(test.FILEPATH + ".nfo")
+        self.assertFalse(self.cache.isFile(test.FILEPATH + ".nfo"))
+        self.assertFalse(self.cache.isFile(test.FILEDIR))
+        self.assertTrue(self.cache.isFile(test.FILEPATH))
+
+    def test_changed_directory(self):
+        # an old mtime so the listing is trusted
+        os.utime(test.FILEDIR, (1000000, 1000000))
+        self.assertFalse(self.cache.isFile(test.FILEPATH + ".nfo"))
+        self.assertFalse(self.cache.isFile(test.FILEPATH + ".tbn"))
+        self.assertEqual(self.cache.stats, {'hits': 1, 'listings': 1})
+
+        open(test.FILEPATH + ".nfo", 'w').close()
+        os.utime(test.FILEDIR, (1000001, 1000001))
+        self.assertTrue(self.cache.isFile(test.FILEPATH + ".nfo"))
+        self.assertEqual(self.cache.stats['listings'], 2)
+
+    def test_batch(self):
+        with self.cache.batch():
+            self.assertTrue(self.cache.isFile(test.FILEPATH))
+            open(test.FILEPATH + ".nfo", 'w').close()
+            # the directory isn't looked at again during the batch
+            self.assertFalse(self.cache.isFile(test.FILEPATH + ".nfo"))
+
+        self.assertTrue(self.cache.isFile(test.FILEPATH + ".nfo"))
+
+
+class EpisodeSaveBatchTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(EpisodeSaveBatchTests, self).setUp()
+        sickbeard.showList = []
+        self.show = TVShow(0001, "en")
+
+    def _episodes_in_db(self):
+        return len(test.db.DBConnection().select("SELECT * FROM tv_episodes WHERE showid = ?", [self.show.tvdbid]))
+
+    def test_saves_deferred_until_exit(self):
+        with EpisodeSaveBatch():
+            for episode in range(1, 11):
+                ep = TVEpisode(self.show, 1, episode)
+                ep.name = "episode " + str(episode)
+                ep.saveToDB()
+            self.assertEqual(self._episodes_in_db(), 0)
+
+        self.assertEqual(self._episodes_in_db(), 10)
+
+    def test_last_save_wins(self):
+        ep = TVEpisode(self.show, 1, 1)
+
+        with EpisodeSaveBatch():
+            ep.name = "first"
+            ep.saveToDB()
+            ep.name = "second"
+            ep.saveToDB()
+
+        ep.loadFromDB(1, 1)
+        self.assertEqual(ep.name, "second")
+
+    def test_nested_batches_flush_once(self):
+        with EpisodeSaveBatch():
+            with EpisodeSaveBatch():
+                TVEpisode(self.show, 1, 1).saveToDB()
+            self.assertEqual(self._episodes_in_db(), 0)
+
+        self.assertEqual(self._episodes_in_db(), 1)
+
+    def test_deleted_episode_not_saved(self):
+        with EpisodeSaveBatch():
+            ep = TVEpisode(self.show, 1, 1)
+            ep.saveToDB()
+            self.assertRaises(exceptions.EpisodeDeletedException, ep.deleteEpisode)
+
+        self.assertEqual(self._episodes_in_db(), 0)
+
+    def test_flushed_on_error(self):
+        try:
+            with EpisodeSaveBatch():
+                TVEpisode(self.show, 1, 1).saveToDB()
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertEqual(self._episodes_in_db(), 1)
+
+
+class ShowIndexTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(ShowIndexTests, self).setUp()
+        sickbeard.showList = []
+        self.shows = []
+        for tvdbid in range(1, 4):
+            show = TVShow(tvdbid, "en")
+            show.name = "Show Name " + str(tvdbid)
+            show.tvrid = tvdbid * 10
+            self.shows.append(show)
+        sickbeard.showList.extend(self.shows)
+
+    def test_find(self):
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 2), self.shows[1])
+        self.assertEqual(helpers.findCertainTVRageShow(sickbeard.showList, 30), self.shows[2])
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 4), None)
+        self.assertEqual(helpers.findCertainTVRageShow(sickbeard.showList, 0), None)
+
+    def test_appended_show(self):
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 4), None)
+
+        show = TVShow(4, "en")
+        sickbeard.showList.append(show)
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 4), show)
+
+    def test_replaced_list(self):
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 2), self.shows[1])
+
+        sickbeard.showList = [x for x in sickbeard.showList if x.tvdbid != 2]
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 2), None)
+        self.assertEqual(helpers.findCertainShow(sickbeard.showList, 3), self.shows[2])
+
+    def test_saved_changes(self):
+        self.assertEqual(helpers.findCertainTVRageShow(sickbeard.showList, 10), self.shows[0])
+
+        self.shows[0].tvrid = 11
+        self.shows[0].saveToDB()
+
+        self.assertEqual(helpers.findCertainTVRageShow(sickbeard.showList, 10), None)
+        self.assertEqual(helpers.findCertainTVRageShow(sickbeard.showList, 11), self.shows[0])
+
+    def test_duplicates(self):
+        duplicate = TVShow(5, "en")
+        duplicate.tvdbid = 1
+        sickbeard.showList.append(duplicate)
+
+        self.assertRaises(exceptions.MultipleShowObjectsException, helpers.findCertainShow, sickbeard.showList, 1)
+
+
 class TVTests(test.SickbeardTestDBCase):
 
     def setUp(self):
@@ -97,6 +418,103 @@ class TVTests(test.SickbeardTestDBCase):
         sickbeard.showList = [show]
         #TODO: implement
 
+    def _addEpisodes(self, show, episodes):
+        myDB = test.db.DBConnection()
+        for (season, episode, location) in episodes:
+            myDB.action("INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location, file_size, release_name) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        [show.tvdbid, season * 100 + episode, "Episode " + str(episode), season, episode, "", 1, 0, 0, 5, location, 0, ""])
+
+    def test_getAllEpisodes(self):
+        show = TVShow(0001, "en")
+        sickbeard.showList = [show]
+        self._addEpisodes(show, [(1, 1, "/show/s01e01e02.avi"), (1, 2, "/show/s01e01e02.avi"), (1, 3, ""),
+                                 (2, 1, "/show/s02e01.avi"), (2, 2, "/show/s01e01e02.avi")])
+
+        eps = show.getAllEpisodes()
+        self.assertEqual([(x.season, x.episode, x.name) for x in eps], [(1, 1, "Episode 1"), (1, 2, "Episode 2"), (1, 3, "Episode 3"),
+                                                                        (2, 1, "Episode 1"), (2, 2, "Episode 2")])
+
+        # multi-episodes are only the ones in the same file in the same season
+        self.assertEqual([[(y.season, y.episode) for y in x.relatedEps] for x in eps], [[(1, 2)], [(1, 1)], [], [], []])
+        self.assertTrue(eps[0].relatedEps[0] is eps[1])
+
+        self.assertEqual([(x.season, x.episode) for x in show.getAllEpisodes(season=1, has_location=True)], [(1, 1), (1, 2)])
+        self.assertTrue(show.getAllEpisodes(season=2)[0] is eps[3])
+
+    def _cachedEpisodes(self, show):
+        return sorted((season, episode) for season in show.episodes for episode in show.episodes[season])
+
+    def test_episode_cache_size(self):
+        show = TVShow(0001, "en")
+        sickbeard.showList = [show]
+        self._addEpisodes(show, [(1, x, "") for x in range(1, 31)])
+
+        old_size = sickbeard.EPISODE_CACHE_SIZE
+        sickbeard.EPISODE_CACHE_SIZE = 10
+        try:
+            first_ep = show.getEpisode(1, 1)
+            first_ep.name = "changed"
+            locked_ep = show.getEpisode(1, 2)
+            with locked_ep.lock:
+                for episode in range(3, 31):
+                    show.getEpisode(1, episode)
+
+                self.assertTrue(locked_ep.isLocked())
+                self.assertTrue(len(self._cachedEpisodes(show)) <= 10)
+                self.assertTrue((1, 2) in self._cachedEpisodes(show))
+                self.assertTrue((1, 30) in self._cachedEpisodes(show))
+                self.assertFalse((1, 1) in self._cachedEpisodes(show))
+
+            # an episode that's still in use somewhere isn't made again
+            self.assertTrue(show.getEpisode(1, 1) is first_ep)
+            self.assertEqual(show.getEpisode(1, 1).name, "changed")
+
+            show.flushEpisodes()
+            self.assertEqual(self._cachedEpisodes(show), [])
+            self.assertFalse(show.getEpisode(1, 1) is first_ep)
+        finally:
+            sickbeard.EPISODE_CACHE_SIZE = old_size
+
+    def test_episode_cache_threads(self):
+        show = TVShow(0001, "en")
+        sickbeard.showList = [show]
+        self._addEpisodes(show, [(1, x, "") for x in range(1, 201)])
+
+        errors = []
+
+        def getEpisodes(offset):
+            try:
+                for i in range(400):
+                    show.getEpisode(1, (i + offset) % 200 + 1)
+            except Exception, e:
+                errors.append(e)
+
+        old_size = sickbeard.EPISODE_CACHE_SIZE
+        sickbeard.EPISODE_CACHE_SIZE = 20
+        try:
+            threads = [threading.Thread(target=getEpisodes, args=(x * 7,)) for x in range(4)]
+            for curThread in threads:
+                curThread.start()
+            for curThread in threads:
+                curThread.join()
+        finally:
+            sickbeard.EPISODE_CACHE_SIZE = old_size
+
+        self.assertEqual(errors, [])
+        self.assertTrue(len(self._cachedEpisodes(show)) <= 20)
+        self.assertEqual(len(show._episodeUse), len(self._cachedEpisodes(show)))
+
+    def test_episode_lock(self):
+        show = TVShow(0001, "en")
+        ep = TVEpisode(show, 1, 1)
+
+        self.assertEqual(ep._lock, None)
+        self.assertFalse(ep.isLocked())
+        with ep.lock:
+            self.assertTrue(ep.isLocked())
+        self.assertTrue(ep.lock is ep.lock)
+        self.assertRaises(AttributeError, setattr, ep, "not_an_attribute", 1)
+
 
 if __name__ == '__main__':
     print "=================="
@@ -109,5 +527,20 @@ if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TVEpisodeTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
     print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ChangedColumnsTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(MetaFilesTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(DirListingCacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(EpisodeSaveBatchTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ShowIndexTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
     suite = unittest.TestLoader().loadTestsFromTestCase(TVTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
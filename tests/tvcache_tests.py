@@ -0,0 +1,120 @@
+# coding=UTF-8
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import test_lib as test
+
+import sickbeard
+from sickbeard import name_cache, tvcache
+from sickbeard.name_parser.parser import NameParser
+from sickbeard.providers.generic import GenericProvider
+
+
+RSS_ITEM = "<item><title>%s</title><link>%s</link></item>"
+
+
+class FeedCache(tvcache.TVCache):
+
+    def __init__(self, provider):
+        tvcache.TVCache.__init__(self, provider)
+        self.minTime = 0
+        self.feed = []
+
+    def _getRSSData(self):
+        return "<rss><channel>" + "".join([RSS_ITEM % x for x in self.feed]) + "</channel></rss>"
+
+
+class CountingNameParser(NameParser):
+
+    parsed = []
+
+    def parse(self, name):
+        CountingNameParser.parsed.append(name)
+        return NameParser.parse(self, name)
+
+
+class TVCacheUpdateTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(TVCacheUpdateTests, self).setUp()
+        self.provider = GenericProvider("Feed Provider")
+        self.provider.cache = FeedCache(self.provider)
+        self.cache = self.provider.cache
+
+        CountingNameParser.parsed = []
+        self._NameParser = tvcache.NameParser
+        tvcache.NameParser = CountingNameParser
+
+    def tearDown(self):
+        tvcache.NameParser = self._NameParser
+        super(TVCacheUpdateTests, self).tearDown()
+
+    def _cached(self):
+        myDB = test.db.DBConnection(test.TESTCACHEDBNAME)
+        return [(x["name"], x["episode"]) for x in myDB.select("SELECT name, episode FROM provider_cache WHERE provider = ? ORDER BY rowid", [self.cache.providerID])]
+
+    def test_only_new_items_are_parsed(self):
+        self.cache.feed = [("Show.Name.S01E01.720p.HDTV.x264-GRP", "http://feed/1")]
+        self.cache.updateCache()
+
+        self.cache.feed.insert(0, ("Show.Name.S01E02E03.720p.HDTV.x264-GRP", "http://feed/2"))
+        self.cache.updateCache()
+
+        self.assertEqual(CountingNameParser.parsed, ["Show.Name.S01E01.720p.HDTV.x264-GRP", "Show.Name.S01E02E03.720p.HDTV.x264-GRP"])
+        self.assertEqual(self._cached(), [("Show.Name.S01E01.720p.HDTV.x264-GRP", 1),
+                                          ("Show.Name.S01E02E03.720p.HDTV.x264-GRP", 2),
+                                          ("Show.Name.S01E02E03.720p.HDTV.x264-GRP", 3)])
+
+    def test_unparsable_items_are_not_retried(self):
+        self.cache.feed = [("not.a.tv.show", "http://feed/1")]
+        self.cache.updateCache()
+        self.cache.updateCache()
+
+        self.assertEqual(CountingNameParser.parsed, ["not.a.tv.show"])
+        self.assertEqual(self._cached(), [])
+
+    def test_old_items_age_out(self):
+        self.cache.feed = [("Show.Name.S01E01.720p.HDTV.x264-GRP", "http://feed/1")]
+        self.cache.updateCache()
+
+        myDB = test.db.DBConnection(test.TESTCACHEDBNAME)
+        myDB.action("UPDATE provider_cache SET time = time - ?", [(sickbeard.PROVIDER_CACHE_RETENTION + 1) * 86400])
+
+        self.cache.feed = [("Show.Name.S01E02.720p.HDTV.x264-GRP", "http://feed/2")]
+        self.cache.updateCache()
+
+        self.assertEqual(self._cached(), [("Show.Name.S01E02.720p.HDTV.x264-GRP", 2)])
+
+    def test_unknown_shows_are_retried_after_name_cache_clear(self):
+        self.cache.feed = [("Show.Name.S01E01.720p.HDTV.x264-GRP", "http://feed/1")]
+        self.cache.updateCache()
+
+        name_cache.clearCache()
+        self.cache.updateCache()
+
+        self.assertEqual(len(CountingNameParser.parsed), 2)
+        self.assertEqual(len(self._cached()), 1)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - TVCACHE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(TVCacheUpdateTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)